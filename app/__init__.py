@@ -1 +0,0 @@
-from .log import log_middleware
\ No newline at end of file
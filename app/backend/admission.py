@@ -0,0 +1,207 @@
+"""
+Контроль нагрузки: лимиты одновременных запросов по классам маршрутов.
+
+Когда PostgreSQL замедляется, запросы копятся в ожидании пула, и по
+таймауту отваливаются все маршруты сразу. Middleware ограничивает число
+одновременно обрабатываемых запросов отдельно для каждого класса:
+
+    browse - чтение (GET/HEAD/OPTIONS);
+    auth   - вход и регистрация (POST /auth/...): bcrypt нагружает CPU;
+    write  - остальные изменяющие запросы.
+
+Проверки /health, /metrics и /diagnostics не ограничиваются.
+
+Сверх лимита запрос ждёт в очереди класса (не больше queue_size мест и
+ADMISSION_QUEUE_TIMEOUT секунд); если очередь полна или ожидание истекло,
+сразу отвечаем 503 с Retry-After. Классы не мешают друг другу: при
+медленной записи чтение каталога продолжает работать.
+
+Лимит класса подстраивается под задержку (алгоритм Gradient2 из Netflix
+concurrency-limits): сравниваются быстрая и медленная скользящие средние
+времени ответа. Пока быстрая не больше медленной в
+ADMISSION_LATENCY_TOLERANCE раз, лимит растёт на величину очереди
+(sqrt(limit)), а при росте задержки уменьшается пропорционально ему, но
+не ниже min_limit. Время ожидания в очереди попадает в Server-Timing
+(queue).
+"""
+import asyncio
+import math
+import time
+from collections import deque
+
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
+
+from app.backend.config import (
+    ADMISSION_CLASSES,
+    ADMISSION_LATENCY_TOLERANCE,
+    ADMISSION_QUEUE_TIMEOUT,
+    ADMISSION_RETRY_AFTER,
+)
+from app.backend.metrics import ADMISSION_LIMIT, ADMISSION_REJECTED
+from app.backend.timing import timed
+
+
+EXEMPT_PREFIXES = ("/health", "/metrics", "/diagnostics")
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Сглаживание: быстрая средняя - последние ~10 ответов, медленная - ~500
+# (см. _update_limit)
+SHORT_WINDOW = 10
+LONG_WINDOW = 500
+# Доля нового значения при пересчёте лимита
+SMOOTHING = 0.2
+
+
+def route_class(method: str, path: str) -> str | None:
+    """Класс маршрута для лимитов; None - без ограничений"""
+    if path.startswith(EXEMPT_PREFIXES):
+        return None
+    if path.startswith("/auth") and method == "POST":
+        return "auth"
+    if method in READ_METHODS:
+        return "browse"
+    return "write"
+
+
+class Overloaded(Exception):
+    """Запрос отклонён: очередь класса полна или ожидание истекло"""
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+class AdaptiveLimiter:
+    """Адаптивный лимит одновременных запросов с ограниченной очередью (FIFO)"""
+
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        min_limit: int,
+        max_limit: int,
+        queue_size: int,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+        tolerance: float = ADMISSION_LATENCY_TOLERANCE,
+    ) -> None:
+        self.name = name
+        self.limit = float(limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.tolerance = tolerance
+        self.in_flight = 0
+        self.short_latency = 0.0
+        self.long_latency = 0.0
+        self._waiters: deque[asyncio.Future] = deque()
+        ADMISSION_LIMIT.labels(name).set(limit)
+
+    async def acquire(self) -> None:
+        """Занять место; Overloaded, если очередь полна или ожидание истекло"""
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+        if len(self._waiters) >= self.queue_size:
+            raise Overloaded("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            async with asyncio.timeout(self.queue_timeout):
+                await waiter
+        except BaseException as ex:
+            if waiter.done() and not waiter.cancelled():
+                # Место уже передано этому запросу, но он не дождался
+                self.release(None)
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if isinstance(ex, TimeoutError):
+                raise Overloaded("queue_timeout") from None
+            raise
+
+    def release(self, latency: float | None) -> None:
+        """Освободить место; latency - время ответа, если запрос выполнен"""
+        if latency is not None:
+            self._update_limit(latency)
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # Место переходит к ожидающему без освобождения
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _update_limit(self, latency: float) -> None:
+        if not self.long_latency:
+            self.short_latency = self.long_latency = latency
+            return
+        self.short_latency += (latency - self.short_latency) / SHORT_WINDOW
+        # При перегрузке медленная средняя растёт в 10 раз медленнее: лимит
+        # успевает снизиться, а затянувшееся замедление со временем
+        # становится новой нормой
+        overloaded = self.short_latency > self.tolerance * self.long_latency
+        window = LONG_WINDOW * 10 if overloaded else LONG_WINDOW
+        self.long_latency += (latency - self.long_latency) / window
+        # После спада нагрузки медленная средняя быстрее возвращается к норме
+        if self.long_latency / self.short_latency > 2:
+            self.long_latency *= 0.95
+
+        gradient = max(0.5, min(1.0, self.tolerance * self.long_latency / self.short_latency))
+        new_limit = self.limit * gradient + math.sqrt(self.limit)
+        # Лимит не растёт, пока он не используется хотя бы наполовину
+        # (снижение при росте задержки применяется всегда)
+        if self.in_flight < self.limit / 2:
+            new_limit = min(new_limit, self.limit)
+        new_limit = self.limit * (1 - SMOOTHING) + new_limit * SMOOTHING
+        self.limit = max(self.min_limit, min(self.max_limit, new_limit))
+        ADMISSION_LIMIT.labels(self.name).set(int(self.limit))
+
+    def stats(self) -> dict:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "latency_ms": {
+                "short": round(self.short_latency * 1000, 2),
+                "long": round(self.long_latency * 1000, 2),
+            },
+        }
+
+
+limiters = {
+    name: AdaptiveLimiter(name, **settings) for name, settings in ADMISSION_CLASSES.items()
+}
+
+
+def admission_stats() -> dict:
+    """Состояние лимитов по классам (в пределах процесса)"""
+    return {name: limiter.stats() for name, limiter in limiters.items()}
+
+
+async def admission_middleware(request: Request, call_next):
+    """Ограничивает одновременные запросы класса; сверх очереди - 503 с Retry-After"""
+    limiter = limiters.get(route_class(request.method, request.url.path))
+    if limiter is None:
+        return await call_next(request)
+
+    try:
+        with timed("queue"):
+            await limiter.acquire()
+    except Overloaded as ex:
+        ADMISSION_REJECTED.labels(limiter.name, ex.reason).inc()
+        return JSONResponse(
+            content={"detail": "Server is overloaded, retry later"},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": str(ADMISSION_RETRY_AFTER)},
+        )
+
+    start = time.perf_counter()
+    latency = None
+    try:
+        response = await call_next(request)
+        latency = time.perf_counter() - start
+        return response
+    finally:
+        limiter.release(latency)
@@ -1,8 +1,7 @@
-from .redis_client import redis_client, set_value, get_value, delete_key, key_exists
-from .celery_app import celery_app, simple_task
+from .redis_client import get_redis_client, set_value, get_value, delete_key, key_exists
 
 __all__ = [
-    "redis_client",
+    "get_redis_client",
     "set_value", 
     "get_value", 
     "delete_key", 
@@ -10,3 +9,12 @@ __all__ = [
     "celery_app",
     "simple_task"
 ]
+
+
+def __getattr__(name):
+    # Celery импортируется только при первом обращении к задачам
+    if name in ("celery_app", "simple_task"):
+        from .celery_app import celery_app, simple_task
+        globals().update(celery_app=celery_app, simple_task=simple_task)
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
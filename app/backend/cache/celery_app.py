@@ -1,5 +1,7 @@
 from celery import Celery
 from app.backend.config import CELERY_BROKER_URL, CELERY_RESULT_BACKEND
+from app.backend.metrics import connect_celery_metrics
+from app.backend.tracing import connect_celery_tracing
 
 # Создаем приложение Celery
 # Celery - это система для выполнения фоновых задач
@@ -18,6 +20,11 @@ celery_app.conf.update(
     enable_utc=True,              # Использовать UTC
 )
 
+# Метрики и трассировка отправки задач (сигналы подключаются вместе с Celery,
+# чтобы не импортировать его в процессах, которые задачи не отправляют)
+connect_celery_metrics()
+connect_celery_tracing()
+
 # Простая функция для проверки работы Celery
 @celery_app.task
 def simple_task(message):
@@ -1,31 +1,75 @@
-import redis
-from app.backend.config import REDIS_HOST, REDIS_PORT, REDIS_DB, REDIS_PASSWORD
-
-# Подключение к Redis
-redis_client = redis.Redis(
-    host=REDIS_HOST,           # Адрес сервера Redis
-    port=REDIS_PORT,           # Порт (обычно 6379)
-    db=REDIS_DB,               # Номер базы данных
-    #password=REDIS_PASSWORD,   # Пароль (если есть)
-    decode_responses=True       # Декодинг ответов в строки
+from contextlib import contextmanager
+from functools import cache
+from app.backend.config import (
+    REDIS_HOST, REDIS_PORT, REDIS_DB, REDIS_PASSWORD, REDIS_SOCKET_TIMEOUT, REDIS_CONNECT_TIMEOUT,
 )
+from app.backend.deadline import check_deadline
+from app.backend.metrics import REDIS_COMMAND_DURATION
+from app.backend.timing import timed
+from app.backend.tracing import KIND_CLIENT, start_span
+
+# Подключение к Redis создаётся при первом обращении: импорт redis заметно
+# удлиняет старт, а многим процессам (миграции, CLI) Redis не нужен
+@cache
+def get_redis_client():
+    import redis
+
+    return redis.Redis(
+        host=REDIS_HOST,           # Адрес сервера Redis
+        port=REDIS_PORT,           # Порт (обычно 6379)
+        db=REDIS_DB,               # Номер базы данных
+        #password=REDIS_PASSWORD,   # Пароль (если есть)
+        decode_responses=True,      # Декодинг ответов в строки
+        # Команда не может занять больше бюджета запроса (см. app/backend/deadline.py)
+        socket_timeout=REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+    )
+
+
+def close_redis_client():
+    """Закрыть пул соединений, если клиент уже создан"""
+    if get_redis_client.cache_info().currsize:
+        get_redis_client().connection_pool.disconnect()
+
+
+def __getattr__(name):
+    # Совместимость: redis_client как атрибут модуля
+    if name == "redis_client":
+        return get_redis_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@contextmanager
+def observe(command):
+    """Учитывает время команды в метриках, Server-Timing и трассировке запроса"""
+    check_deadline()  # Бюджет исчерпан: команда уже не нужна
+    with (
+        REDIS_COMMAND_DURATION.labels(command).time(),
+        timed("redis"),
+        start_span(f"redis.{command}", KIND_CLIENT, **{"db.system": "redis"}),
+    ):
+        yield
 
 # Простые функции для работы с Redis
 def set_value(key, value, expire=None):
     """Сохранить значение в Redis"""
-    redis_client.set(key, value, ex=expire)
+    with observe("set"):
+        get_redis_client().set(key, value, ex=expire)
 
 def get_value(key):
     """Получить значение из Redis"""
-    return redis_client.get(key)
+    with observe("get"):
+        return get_redis_client().get(key)
 
 def delete_key(key):
     """Удалить ключ из Redis"""
-    redis_client.delete(key)
+    with observe("delete"):
+        get_redis_client().delete(key)
 
 def key_exists(key):
     """Проверить, существует ли ключ"""
-    return redis_client.exists(key)
+    with observe("exists"):
+        return get_redis_client().exists(key)
 
 # Пример использования:
 # set_value("user:123", "John Doe", expire=3600)  # Сохранить на 1 час
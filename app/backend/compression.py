@@ -0,0 +1,204 @@
+"""
+Сжатие ответов: gzip и brotli.
+
+CompressionMiddleware сжимает ответ, если:
+    - клиент принимает кодировку (Accept-Encoding); при равном q brotli
+      предпочтительнее gzip. brotli - необязательная зависимость: без
+      пакета brotli ответы сжимаются только gzip;
+    - тип содержимого есть в COMPRESSION_TYPES, а ответ ещё не сжат;
+    - тело не меньше COMPRESSION_MIN_SIZE байт: на маленьких ответах
+      выигрыш в байтах не окупает заголовки и время сжатия.
+
+У сжатого ответа свой ETag ("<хеш>-gzip"), так как байты разных
+кодировок различаются. conditional_get сравнивает ETag без суффикса, и
+304 работает для любой кодировки; в 304 возвращаются Vary и ETag того
+варианта, который хранит клиент.
+
+ETag однозначно задаёт содержимое ответа, поэтому сжатые тела ответов с
+ETag хранятся в LRU-кэше процесса (до COMPRESSION_CACHE_BYTES). Пока
+данные не изменились, каждый вариант сжимается один раз. Большие тела
+сжимаются в потоке, чтобы не блокировать event loop (zlib и brotli
+отпускают GIL). Время сжатия попадает в Server-Timing (compress).
+"""
+import asyncio
+import gzip
+from collections import OrderedDict
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.backend.config import (
+    COMPRESSION_BROTLI_QUALITY,
+    COMPRESSION_CACHE_BYTES,
+    COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_MIN_SIZE,
+    COMPRESSION_TYPES,
+)
+from app.backend.etag import encoded_etag
+from app.backend.metrics import HTTP_COMPRESSED_BYTES, HTTP_COMPRESSION_CACHE
+from app.backend.timing import timed
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - зависит от окружения
+    brotli = None
+
+
+# В порядке предпочтения при равном q
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# Тела больше этого размера сжимаются в потоке
+THREAD_MIN_SIZE = 256 * 1024
+
+
+def compress(body: bytes, coding: str) -> bytes:
+    if coding == "br":
+        return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+    # mtime=0: одинаковое тело - одинаковые байты (и ETag)
+    return gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    """Кодировка из ENCODINGS с наибольшим q в Accept-Encoding; None - без сжатия"""
+    weights = {}
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.partition(";")
+        weight = 1.0
+        name, _, value = params.partition("=")
+        if name.strip() == "q":
+            try:
+                weight = float(value)
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip()] = weight
+
+    coding = max(ENCODINGS, key=lambda coding: weights.get(coding, weights.get("*", 0.0)))
+    return coding if weights.get(coding, weights.get("*", 0.0)) > 0 else None
+
+
+class CompressedCache:
+    """LRU-кэш сжатых тел по (ETag, кодировка), ограниченный суммарным размером"""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items: OrderedDict[tuple[str, str], bytes] = OrderedDict()
+
+    def get(self, key: tuple[str, str]) -> bytes | None:
+        body = self._items.get(key)
+        if body is not None:
+            self._items.move_to_end(key)
+        return body
+
+    def put(self, key: tuple[str, str], body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        previous = self._items.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous)
+        self._items[key] = body
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            _, evicted = self._items.popitem(last=False)
+            self.size -= len(evicted)
+
+
+class CompressionMiddleware:
+    """ASGI-middleware, сжимающее ответы gzip/brotli (см. описание модуля)"""
+
+    def __init__(self, app, cache_bytes: int = COMPRESSION_CACHE_BYTES):
+        self.app = app
+        self.cache = CompressedCache(cache_bytes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        coding = choose_encoding(request_headers.get("accept-encoding", ""))
+        start_message = None
+        chunks: list[bytes] = []
+
+        async def send_wrapper(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                if message["status"] == 304:
+                    await send(not_modified(message, coding, request_headers.get("if-none-match")))
+                elif compressible(message):
+                    start_message = message  # Заголовки уйдут вместе с телом
+                else:
+                    await send(message)
+            elif message["type"] == "http.response.body" and start_message is not None:
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    await self.send_response(start_message, b"".join(chunks), coding, send)
+            else:
+                await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def send_response(self, start_message, body: bytes, coding: str | None, send) -> None:
+        headers = MutableHeaders(raw=list(start_message["headers"]))
+        start_message["headers"] = headers.raw
+        if len(body) >= COMPRESSION_MIN_SIZE:
+            headers.add_vary_header("Accept-Encoding")
+            if coding is not None:
+                etag = headers.get("etag")
+                compressed = await self.compress(body, coding, etag)
+                HTTP_COMPRESSED_BYTES.labels(coding, "original").inc(len(body))
+                HTTP_COMPRESSED_BYTES.labels(coding, "compressed").inc(len(compressed))
+                body = compressed
+                headers["Content-Encoding"] = coding
+                headers["Content-Length"] = str(len(body))
+                if etag:
+                    headers["ETag"] = encoded_etag(etag, coding)
+
+        await send(start_message)
+        await send({"type": "http.response.body", "body": body})
+
+    async def compress(self, body: bytes, coding: str, etag: str | None) -> bytes:
+        """Сжатое тело: из кэша по ETag или сжатие (в потоке для больших тел)"""
+        if etag:
+            cached = self.cache.get((etag, coding))
+            HTTP_COMPRESSION_CACHE.labels("hit" if cached is not None else "miss").inc()
+            if cached is not None:
+                return cached
+
+        with timed("compress"):
+            if len(body) >= THREAD_MIN_SIZE:
+                compressed = await asyncio.to_thread(compress, body, coding)
+            else:
+                compressed = compress(body, coding)
+
+        if etag:
+            self.cache.put((etag, coding), compressed)
+        return compressed
+
+
+def not_modified(start_message, coding: str | None, if_none_match: str | None):
+    """
+    304 с теми же Vary и ETag, что у ответа 200 для этой кодировки.
+
+    Тела у 304 нет, и было ли сжато полное тело, по нему не узнать. Поэтому
+    ETag сжатого варианта отдаётся, если именно его прислал клиент.
+    """
+    headers = MutableHeaders(raw=list(start_message["headers"]))
+    start_message["headers"] = headers.raw
+    headers.add_vary_header("Accept-Encoding")
+    etag = headers.get("etag")
+    if coding is not None and etag and if_none_match:
+        variant = encoded_etag(etag, coding)
+        if variant in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+            headers["ETag"] = variant
+    return start_message
+
+
+def compressible(start_message) -> bool:
+    """Может ли ответ быть сжат: статус с телом, тип из списка, ещё не сжат"""
+    if start_message["status"] < 200 or start_message["status"] in (204, 304):
+        return False
+    headers = Headers(raw=start_message["headers"])
+    if "content-encoding" in headers:
+        return False
+    media_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+    return media_type in COMPRESSION_TYPES
@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 from pathlib import Path
@@ -11,21 +12,121 @@ URL_DATABASE = os.getenv("URL_DATABASE")
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 
+# Тестовые маршруты Redis/Celery (tests/test_endpoints.py), только для разработки
+ENABLE_DEMO_ROUTES = os.getenv("ENABLE_DEMO_ROUTES", "false").lower() == "true"
+
+# Сервер (см. app/server.py)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", 0))                  # Воркеров; 0 - по числу ядер
+SERVER_BIND = os.getenv("SERVER_BIND", "0.0.0.0:8000")
+SERVER_KEEPALIVE = int(os.getenv("SERVER_KEEPALIVE", 65))               # Секунды, больше idle-таймаута балансировщика
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", 2048))
+SERVER_MAX_REQUESTS = int(os.getenv("SERVER_MAX_REQUESTS", 10000))      # Перезапуск воркера; 0 - никогда
+SERVER_MAX_REQUESTS_JITTER = int(os.getenv("SERVER_MAX_REQUESTS_JITTER", 1000))
+SERVER_PRELOAD = os.getenv("SERVER_PRELOAD", "true").lower() == "true"
+
+# Запуск и остановка (см. app/backend/lifecycle.py)
+DB_WARMUP_CONNECTIONS = int(os.getenv("DB_WARMUP_CONNECTIONS", 5))       # Не больше размера пула
+HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", 1.0))     # Секунды
+READY_REQUIRE_REDIS = os.getenv("READY_REQUIRE_REDIS", "false").lower() == "true"
+SHUTDOWN_DRAIN_TIMEOUT = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", 30))  # Секунды
+# Секунды между SIGTERM (готовность снята) и остановкой приёма соединений:
+# балансировщик успевает вывести процесс из ротации
+SHUTDOWN_READINESS_GRACE = float(os.getenv("SHUTDOWN_READINESS_GRACE", 10))
+
+# Контроль нагрузки по классам маршрутов (см. app/backend/admission.py)
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", 2.0))          # Секунды в очереди до 503
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", 2))                  # Секунды, заголовок Retry-After
+ADMISSION_LATENCY_TOLERANCE = float(os.getenv("ADMISSION_LATENCY_TOLERANCE", 2.0))  # Рост задержки без снижения лимита
+ADMISSION_CLASSES = {
+    # Класс: начальный лимит одновременных запросов, его границы и мест в очереди
+    "browse": {
+        "limit": int(os.getenv("ADMISSION_BROWSE_LIMIT", 32)),
+        "min_limit": 4, "max_limit": 256, "queue_size": 256,
+    },
+    "auth": {  # bcrypt: не больше потоков, чем ядер
+        "limit": int(os.getenv("ADMISSION_AUTH_LIMIT", os.cpu_count() or 1)),
+        "min_limit": 1, "max_limit": 32, "queue_size": 32,
+    },
+    "write": {
+        "limit": int(os.getenv("ADMISSION_WRITE_LIMIT", 8)),
+        "min_limit": 1, "max_limit": 64, "queue_size": 64,
+    },
+}
+
+# Бюджет времени запроса, секунды (см. app/backend/deadline.py)
+REQUEST_DEADLINES_ENABLED = os.getenv("REQUEST_DEADLINES_ENABLED", "true").lower() == "true"
+REQUEST_BUDGET_DEFAULT = float(os.getenv("REQUEST_BUDGET_DEFAULT", 10))
+REQUEST_BUDGETS = {
+    # "МЕТОД шаблон маршрута": бюджет; 0 - без ограничения
+    "GET /products/{product_slug}": 3.0,  # Дерево категорий с продуктами
+    "GET /products/all": 5.0,
+    "GET /categories/all": 3.0,
+    "GET /reviews/": 5.0,
+    **json.loads(os.getenv("REQUEST_BUDGETS", "{}")),
+}
+
 # Логирование
-LOG_DIR = Path('logs')
-LOG_DIR.mkdir(parents=True, exist_ok=True)
+LOG_DIR = Path('logs')  # Создаётся при первой записи
 LOG_CONF = {
-    "format": "Log: [{extra[log_id]}:{time} - {level} - {message} ",
-    "enqueue": True,
-    "rotation": "10 MB",
-    "retention": "10 days"
+    "batch_size": int(os.getenv("LOG_BATCH_SIZE", 256)),           # Записей в пачке
+    "flush_interval": float(os.getenv("LOG_FLUSH_INTERVAL", 0.5)),  # Секунд до записи
+    "rotation_bytes": 10 * 1024 * 1024,
+    "retention_days": 10,
 }
+# Доля успешных запросов, попадающих в info.log (ошибки пишутся всегда)
+LOG_SUCCESS_SAMPLE_RATE = float(os.getenv("LOG_SUCCESS_SAMPLE_RATE", 1.0))
+# Успешные запросы дольше порога пишутся всегда, независимо от выборки
+LOG_SLOW_REQUEST_MS = float(os.getenv("LOG_SLOW_REQUEST_MS", 1000))
+
+# Контроль числа SQL-запросов на HTTP-запрос (см. app/backend/sql_monitor.py)
+SQL_MAX_QUERIES = int(os.getenv("SQL_MAX_QUERIES", 20))
+SQL_MAX_REPEATS = int(os.getenv("SQL_MAX_REPEATS", 5))
+SQL_MONITOR_STRICT = os.getenv("SQL_MONITOR_STRICT", "false").lower() == "true"
+
+# Журнал медленных запросов, мс (см. app/backend/slow_query.py)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+SLOW_QUERY_EXPLAIN_MS = float(os.getenv("SLOW_QUERY_EXPLAIN_MS", 1000))
+SLOW_QUERY_EXPLAIN_RATE = float(os.getenv("SLOW_QUERY_EXPLAIN_RATE", 0.1))
+
+# Трассировка: доля трассируемых запросов и размер буфера span'ов
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 0.01))
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", 10000))
+
+# Профилирование запросов (см. app/backend/profiling.py)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0.0))  # Фоновый режим
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", 0.001))      # Шаг сэмплирования, с
+PROFILE_FORMAT = os.getenv("PROFILE_FORMAT", "html")                # html | speedscope
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", 200))
+
+# Диагностика памяти: строк в отчётах о приросте (см. app/backend/memory.py)
+MEMORY_TOP_LIMIT = int(os.getenv("MEMORY_TOP_LIMIT", 20))
+
+# Контроль задержки event loop, секунды (см. app/backend/loop_monitor.py)
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", 0.1))
+LOOP_BLOCK_THRESHOLD = float(os.getenv("LOOP_BLOCK_THRESHOLD", 0.25))
+
+# Сжатие ответов (см. app/backend/compression.py)
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))      # Байт; меньшие ответы не сжимаются
+COMPRESSION_TYPES = os.getenv(
+    "COMPRESSION_TYPES", "application/json,text/html,text/plain,text/css,application/javascript"
+).split(",")
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", 6))     # 1-9
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", 5))  # 0-11, нужен пакет brotli
+COMPRESSION_CACHE_BYTES = int(os.getenv("COMPRESSION_CACHE_BYTES", 32 * 1024 * 1024))  # 0 - без кэша
+
+# Метрики Prometheus: общий каталог для нескольких воркеров (см. app/backend/metrics.py)
+METRICS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
 
 # Redis 
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 REDIS_DB = int(os.getenv("REDIS_DB", 0))
 REDIS_PASSWORD = os.getenv("REDIS_PASSWORD")
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 0.5))    # Секунды на ответ команды
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", 0.5))  # Секунды на подключение
 
 # Celery
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
@@ -1,10 +1,103 @@
-from typing import AsyncGenerator
+from typing import Annotated, AsyncGenerator
+
+import anyio
+from fastapi import Depends
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.backend.db import async_session_maker
+from app.backend.loaders import Loaders
+from app.backend.metrics import DB_SESSION_REQUESTS
+
+
+# Счётчики по завершённым запросам, объявившим get_db (в пределах одного
+# процесса). Запросы в обработке не учитываются: иначе они попадали бы в
+# requests_without_connection, ещё не успев взять соединение
+session_stats = {
+    "requests": 0,             # Всего запросов с зависимостью get_db
+    "sessions_created": 0,     # Сколько раз сессия реально создавалась
+    "connections_acquired": 0, # Сколько раз сессия брала соединение из пула
+}
+
+
+@event.listens_for(Session, "after_begin")
+def _mark_connection_acquired(session, transaction, connection):
+    """Помечает сессию, которая взяла соединение из пула"""
+    session.info["connection_acquired"] = True
+
+
+class LazySession:
+    """
+    Ленивый прокси для AsyncSession.
+
+    Сессия создаётся при первом обращении к любому её атрибуту, а соединение
+    из пула берётся самой сессией только при первом запросе к БД. Запросы,
+    которые завершились до этого (ошибка авторизации, ответ из кэша),
+    пул не занимают.
+    """
+
+    __slots__ = ("_session",)
+
+    def __init__(self) -> None:
+        self._session: AsyncSession | None = None
+
+    @property
+    def session(self) -> AsyncSession:
+        """Реальная сессия; создаётся при первом обращении"""
+        if self._session is None:
+            self._session = async_session_maker()
+            session_stats["sessions_created"] += 1
+        return self._session
+
+    @property
+    def connection_acquired(self) -> bool:
+        """Брала ли сессия соединение из пула"""
+        return self._session is not None and bool(
+            self._session.sync_session.info.get("connection_acquired")
+        )
+
+    async def release(self) -> None:
+        """
+        Досрочно вернуть соединение в пул.
+
+        Загруженные объекты остаются доступными (expire_on_commit=False),
+        а при следующем запросе к БД сессия возьмёт новое соединение.
+        """
+        if self._session is not None:
+            await self._session.close()
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+
+def get_session_stats() -> dict:
+    """Возвращает счётчики использования сессий и долю запросов без обращения к пулу"""
+    stats = dict(session_stats)
+    stats["requests_without_connection"] = (
+        stats["requests"] - stats["connections_acquired"]
+    )
+    return stats
+
+
+async def get_db() -> AsyncGenerator[LazySession, None]:
+    """Получает ленивую сессию БД; соединение берётся только при первом запросе"""
+    db = LazySession()
+    try:
+        yield db
+    finally:
+        session_stats["requests"] += 1
+        if db.connection_acquired:
+            session_stats["connections_acquired"] += 1
+            DB_SESSION_REQUESTS.labels("acquired").inc()
+        else:
+            DB_SESSION_REQUESTS.labels("none").inc()
+        # Запрос могли отменить (бюджет времени, отключение клиента): без
+        # защиты отмена прервёт и закрытие сессии, и соединение не вернётся в пул
+        with anyio.CancelScope(shield=True):
+            await db.release()
 
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    """Получает сессию подключение к БД с помощью контекстного менеджера"""
-    async with async_session_maker() as session:
-        yield session
+async def get_loaders(db: Annotated[LazySession, Depends(get_db)]) -> Loaders:
+    """Пакетные загрузчики связанных объектов, общие для всего запроса"""
+    return Loaders(db)
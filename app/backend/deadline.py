@@ -0,0 +1,199 @@
+"""
+Бюджет времени запроса (deadline) и его передача в PostgreSQL и Redis.
+
+У каждого маршрута есть бюджет - REQUEST_BUDGETS по ключу "МЕТОД шаблон",
+иначе REQUEST_BUDGET_DEFAULT. DeadlineMiddleware запоминает момент его
+истечения в ContextVar и выполняет запрос в отдельной задаче:
+
+    - по истечении бюджета задача отменяется, клиент получает 504;
+    - если клиент отключился (проверяется для запросов дольше WATCH_AFTER),
+      задача тоже отменяется (в логах и метриках
+      статус 499, как у nginx): работа на ответ, который никто не прочитает,
+      не продолжается и не держит соединения с БД.
+
+Остаток бюджета передаётся ниже по стеку:
+
+    - каждая транзакция сессии в PostgreSQL начинается с
+      set_config('statement_timeout', ..., true): запрос, который не
+      уложится в остаток, сервер прервёт сам (SQLSTATE 57014), а не будет
+      выполнять его после ответа клиенту. Значение действует до конца
+      транзакции; это один дополнительный запрос на транзакцию;
+    - Redis-команды не отправляются, если бюджет уже исчерпан, а время
+      ожидания ответа ограничено REDIS_SOCKET_TIMEOUT.
+
+Случаи 504 и 499 считаются в http_request_deadline_total по шаблону маршрута.
+"""
+import asyncio
+import time
+from contextvars import ContextVar
+
+from fastapi import Request, Response, status
+from fastapi.responses import JSONResponse
+from loguru import logger
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.backend.config import REQUEST_BUDGET_DEFAULT, REQUEST_BUDGETS
+from app.backend.metrics import HTTP_REQUEST_DEADLINE, route_template
+
+
+# Статус для отключившегося клиента (nginx): ответ никто не получит
+CLIENT_CLOSED_REQUEST = 499
+
+# SQLSTATE query_canceled: сработал statement_timeout
+QUERY_CANCELED = "57014"
+
+# set_config, а не SET LOCAL: значение передаётся параметром, и у запроса
+# одна форма для статистики pg_stat_statements и sql_monitor
+SET_STATEMENT_TIMEOUT = text("SELECT set_config('statement_timeout', :timeout, true)")
+
+# Отключение клиента отслеживается, только если запрос выполняется дольше:
+# ожидание receive во внешних middleware дорого отменять на каждом запросе
+WATCH_AFTER = 0.1
+
+_deadline: ContextVar[float | None] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Бюджет времени запроса исчерпан"""
+
+
+def budget_for(method: str, template: str) -> float | None:
+    """Бюджет маршрута в секундах; None - без ограничения"""
+    budget = REQUEST_BUDGETS.get(f"{method} {template}", REQUEST_BUDGET_DEFAULT)
+    return budget or None
+
+
+def remaining() -> float | None:
+    """Остаток бюджета текущего запроса в секундах; None - без ограничения"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def check_deadline() -> None:
+    """DeadlineExceeded, если бюджет текущего запроса исчерпан"""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded
+
+
+def is_deadline_error(ex: BaseException) -> bool:
+    """Ошибка из-за исчерпанного бюджета: своя проверка или statement_timeout"""
+    if isinstance(ex, DeadlineExceeded):
+        return True
+    return isinstance(ex, DBAPIError) and getattr(ex.orig, "sqlstate", None) == QUERY_CANCELED
+
+
+@event.listens_for(Session, "after_begin")
+def _set_statement_timeout(session, transaction, connection):
+    """Остаток бюджета - statement_timeout транзакции"""
+    left = remaining()
+    if left is None:
+        return
+    if left <= 0:
+        raise DeadlineExceeded
+    if connection.dialect.name == "postgresql":
+        connection.execute(SET_STATEMENT_TIMEOUT, {"timeout": f"{max(1, int(left * 1000))}ms"})
+
+
+class DeadlineMiddleware:
+    """ASGI-middleware: бюджет времени запроса и отмена при отключении клиента"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope, receive)
+        route = route_template(request)
+        budget = budget_for(request.method, route)
+
+        # Тело читается заранее: дальше receive ждёт только отключения клиента.
+        # Без тела (GET) receive не вызывается - это дорого во внешних middleware
+        messages = []
+        headers = request.headers
+        if headers.get("content-length", "0") != "0" or "transfer-encoding" in headers:
+            more_body = True
+            while more_body:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    await self.cancelled(request, route, budget, "client_disconnect", send)
+                    return
+                messages.append(message)
+                more_body = message.get("more_body", False)
+        else:
+            messages.append({"type": "http.request", "body": b"", "more_body": False})
+
+        disconnected = asyncio.Event()
+
+        async def watch_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+
+        async def replay():
+            if messages:
+                return messages.pop(0)
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        response_started = False
+
+        async def send_wrapper(message):
+            nonlocal response_started
+            response_started = True
+            await send(message)
+
+        deadline = time.monotonic() + budget if budget else None
+        token = _deadline.set(deadline)
+        try:
+            task = asyncio.create_task(self.app(scope, replay, send_wrapper))
+        finally:
+            _deadline.reset(token)
+        watcher = None
+
+        try:
+            done, _ = await asyncio.wait({task}, timeout=min(budget or WATCH_AFTER, WATCH_AFTER))
+            if not done:
+                watcher = asyncio.create_task(watch_disconnect())
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                done, _ = await asyncio.wait(
+                    {task, watcher}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+            if task in done:
+                ex = task.exception()
+                if ex is None:
+                    return
+                if not is_deadline_error(ex):
+                    raise ex
+                reason = "deadline"
+            else:
+                reason = "client_disconnect" if watcher in done else "deadline"
+                task.cancel()
+                await asyncio.wait({task})
+        finally:
+            task.cancel()
+            if watcher is not None:
+                watcher.cancel()
+
+        await self.cancelled(request, route, budget, reason, None if response_started else send)
+
+    @staticmethod
+    async def cancelled(request: Request, route: str, budget: float | None, reason: str, send) -> None:
+        """Учесть прерванный запрос и ответить 504 или 499 (send=None - ответ уже начат)"""
+        HTTP_REQUEST_DEADLINE.labels(route, reason).inc()
+        logger.warning(f"Request cancelled ({reason}): {request.method} {route}, budget {budget}s")
+        if send is None:
+            return
+        if reason == "deadline":
+            response = JSONResponse(
+                content={"detail": "Request budget exceeded"},
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            )
+        else:
+            response = Response(status_code=CLIENT_CLOSED_REQUEST)
+        await response(request.scope, request.receive, send)
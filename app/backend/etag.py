@@ -0,0 +1,132 @@
+"""
+Версии таблиц и условные GET-запросы (ETag / If-None-Match).
+
+Для таблиц из VERSIONED_TABLES в table_versions хранится счётчик
+изменений. Он увеличивается в той же транзакции, что и само изменение:
+при INSERT/UPDATE/DELETE через db.execute и при flush изменённых
+ORM-объектов. Поэтому закоммиченные данные и счётчик согласованы, в каком
+бы воркере или процессе ни произошло изменение. Массовая загрузка в обход
+сессии (COPY, TRUNCATE, сырой SQL) должна сама вызвать bump_versions в
+своей транзакции - так делает benchmarks.datagen.
+
+Маршрут каталога сначала читает версии нужных таблиц (один запрос по
+первичному ключу) и вычисляет по ним ETag. Если клиент прислал его в
+If-None-Match, ответ 304 уходит до основного запроса и сериализации:
+
+    headers = await conditional_get(request, db, "products")
+    ...
+    return ModelJSONResponse(content, schema, headers=headers)
+
+Изменения одной таблицы ждут друг друга на строке её счётчика до
+коммита; для каталога, который читают намного чаще, чем меняют, это
+допустимо.
+"""
+import hashlib
+import re
+from itertools import chain
+
+from fastapi import HTTPException, Request, status
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from app import queries
+from app.models import TableVersion
+
+
+# Таблицы, от которых зависят ответы с ETag
+VERSIONED_TABLES = frozenset({"products", "categories", "users"})
+
+# Меняется вместе с форматом ответов, чтобы после деплоя старые ETag не совпали
+ETAG_FORMAT = "1"
+
+# Суффикс кодировки сжатого варианта (см. encoded_etag)
+_ENCODING_SUFFIX = re.compile(r'-(?:gzip|br)"$')
+
+
+def bump_versions(connection, tables) -> None:
+    """Увеличить счётчики таблиц в текущей транзакции соединения"""
+    # Одинаковый порядок блокировок строк во всех транзакциях
+    for name in sorted(tables):
+        result = connection.execute(queries.BUMP_TABLE_VERSION, {"table_name": name})
+        if result.rowcount == 0:
+            connection.execute(insert(TableVersion).values(name=name, version=1))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bump_on_dml(orm_execute_state):
+    """INSERT/UPDATE/DELETE через session.execute"""
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        name = orm_execute_state.statement.table.name
+        if name in VERSIONED_TABLES:
+            bump_versions(orm_execute_state.session.connection(), [name])
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_on_flush(session, flush_context):
+    """Изменения ORM-объектов (new/dirty/deleted ещё содержат состояние до flush)"""
+    changed = chain(
+        session.new,
+        session.deleted,
+        (obj for obj in session.dirty if session.is_modified(obj)),
+    )
+    tables = {obj.__table__.name for obj in changed} & VERSIONED_TABLES
+    if tables:
+        bump_versions(session.connection(), tables)
+
+
+async def table_versions(db, tables) -> dict[str, int]:
+    """Текущие версии таблиц (0 для таблиц без счётчика)"""
+    result = await db.execute(queries.TABLE_VERSIONS, {"names": list(tables)})
+    versions = dict(result.all())
+    return {name: versions.get(name, 0) for name in tables}
+
+
+def make_etag(request: Request, versions: dict[str, int]) -> str:
+    """Сильный ETag ответа на запрос request при данных версиях таблиц"""
+    key = "|".join([
+        ETAG_FORMAT,
+        request.url.path,
+        request.url.query,
+        ",".join(f"{name}={version}" for name, version in sorted(versions.items())),
+    ])
+    return '"' + hashlib.blake2b(key.encode(), digest_size=12).hexdigest() + '"'
+
+
+def encoded_etag(etag: str, coding: str) -> str:
+    """ETag сжатого представления: "<хеш>-gzip" (байты разных кодировок различаются)"""
+    return f'{etag[:-1]}-{coding}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Совпадает ли ETag с заголовком If-None-Match.
+
+    Сравнение слабое (RFC 9110) и без суффикса кодировки: клиент получает
+    304 на ETag любого сжатого варианта того же ответа. "*" не совпадает:
+    conditional_get вызывается до поиска ресурса и не знает, существует ли он.
+    """
+    if not if_none_match:
+        return False
+    return any(
+        _ENCODING_SUFFIX.sub('"', tag.strip().removeprefix("W/")) == etag
+        for tag in if_none_match.split(",")
+    )
+
+
+async def conditional_get(request: Request, db, *tables: str) -> dict[str, str]:
+    """
+    Заголовки ETag для ответа, который зависит от таблиц tables.
+
+    Если ETag совпал с If-None-Match, выбрасывает HTTPException 304 с
+    теми же заголовками. Cache-Control: no-cache - клиент может хранить
+    ответ, но перед использованием обязан его перепроверить.
+    """
+    for name in tables:
+        if name not in VERSIONED_TABLES:
+            raise ValueError(f"Table {name!r} is not versioned")
+
+    etag = make_etag(request, await table_versions(db, tables))
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return headers
@@ -0,0 +1,183 @@
+"""
+Запуск и остановка приложения.
+
+startup() (из lifespan) заранее открывает DB_WARMUP_CONNECTIONS соединений
+пула, проверяет Redis, прогревает кэш скомпилированных запросов SQLAlchemy
+и загружает backend bcrypt, чтобы первые запросы после деплоя не платили
+за ленивую инициализацию.
+
+Остановка при rolling-деплое. Хук lifespan вызывается, когда сервер уже
+закрыл сокет и дождался открытых соединений, - снимать готовность там
+поздно. Поэтому startup() перехватывает SIGTERM (обработчик, который
+установил uvicorn, в том числе в воркере gunicorn): первый сигнал
+только переводит процесс в draining - /health/ready отвечает 503, а
+запросы по-прежнему обслуживаются. Через SHUTDOWN_READINESS_GRACE секунд,
+когда балансировщик уже вывел процесс из ротации, сигнал передаётся
+серверу: он перестаёт принимать соединения и ждёт запросов в обработке
+(не дольше SHUTDOWN_DRAIN_TIMEOUT). Повторный SIGTERM останавливает сервер
+сразу. SIGINT (Ctrl+C при локальном запуске) не перехватывается и
+останавливает сервер без задержки.
+
+shutdown() после этого по порядку закрывает пул БД и пул соединений Redis.
+
+Состояние отдают /health/live и /health/ready (app/routers/health.py).
+"""
+import asyncio
+import signal
+import threading
+import time
+from contextlib import AsyncExitStack
+
+from loguru import logger
+
+from app import queries
+from app.backend.cache.redis_client import close_redis_client, get_redis_client
+from app.backend.config import (
+    DB_WARMUP_CONNECTIONS,
+    HEALTH_CHECK_TIMEOUT,
+    READY_REQUIRE_REDIS,
+    SHUTDOWN_READINESS_GRACE,
+)
+from app.backend.db import engine
+from app.routers.auth import bcrypt_context
+
+
+# Запросы, которые прогоняются при старте для прогрева кэша компиляции
+HOT_STATEMENTS = (
+    queries.ACTIVE_CATEGORY_ROWS,
+    queries.ACTIVE_PRODUCT_ROWS,
+    queries.ACTIVE_REVIEW_ROWS,
+)
+
+
+class AppState:
+    """Состояние процесса для проверок готовности"""
+
+    __slots__ = ("started", "draining", "in_flight")
+
+    def __init__(self) -> None:
+        self.started = False
+        self.draining = False
+        self.in_flight = 0
+
+
+state = AppState()
+
+
+class InFlightMiddleware:
+    """ASGI-middleware, считающее HTTP-запросы в обработке (для остановки)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        state.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            state.in_flight -= 1
+
+
+async def check_db() -> bool:
+    try:
+        async with asyncio.timeout(HEALTH_CHECK_TIMEOUT):
+            async with engine.connect() as conn:
+                await conn.exec_driver_sql("SELECT 1")
+        return True
+    except Exception as ex:
+        logger.warning(f"Database health check failed: {ex!r}")
+        return False
+
+
+async def check_redis() -> bool:
+    try:
+        async with asyncio.timeout(HEALTH_CHECK_TIMEOUT):
+            return bool(await asyncio.to_thread(get_redis_client().ping))
+    except Exception as ex:
+        logger.warning(f"Redis health check failed: {ex!r}")
+        return False
+
+
+async def readiness() -> tuple[bool, dict]:
+    """Готовность принимать трафик и результаты отдельных проверок"""
+    db_ok, redis_ok = await asyncio.gather(check_db(), check_redis())
+    checks = {
+        "started": state.started,
+        "draining": state.draining,
+        "database": db_ok,
+        "redis": redis_ok,
+    }
+    ready = state.started and not state.draining and db_ok
+    if READY_REQUIRE_REDIS:
+        ready = ready and redis_ok
+    return ready, checks
+
+
+async def _warmup_db(connections: int) -> None:
+    """Открыть connections соединений одновременно, чтобы пул их сохранил"""
+    async with AsyncExitStack() as stack:
+        opened = [
+            await stack.enter_async_context(engine.connect()) for _ in range(connections)
+        ]
+        for conn in opened:
+            await conn.exec_driver_sql("SELECT 1")
+        for statement in HOT_STATEMENTS:
+            await opened[0].execute(statement)
+
+
+def _warmup_bcrypt() -> None:
+    """Загрузить backend bcrypt (passlib делает это лениво при первом хешировании)"""
+    bcrypt_context.handler().get_backend()
+
+
+def drain_on_signal() -> None:
+    """Первый SIGTERM - draining, серверу он передаётся через SHUTDOWN_READINESS_GRACE"""
+    # Сигналы обрабатываются только в главном потоке (не в TestClient)
+    if threading.current_thread() is not threading.main_thread():
+        return
+    loop = asyncio.get_running_loop()
+    handler = signal.getsignal(signal.SIGTERM)
+    if not callable(handler):
+        return
+
+    def on_signal(signum, frame):
+        if state.draining:
+            handler(signum, frame)
+            return
+        state.draining = True
+        logger.info(f"Draining: stopping in {SHUTDOWN_READINESS_GRACE:.0f} s")
+        loop.call_soon_threadsafe(
+            loop.call_later, SHUTDOWN_READINESS_GRACE, handler, signum, frame
+        )
+
+    signal.signal(signal.SIGTERM, on_signal)
+
+
+async def startup() -> None:
+    start = time.perf_counter()
+    state.draining = False
+    drain_on_signal()
+    try:
+        await _warmup_db(DB_WARMUP_CONNECTIONS)
+    except Exception as ex:
+        logger.error(f"Database warmup failed: {ex!r}")
+    if not await check_redis():
+        logger.warning("Redis is unavailable at startup")
+    await asyncio.to_thread(_warmup_bcrypt)
+
+    state.started = True
+    logger.info(f"Startup warmup finished in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+
+async def shutdown() -> None:
+    state.draining = True
+    # Сервер уже дождался запросов (timeout_graceful_shutdown / graceful_timeout)
+    if state.in_flight:
+        logger.warning(f"Shutdown with {state.in_flight} requests still in flight")
+
+    await engine.dispose()
+    close_redis_client()
+    logger.info("Shutdown complete")
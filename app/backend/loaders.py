@@ -0,0 +1,110 @@
+"""
+Пакетная загрузка связанных объектов в стиле DataLoader.
+
+Ключи, запрошенные за один тик цикла событий, загружаются одним
+запросом вида ``WHERE column IN (...)``. Поэтому вложенные данные
+(категория, поставщик и т.п.) для списка из N строк стоят один запрос,
+а не N ленивых загрузок, которые AsyncSession к тому же не поддерживает.
+
+Пример:
+    categories = await loaders.category.load_many([p.category_id for p in products])
+"""
+import asyncio
+from collections import defaultdict
+
+from sqlalchemy import bindparam, select
+
+from app.models import Cart, CartItem, Category, Product, User
+
+
+class BatchLoader:
+    """Загрузчик объектов модели по значению столбца column"""
+
+    def __init__(self, db, column, many: bool = False, lock: asyncio.Lock | None = None):
+        """
+        Args:
+            db: Сессия базы данных (общая для запроса)
+            column: Столбец, по которому ищутся объекты (например, Category.id)
+            many: True, если по одному ключу может быть несколько объектов
+            lock: Общая блокировка: сессия не допускает параллельных запросов
+        """
+        self._db = db
+        self._many = many
+        self._lock = lock or asyncio.Lock()
+        self._statement = select(column.class_).where(
+            column.in_(bindparam("keys", expanding=True))
+        )
+        self._key = column.key
+        self._cache: dict = {}
+        self._pending: list = []
+        self._dispatch_tasks: set = set()
+
+    def _empty(self):
+        return [] if self._many else None
+
+    def _enqueue(self, key) -> asyncio.Future:
+        """Возвращает future для ключа, ставя ключ в очередь ближайшей загрузки"""
+        future = self._cache.get(key)
+        if future is not None:
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._cache[key] = future
+
+        if not self._pending:
+            # Загрузка стартует на следующем тике, когда остальные ключи уже собраны
+            task = loop.create_task(self._dispatch())
+            self._dispatch_tasks.add(task)
+            task.add_done_callback(self._dispatch_tasks.discard)
+        self._pending.append(key)
+        return future
+
+    async def _dispatch(self) -> None:
+        """Загружает все накопленные ключи одним IN-запросом"""
+        keys, self._pending = self._pending, []
+        try:
+            async with self._lock:
+                result = await self._db.scalars(self._statement, {"keys": keys})
+                rows = result.all()
+
+            found = defaultdict(list)
+            for row in rows:
+                found[getattr(row, self._key)].append(row)
+
+            for key in keys:
+                values = found.get(key)
+                if self._many:
+                    self._cache[key].set_result(values or [])
+                else:
+                    self._cache[key].set_result(values[0] if values else None)
+
+        except Exception as ex:
+            for key in keys:
+                if not self._cache[key].done():
+                    self._cache[key].set_exception(ex)
+
+    async def load(self, key):
+        """Загрузить объект (или список объектов при many=True) по ключу"""
+        if key is None:
+            return self._empty()
+        return await self._enqueue(key)
+
+    async def load_many(self, keys) -> list:
+        """Загрузить объекты для списка ключей; порядок результата совпадает с keys"""
+        futures = [None if key is None else self._enqueue(key) for key in keys]
+        return [self._empty() if future is None else await future for future in futures]
+
+
+class Loaders:
+    """Набор загрузчиков одного запроса"""
+
+    def __init__(self, db):
+        lock = asyncio.Lock()
+        self.category = BatchLoader(db, Category.id, lock=lock)
+        self.supplier = BatchLoader(db, User.id, lock=lock)
+        self.products_by_category = BatchLoader(
+            db, Product.category_id, many=True, lock=lock
+        )
+        self.cart_by_user = BatchLoader(db, Cart.user_id, lock=lock)
+        self.cart_items_by_cart = BatchLoader(db, CartItem.cart_id, many=True, lock=lock)
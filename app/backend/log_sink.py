@@ -0,0 +1,124 @@
+"""
+Буферизованный асинхронный sink для loguru.
+
+Вызов логгера в обработчике запроса только кладёт запись в очередь в
+памяти. Фоновый поток сериализует записи в JSON (одна строка на запись)
+и пишет их в файл пачками: по накоплении batch_size записей или раз в
+flush_interval секунд. Файл ротируется по размеру, старые файлы удаляются
+по сроку хранения. При logger.remove() (и при выходе из процесса) loguru
+вызывает stop(), который дописывает остаток очереди.
+
+Sink создаётся в процессе, который будет писать логи: поток-писатель не
+переживает fork, поэтому при preload (app/server.py) sink'и подключаются
+в lifespan воркера.
+"""
+import json
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+
+def format_record(record: dict) -> str:
+    """Запись loguru в виде строки JSON"""
+    data = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "message": record["message"],
+        **record["extra"],
+    }
+    exception = record["exception"]
+    if exception is not None:
+        data["exception"] = "".join(
+            traceback.format_exception(exception.type, exception.value, exception.traceback)
+        )
+    return json.dumps(data, ensure_ascii=False, default=str) + "\n"
+
+
+class BatchedFileSink:
+    """Пишет JSON-записи в файл пачками из фонового потока"""
+
+    def __init__(
+        self,
+        path: Path,
+        batch_size: int = 256,
+        flush_interval: float = 0.5,
+        rotation_bytes: int | None = None,
+        retention_days: int | None = None,
+    ):
+        """
+        Args:
+            path: Путь к файлу лога
+            batch_size: Сколько записей накопить до внеочередной записи
+            flush_interval: Максимальная задержка записи в секундах
+            rotation_bytes: Размер файла, после которого он ротируется
+            retention_days: Сколько дней хранить ротированные файлы
+        """
+        self._path = Path(path)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._rotation_bytes = rotation_bytes
+        self._retention_days = retention_days
+
+        self._queue: deque = deque()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._file = None
+
+        self._thread = threading.Thread(
+            target=self._run, name=f"log-writer-{self._path.name}", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, message) -> None:
+        """Поставить запись в очередь (вызывается loguru в потоке запроса)"""
+        self._queue.append(message.record)
+        if len(self._queue) >= self._batch_size:
+            self._wakeup.set()
+
+    def stop(self) -> None:
+        """Дописать очередь и закрыть файл"""
+        self._stopped = True
+        self._wakeup.set()
+        self._thread.join()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wakeup.wait(self._flush_interval)
+            self._wakeup.clear()
+            self._flush()
+        self._flush()
+
+    def _flush(self) -> None:
+        if not self._queue:
+            return
+
+        lines = []
+        while self._queue:
+            lines.append(format_record(self._queue.popleft()))
+
+        if self._file is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self._path, "a", encoding="utf-8")
+        self._file.write("".join(lines))
+        self._file.flush()
+
+        if self._rotation_bytes and self._file.tell() >= self._rotation_bytes:
+            self._rotate()
+
+    def _rotate(self) -> None:
+        self._file.close()
+        self._file = None
+        stamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S_%f")
+        self._path.rename(self._path.with_name(f"{self._path.stem}.{stamp}{self._path.suffix}"))
+
+        if self._retention_days is not None:
+            deadline = time.time() - self._retention_days * 24 * 3600
+            for old in self._path.parent.glob(f"{self._path.stem}.*{self._path.suffix}"):
+                if old.stat().st_mtime < deadline:
+                    old.unlink(missing_ok=True)
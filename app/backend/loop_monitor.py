@@ -0,0 +1,127 @@
+"""
+Контроль задержки event loop.
+
+Корутина-пульс раз в LOOP_MONITOR_INTERVAL секунд засыпает и измеряет,
+насколько позже срока она проснулась: это время, в течение которого loop
+был занят чужим синхронным кодом. Задержка попадает в метрику
+event_loop_lag_seconds.
+
+Пока loop заблокирован, пульс не выполняется, поэтому блокировки ловит
+отдельный поток-сторож: если пульса нет дольше LOOP_BLOCK_THRESHOLD, он
+снимает стек потока event loop (sys._current_frames) и пишет его в
+warning.log вместе с log_id запроса, задача которого сейчас выполняется.
+
+Чтобы узнать log_id из другого потока, монитор ставит фабрику задач,
+которая запоминает контекст (contextvars.Context) каждой задачи.
+"""
+import asyncio
+import contextvars
+import sys
+import threading
+import time
+import traceback
+import weakref
+
+from loguru import logger
+
+from app.backend.config import LOOP_BLOCK_THRESHOLD, LOOP_MONITOR_INTERVAL
+from app.backend.metrics import EVENT_LOOP_BLOCKED, EVENT_LOOP_LAG
+from app.log import request_log_context
+
+
+STACK_LIMIT = 30  # Кадров стека в отчёте о блокировке
+
+
+class LoopLagMonitor:
+    """Измеряет задержку event loop и сообщает о блокирующих вызовах"""
+
+    def __init__(
+        self,
+        interval: float = LOOP_MONITOR_INTERVAL,
+        threshold: float = LOOP_BLOCK_THRESHOLD,
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._heartbeat: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._last_beat = time.monotonic()
+        self._contexts: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def start(self) -> None:
+        """Запустить пульс и сторожа (вызывается из работающего event loop)"""
+        if self._heartbeat is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        if self._loop.get_task_factory() is None:
+            self._loop.set_task_factory(self._task_factory)
+
+        self._stop.clear()
+        self._last_beat = time.monotonic()
+        self._heartbeat = self._loop.create_task(self._beat())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-lag-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            try:
+                await self._heartbeat
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=self.interval * 2)
+            self._watchdog = None
+        if self._loop is not None and self._loop.get_task_factory() == self._task_factory:
+            self._loop.set_task_factory(None)
+
+    def _task_factory(self, loop, coro, context=None):
+        if context is None:
+            context = contextvars.copy_context()
+        task = asyncio.Task(coro, loop=loop, context=context)
+        self._contexts[task] = context
+        return task
+
+    async def _beat(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            EVENT_LOOP_LAG.observe(max(loop.time() - start - self.interval, 0.0))
+            self._last_beat = time.monotonic()
+
+    def _watch(self) -> None:
+        reported_beat = None
+        while not self._stop.wait(self.interval):
+            beat = self._last_beat
+            blocked = time.monotonic() - beat - self.interval
+            if blocked >= self.threshold and beat != reported_beat:
+                reported_beat = beat
+                self._report(blocked)
+
+    def _current_log_id(self) -> str | None:
+        """log_id запроса, задача которого сейчас выполняется в event loop"""
+        task = asyncio.current_task(self._loop)
+        context = self._contexts.get(task) if task is not None else None
+        request_context = context.get(request_log_context) if context is not None else None
+        return request_context.get("log_id") if request_context else None
+
+    def _report(self, blocked: float) -> None:
+        EVENT_LOOP_BLOCKED.inc()
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame, limit=STACK_LIMIT)) if frame else ""
+        logger.bind(
+            log_id=self._current_log_id(),
+            blocked_ms=round(blocked * 1000, 1),
+            stack=stack,
+        ).warning(f"Event loop blocked for more than {blocked * 1000:.0f} ms")
+
+
+loop_monitor = LoopLagMonitor()
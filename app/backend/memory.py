@@ -0,0 +1,181 @@
+"""
+Диагностика памяти процесса.
+
+tracemalloc включается по требованию (он замедляет выделение памяти):
+при старте делается базовый снимок, с которым затем сравниваются новые,
+с группировкой по файлу или строке. Дополнительно можно запустить фоновую
+задачу, которая раз в interval секунд (не чаще MIN_SNAPSHOT_INTERVAL)
+сравнивает снимок с предыдущим и пишет в лог строки с наибольшим
+приростом. Снимок занимает десятки-сотни миллисекунд, поэтому фоновая
+задача делает его в потоке.
+
+Сводка (memory_stats) не требует tracemalloc: RSS процесса, счётчики
+поколений GC и число живых ORM-объектов по классам.
+"""
+import asyncio
+import gc
+import os
+import tracemalloc
+
+from loguru import logger
+
+from app.backend.config import MEMORY_TOP_LIMIT
+from app.models import Cart, CartItem, Category, Product, Review, User
+
+
+ORM_CLASSES = (Product, Category, Review, User, Cart, CartItem)
+
+# Служебные выделения, которые не интересны при поиске утечек
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+# Минимальный период фоновых снимков, секунды
+MIN_SNAPSHOT_INTERVAL = 1.0
+
+_baseline: tracemalloc.Snapshot | None = None
+_snapshotter: asyncio.Task | None = None
+
+
+def _rss_bytes() -> int | None:
+    """Текущий RSS процесса (Linux), None если недоступен"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _take_snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+
+
+def _format_stat(stat: tracemalloc.StatisticDiff) -> dict:
+    frame = stat.traceback[0]
+    # При группировке по файлу номер строки равен 0
+    location = f"{frame.filename}:{frame.lineno}" if frame.lineno else frame.filename
+    return {
+        "location": location,
+        "size_kb": round(stat.size / 1024, 1),
+        "size_diff_kb": round(stat.size_diff / 1024, 1),
+        "count": stat.count,
+        "count_diff": stat.count_diff,
+    }
+
+
+def orm_object_counts() -> dict[str, int]:
+    """Число живых экземпляров ORM-классов (обходит все объекты GC)"""
+    counts = {cls.__name__: 0 for cls in ORM_CLASSES}
+    for obj in gc.get_objects():
+        if isinstance(obj, ORM_CLASSES):
+            counts[type(obj).__name__] += 1
+    return counts
+
+
+def memory_stats() -> dict:
+    """Сводка по памяти процесса"""
+    stats = {
+        "rss_bytes": _rss_bytes(),
+        "gc_counts": gc.get_count(),
+        "gc_collections": [generation["collections"] for generation in gc.get_stats()],
+        "gc_uncollectable": len(gc.garbage),
+        "orm_objects": orm_object_counts(),
+        "tracing": tracemalloc.is_tracing(),
+        "snapshotter": _snapshotter is not None and not _snapshotter.done(),
+    }
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        stats["traced_bytes"] = current
+        stats["traced_peak_bytes"] = peak
+    return stats
+
+
+def start_tracing(frames: int = 1) -> None:
+    """Включить tracemalloc и сделать базовый снимок"""
+    global _baseline
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    _baseline = _take_snapshot()
+
+
+def stop_tracing() -> None:
+    """Остановить фоновые снимки и tracemalloc, освободив собранные данные"""
+    global _baseline
+    stop_snapshotter()
+    _baseline = None
+    tracemalloc.stop()
+
+
+def diff_from_baseline(
+    group_by: str = "lineno", limit: int = MEMORY_TOP_LIMIT, reset: bool = False
+) -> list[dict]:
+    """
+    Сравнить текущий снимок с базовым.
+
+    Args:
+        group_by: Группировка: "lineno" (файл и строка) или "filename"
+        limit: Количество строк с наибольшим приростом
+        reset: Сделать текущий снимок новым базовым
+
+    Returns:
+        list[dict]: Места выделения памяти по убыванию прироста
+
+    Raises:
+        RuntimeError: Если tracemalloc не запущен
+    """
+    global _baseline
+    if _baseline is None or not tracemalloc.is_tracing():
+        raise RuntimeError("tracemalloc is not started")
+
+    snapshot = _take_snapshot()
+    stats = snapshot.compare_to(_baseline, group_by)
+    if reset:
+        _baseline = snapshot
+    return [_format_stat(stat) for stat in stats[:limit]]
+
+
+def _growers_since(previous: tracemalloc.Snapshot, limit: int):
+    """Новый снимок и места выделения, выросшие с предыдущего"""
+    snapshot = _take_snapshot()
+    growers = [
+        stat for stat in snapshot.compare_to(previous, "lineno")[:limit]
+        if stat.size_diff > 0
+    ]
+    return snapshot, growers
+
+
+async def _snapshot_loop(interval: float, limit: int) -> None:
+    previous = await asyncio.to_thread(_take_snapshot)
+    while True:
+        await asyncio.sleep(interval)
+        previous, growers = await asyncio.to_thread(_growers_since, previous, limit)
+
+        current, peak = tracemalloc.get_traced_memory()
+        logger.bind(
+            rss_bytes=_rss_bytes(),
+            traced_bytes=current,
+            traced_peak_bytes=peak,
+            growers=[_format_stat(stat) for stat in growers],
+        ).info(f"Memory snapshot: {len(growers)} growing allocation sites")
+
+
+def start_snapshotter(interval: float, limit: int = MEMORY_TOP_LIMIT) -> None:
+    """Запустить фоновые снимки раз в interval секунд (включает tracemalloc)"""
+    if interval < MIN_SNAPSHOT_INTERVAL:
+        raise ValueError(f"Snapshot interval must be at least {MIN_SNAPSHOT_INTERVAL} s")
+    stop_snapshotter()
+    if not tracemalloc.is_tracing():
+        start_tracing()
+
+    global _snapshotter
+    _snapshotter = asyncio.create_task(_snapshot_loop(interval, limit))
+
+
+def stop_snapshotter() -> None:
+    global _snapshotter
+    if _snapshotter is not None:
+        _snapshotter.cancel()
+        _snapshotter = None
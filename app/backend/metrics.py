@@ -0,0 +1,213 @@
+"""
+Метрики приложения в формате Prometheus.
+
+При запуске нескольких воркеров uvicorn нужно задать переменную окружения
+PROMETHEUS_MULTIPROC_DIR (пустой каталог, общий для всех воркеров) до
+старта процессов: тогда каждый воркер пишет значения в свои файлы, а
+/metrics собирает их в одну картину через MultiProcessCollector.
+"""
+import time
+
+from fastapi import Request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from starlette.routing import Match
+
+from app.backend.config import METRICS_MULTIPROC_DIR
+from app.backend.db import engine
+
+
+# HTTP
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "Количество HTTP-запросов",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP-запроса",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Запросы, обрабатываемые в данный момент",
+    ["method", "route"],
+    multiprocess_mode="livesum",
+)
+HTTP_COMPRESSED_BYTES = Counter(
+    "http_compressed_response_bytes_total",
+    "Байты сжатых ответов до и после сжатия",
+    ["encoding", "stage"],  # stage: original | compressed
+)
+HTTP_COMPRESSION_CACHE = Counter(
+    "http_compression_cache_total",
+    "Обращения к кэшу сжатых ответов",
+    ["result"],  # hit | miss
+)
+
+# Контроль нагрузки
+
+ADMISSION_LIMIT = Gauge(
+    "admission_concurrency_limit",
+    "Текущий лимит одновременных запросов класса",
+    ["route_class"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total",
+    "Запросы, отклонённые с 503 при перегрузке",
+    ["route_class", "reason"],  # queue_full | queue_timeout
+)
+HTTP_REQUEST_DEADLINE = Counter(
+    "http_request_deadline_total",
+    "Запросы, прерванные по бюджету времени или из-за отключения клиента",
+    ["route", "reason"],  # deadline | client_disconnect
+)
+
+# База данных
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_connections_checked_out",
+    "Соединения, выданные из пула",
+    multiprocess_mode="livesum",
+)
+DB_POOL_OPEN = Gauge(
+    "db_pool_connections_open",
+    "Открытые соединения пула",
+    multiprocess_mode="livesum",
+)
+DB_SESSION_REQUESTS = Counter(
+    "db_session_requests_total",
+    "Запросы с зависимостью get_db по факту обращения к пулу",
+    ["connection"],  # acquired | none
+)
+
+# Redis и Celery
+
+REDIS_COMMAND_DURATION = Histogram(
+    "redis_command_duration_seconds",
+    "Время выполнения команды Redis",
+    ["command"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+CELERY_PUBLISH_DURATION = Histogram(
+    "celery_task_publish_duration_seconds",
+    "Время отправки задачи Celery в брокер",
+    ["task"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+
+# Event loop
+
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "Задержка срабатывания таймеров event loop",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+EVENT_LOOP_BLOCKED = Counter(
+    "event_loop_blocked_total",
+    "Блокировки event loop дольше LOOP_BLOCK_THRESHOLD",
+)
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def _on_connect(dbapi_connection, connection_record):
+    DB_POOL_OPEN.inc()
+
+
+@event.listens_for(engine.sync_engine, "close")
+def _on_close(dbapi_connection, connection_record):
+    DB_POOL_OPEN.dec()
+
+
+@event.listens_for(engine.sync_engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_POOL_CHECKED_OUT.inc()
+
+
+@event.listens_for(engine.sync_engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    DB_POOL_CHECKED_OUT.dec()
+
+
+# Время начала отправки задач по их id
+_publish_started: dict[str, float] = {}
+
+
+def _on_before_task_publish(sender=None, headers=None, **kwargs):
+    if headers and "id" in headers:
+        _publish_started[headers["id"]] = time.perf_counter()
+
+
+def _on_after_task_publish(sender=None, headers=None, **kwargs):
+    started = _publish_started.pop((headers or {}).get("id"), None)
+    if started is not None:
+        CELERY_PUBLISH_DURATION.labels(sender).observe(time.perf_counter() - started)
+
+
+def connect_celery_metrics() -> None:
+    """Подключить метрики отправки задач (вызывается при создании приложения Celery)"""
+    from celery.signals import after_task_publish, before_task_publish
+
+    before_task_publish.connect(_on_before_task_publish)
+    after_task_publish.connect(_on_after_task_publish)
+
+
+def route_template(request: Request) -> str:
+    """
+    Шаблон маршрута запроса ("/products/detail/{product_slug}").
+
+    Метки по шаблону, а не по сырому пути, не дают числу временных рядов
+    расти с каждым новым slug; несуществующие пути попадают в "unmatched".
+    Результат сохраняется в scope, чтобы другие middleware не искали его заново.
+    """
+    template = request.scope.get("route_template")
+    if template is None:
+        template = "unmatched"
+        for route in request.app.router.routes:
+            match, _ = route.matches(request.scope)
+            if match == Match.FULL:
+                template = route.path
+                break
+        request.scope["route_template"] = template
+    return template
+
+
+async def metrics_middleware(request: Request, call_next):
+    """Считает запросы, их длительность и количество одновременно обрабатываемых"""
+    method = request.method
+    route = route_template(request)
+    in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method, route)
+
+    in_progress.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_REQUEST_DURATION.labels(method, route).observe(time.perf_counter() - start)
+        HTTP_REQUESTS.labels(method, route, str(status)).inc()
+        in_progress.dec()
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Текущие метрики в текстовом формате Prometheus и их content-type"""
+    if METRICS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
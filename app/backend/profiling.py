@@ -0,0 +1,136 @@
+"""
+Профилирование отдельных запросов сэмплирующим профайлером (pyinstrument).
+
+Два режима:
+    - по требованию: администратор добавляет к запросу заголовок
+      X-Profile (или параметр ?profile=), значение - формат отчёта
+      (html или speedscope, по умолчанию PROFILE_FORMAT);
+    - фоновый: доля PROFILE_SAMPLE_RATE случайных запросов профилируется
+      без участия клиента, для постоянного наблюдения в production.
+
+Отчёт отрисовывается и сохраняется в LOG_DIR/profiles в потоке, не
+блокируя event loop; его id возвращается в заголовке X-Profile-ID и
+пишется в лог. Скачать отчёт можно через
+GET /diagnostics/profiles/{profile_id}. Одновременно профилируется не
+больше одного запроса на процесс: остальные выполняются как обычно.
+
+pyinstrument - необязательная зависимость: без него профилирование
+отключено, а запросы обрабатываются без изменений.
+"""
+import asyncio
+import importlib.util
+import random
+import re
+from datetime import datetime
+from pathlib import Path
+from uuid import uuid4
+
+from fastapi import HTTPException, Request
+from loguru import logger
+
+from app.backend.config import (
+    LOG_DIR,
+    PROFILE_FORMAT,
+    PROFILE_INTERVAL,
+    PROFILE_MAX_FILES,
+    PROFILE_SAMPLE_RATE,
+)
+from app.routers.auth import get_current_user
+
+# Сам pyinstrument импортируется при первом профилировании, а не при старте
+PROFILER_AVAILABLE = importlib.util.find_spec("pyinstrument") is not None
+
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-ID"
+PROFILES_DIR = LOG_DIR / "profiles"
+PROFILE_ID_PATTERN = re.compile(r"[0-9A-Za-z_-]{1,64}")
+
+# Расширение файла отчёта по формату
+PROFILE_FORMATS = {"html": ".html", "speedscope": ".speedscope.json"}
+
+_profile_in_progress = False
+
+
+async def _is_admin(request: Request) -> bool:
+    """Проверка администратора по Bearer-токену через get_current_user"""
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        user = await get_current_user(token)
+    except HTTPException:
+        return False
+    return bool(user.get("is_admin"))
+
+
+def _requested_format(request: Request) -> str | None:
+    """Формат отчёта, если клиент запросил профилирование, иначе None"""
+    value = request.headers.get(PROFILE_HEADER) or request.query_params.get("profile")
+    if not value or value.lower() in ("0", "false"):
+        return None
+    value = value.lower()
+    return value if value in PROFILE_FORMATS else PROFILE_FORMAT
+
+
+def profile_path(profile_id: str) -> Path | None:
+    """Путь к сохранённому отчёту или None, если его нет"""
+    if not PROFILE_ID_PATTERN.fullmatch(profile_id):
+        return None
+    for extension in PROFILE_FORMATS.values():
+        path = PROFILES_DIR / f"{profile_id}{extension}"
+        if path.is_file():
+            return path
+    return None
+
+
+def _save_profile(profiler, profile_format: str) -> str:
+    """Сохранить отчёт и удалить самые старые, если их больше PROFILE_MAX_FILES"""
+    from pyinstrument.renderers import HTMLRenderer, SpeedscopeRenderer
+
+    PROFILES_DIR.mkdir(parents=True, exist_ok=True)
+    profile_id = f"{datetime.now():%Y%m%d%H%M%S}_{uuid4().hex[:12]}"
+    renderer = SpeedscopeRenderer() if profile_format == "speedscope" else HTMLRenderer()
+    path = PROFILES_DIR / f"{profile_id}{PROFILE_FORMATS[profile_format]}"
+    path.write_text(profiler.output(renderer), encoding="utf-8")
+
+    reports = sorted(PROFILES_DIR.iterdir(), key=lambda item: item.stat().st_mtime)
+    for old in reports[:-PROFILE_MAX_FILES]:
+        old.unlink(missing_ok=True)
+    return profile_id
+
+
+async def profiling_middleware(request: Request, call_next):
+    """Выполняет запрос под профайлером по запросу администратора или по выборке"""
+    global _profile_in_progress
+
+    if not PROFILER_AVAILABLE or _profile_in_progress:
+        return await call_next(request)
+
+    profile_format = _requested_format(request)
+    if profile_format is not None:
+        if not await _is_admin(request):
+            return await call_next(request)
+    elif PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+        profile_format = PROFILE_FORMAT
+    else:
+        return await call_next(request)
+
+    from pyinstrument import Profiler
+
+    _profile_in_progress = True
+    profiler = Profiler(interval=PROFILE_INTERVAL, async_mode="enabled")
+    try:
+        profiler.start()
+        try:
+            response = await call_next(request)
+        finally:
+            profiler.stop()
+        # Отрисовка отчёта занимает до сотен миллисекунд: не в event loop
+        profile_id = await asyncio.to_thread(_save_profile, profiler, profile_format)
+    finally:
+        _profile_in_progress = False
+
+    logger.info(f"Profiled {request.method} {request.url.path}: {profile_id}")
+    response.headers[PROFILE_ID_HEADER] = profile_id
+    return response
@@ -0,0 +1,71 @@
+"""
+Классы ответов.
+
+Ответы маршрутов проверяются и приводятся к JSON-совместимым данным в
+pydantic-core по response_model (схемы в app/schemas.py), а в байты их
+переводит orjson. orjson - необязательная зависимость: без него
+используется стандартный json.
+
+Большие списки отдаются через ModelJSONResponse: проверка по схеме и
+запись JSON выполняются одним проходом в pydantic-core, без
+промежуточных словарей Python. response_model у таких маршрутов остаётся
+для документации OpenAPI.
+"""
+from functools import cache
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import TypeAdapter
+
+from app.backend.timing import timed
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - зависит от окружения
+    orjson = None
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSON-ответ (orjson), время сериализации которого попадает в Server-Timing"""
+
+    def render(self, content) -> bytes:
+        with timed("serialize"):
+            if orjson is None:
+                return super().render(content)
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+@cache
+def type_adapter(schema) -> TypeAdapter:
+    """Скомпилированные валидатор и сериализатор схемы (один на схему)"""
+    return TypeAdapter(schema)
+
+
+def row_dicts(result) -> list[dict]:
+    """
+    Строки Core-запроса как словари.
+
+    Из словарей pydantic-core читает поля быстрее, чем из атрибутов Row,
+    а отсутствующие в строке необязательные поля схемы просто не
+    заполняются.
+    """
+    keys = tuple(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
+class ModelJSONResponse(Response):
+    """
+    Ответ, проверенный по схеме и сериализованный в pydantic-core.
+
+        return ModelJSONResponse(content, Envelope[list[ProductOut]])
+
+    Не заданные явно поля (exclude_unset) в ответ не попадают, как у
+    маршрутов с response_model_exclude_unset.
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, content, schema, status_code: int = 200, **kwargs):
+        adapter = type_adapter(schema)
+        with timed("serialize"):
+            body = adapter.dump_json(adapter.validate_python(content), exclude_unset=True)
+        super().__init__(body, status_code=status_code, **kwargs)
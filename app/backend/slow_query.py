@@ -0,0 +1,151 @@
+"""
+Журнал медленных SQL-запросов.
+
+Запросы к engine дольше SLOW_QUERY_MS пишутся в отдельный файл
+LOG_DIR/slow_queries.log: форма запроса (fingerprint), параметры со
+скрытыми строковыми значениями, длительность, маршрут и log_id HTTP-запроса.
+
+Для SELECT дольше SLOW_QUERY_EXPLAIN_MS с вероятностью
+SLOW_QUERY_EXPLAIN_RATE в фоне снимается план EXPLAIN (ANALYZE, BUFFERS)
+(только PostgreSQL). План выполняется на отдельном соединении и в пустом
+контексте, поэтому не попадает ни в ответ, ни в статистику запроса.
+
+Сводка по журналу: python -m app.backend.slow_query_report
+"""
+import asyncio
+import contextvars
+import random
+import time
+
+from loguru import logger
+from sqlalchemy import event
+
+from app.backend.config import (
+    LOG_CONF,
+    LOG_DIR,
+    SLOW_QUERY_EXPLAIN_MS,
+    SLOW_QUERY_EXPLAIN_RATE,
+    SLOW_QUERY_MS,
+)
+from app.backend.db import engine
+from app.backend.log_sink import BatchedFileSink
+from app.backend.sql_monitor import fingerprint
+from app.log import request_log_context
+
+
+SINK_NAME = "slow_queries"
+MAX_EXPLAINS_IN_FLIGHT = 2
+
+slow_query_logger = logger.bind(sink=SINK_NAME)
+
+_sink_id: int | None = None
+
+
+def setup_slow_query_log() -> None:
+    """Подключить файл журнала (один раз; вызывается в lifespan приложения)"""
+    global _sink_id
+    if _sink_id is None:
+        _sink_id = logger.add(
+            BatchedFileSink(LOG_DIR / f"{SINK_NAME}.log", **LOG_CONF),
+            level="INFO",
+            filter=lambda record: record["extra"].get("sink") == SINK_NAME,
+        )
+
+# Формы запросов, для которых план снимается прямо сейчас
+_explains_in_flight: dict[str, asyncio.Task] = {}
+
+
+def redact(value):
+    """Параметры запроса без значений строк и байтов (там бывают email и хеши паролей)"""
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    if isinstance(value, (str, bytes)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    return f"<{type(value).__name__}>"
+
+
+# Время начала хранится в контексте выполнения, а не в conn.info: при ошибке
+# after_cursor_execute не вызывается, и запись в соединении пула осталась бы
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.slow_query_start = time.perf_counter()
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "slow_query_start", None)
+    if start is None:
+        return
+    duration_ms = (time.perf_counter() - start) * 1000
+    if duration_ms < SLOW_QUERY_MS:
+        return
+    if context is not None and not context.execution_options.get("slow_query_log", True):
+        return
+
+    request_context = request_log_context.get() or {}
+    statement_fingerprint = fingerprint(statement)
+    slow_query_logger.bind(
+        log_id=request_context.get("log_id"),
+        route=request_context.get("route"),
+        fingerprint=statement_fingerprint,
+        parameters=redact(parameters),
+        executemany=executemany,
+        duration_ms=round(duration_ms, 2),
+    ).warning(f"Slow query ({duration_ms:.0f} ms): {statement_fingerprint[:200]}")
+
+    if (
+        duration_ms >= SLOW_QUERY_EXPLAIN_MS
+        and not executemany
+        and conn.dialect.name == "postgresql"
+        and statement.lstrip()[:6].upper() == "SELECT"
+        and random.random() < SLOW_QUERY_EXPLAIN_RATE
+    ):
+        _schedule_explain(statement_fingerprint, statement, parameters, request_context)
+
+
+def _schedule_explain(
+    statement_fingerprint: str, statement: str, parameters, request_context: dict
+) -> None:
+    """Запустить снятие плана в фоне, если для этой формы запроса оно ещё не идёт"""
+    if (
+        statement_fingerprint in _explains_in_flight
+        or len(_explains_in_flight) >= MAX_EXPLAINS_IN_FLIGHT
+    ):
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+
+    task = loop.create_task(
+        _explain(statement_fingerprint, statement, parameters, request_context.get("log_id")),
+        context=contextvars.Context(),
+    )
+    _explains_in_flight[statement_fingerprint] = task
+    task.add_done_callback(lambda _: _explains_in_flight.pop(statement_fingerprint, None))
+
+
+async def _explain(statement_fingerprint: str, statement: str, parameters, log_id) -> None:
+    try:
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(slow_query_log=False)
+            result = await conn.exec_driver_sql(
+                f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters
+            )
+            plan = "\n".join(row[0] for row in result)
+            await conn.rollback()
+    except Exception as ex:
+        slow_query_logger.bind(
+            log_id=log_id, fingerprint=statement_fingerprint
+        ).error(f"EXPLAIN failed: {ex}")
+        return
+
+    slow_query_logger.bind(
+        log_id=log_id, fingerprint=statement_fingerprint, plan=plan
+    ).info(f"EXPLAIN (ANALYZE, BUFFERS): {statement_fingerprint[:200]}")
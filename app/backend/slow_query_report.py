@@ -0,0 +1,95 @@
+"""
+Сводка по журналу медленных запросов (LOG_DIR/slow_queries*.log).
+
+Запросы группируются по форме (fingerprint) и ранжируются по суммарному
+времени: так видно, что нагружает БД сильнее всего, даже если каждый
+отдельный запрос не самый долгий.
+
+Запуск:
+    python -m app.backend.slow_query_report --top 20 --sort total
+"""
+import argparse
+import json
+from collections import defaultdict
+from pathlib import Path
+
+from app.backend.config import LOG_DIR
+
+
+SORT_KEYS = ("total", "count", "mean", "max")
+
+
+def read_records(paths: list[Path]):
+    for path in paths:
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+
+def summarize(records) -> list[dict]:
+    """Статистика по каждой форме запроса; планы EXPLAIN прикладываются к своей форме"""
+    groups: dict[str, dict] = defaultdict(
+        lambda: {"count": 0, "total": 0.0, "max": 0.0, "routes": set(), "plan": None}
+    )
+    for record in records:
+        statement = record.get("fingerprint")
+        if not statement:
+            continue
+        group = groups[statement]
+        if "plan" in record:
+            group["plan"] = record["plan"]
+            continue
+        if "duration_ms" not in record:
+            continue
+        duration = record["duration_ms"]
+        group["count"] += 1
+        group["total"] += duration
+        group["max"] = max(group["max"], duration)
+        if record.get("route"):
+            group["routes"].add(record["route"])
+
+    summary = []
+    for statement, group in groups.items():
+        if not group["count"]:
+            continue
+        summary.append({
+            "fingerprint": statement,
+            "count": group["count"],
+            "total": group["total"],
+            "mean": group["total"] / group["count"],
+            "max": group["max"],
+            "routes": sorted(group["routes"]),
+            "plan": group["plan"],
+        })
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("paths", nargs="*", type=Path, help="Файлы журнала")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--sort", choices=SORT_KEYS, default="total")
+    parser.add_argument("--plans", action="store_true", help="Показать планы EXPLAIN")
+    args = parser.parse_args()
+
+    paths = args.paths or sorted(LOG_DIR.glob("slow_queries*.log"))
+    summary = sorted(summarize(read_records(paths)), key=lambda item: item[args.sort], reverse=True)
+
+    print(f"{'total, ms':>12}{'count':>8}{'mean, ms':>10}{'max, ms':>10}  query")
+    for item in summary[:args.top]:
+        print(
+            f"{item['total']:>12,.0f}{item['count']:>8}{item['mean']:>10,.1f}"
+            f"{item['max']:>10,.1f}  {item['fingerprint'][:120]}"
+        )
+        if item["routes"]:
+            print(f"{'':>42}routes: {', '.join(item['routes'])}")
+        if args.plans and item["plan"]:
+            for line in item["plan"].splitlines():
+                print(f"{'':>42}{line}")
+
+
+if __name__ == "__main__":
+    main()
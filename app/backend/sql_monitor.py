@@ -0,0 +1,113 @@
+"""
+Счётчик SQL-запросов в рамках HTTP-запроса и детектор N+1.
+
+log_middleware открывает статистику на каждый запрос, события движка
+SQLAlchemy считают выполненные запросы, суммарное время в БД и
+повторения одинаковых по форме запросов (fingerprint). После ответа
+проверяются пороги SQL_MAX_QUERIES и SQL_MAX_REPEATS: превышение пишется
+в лог предупреждением, а в строгом режиме (SQL_MONITOR_STRICT, для тестов)
+запрос завершается ошибкой.
+"""
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from app.backend.config import SQL_MAX_QUERIES, SQL_MAX_REPEATS, SQL_MONITOR_STRICT
+from app.backend.db import engine
+
+
+# Списки параметров в IN (...) любой длины сводятся к одной форме
+_PARAM = r"(?:\?|\$\d+|%\(\w+\)s|:\w+)"
+_PARAM_LIST = re.compile(rf"\(\s*{_PARAM}(?:\s*,\s*{_PARAM})*\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(Exception):
+    """Запрос превысил допустимое число SQL-запросов или повторов (строгий режим)"""
+
+
+class QueryStats:
+    """Статистика SQL-запросов одного HTTP-запроса"""
+
+    __slots__ = ("count", "duration", "fingerprints")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints: Counter = Counter()
+
+    def most_repeated(self) -> tuple[str, int]:
+        """Самый часто повторяющийся запрос и число его повторов"""
+        if not self.fingerprints:
+            return "", 0
+        return self.fingerprints.most_common(1)[0]
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar("sql_query_stats", default=None)
+
+
+def fingerprint(statement: str) -> str:
+    """Форма запроса без конкретного числа параметров в списках и лишних пробелов"""
+    return _SPACES.sub(" ", _PARAM_LIST.sub("(?)", statement)).strip()
+
+
+# Время начала - в контексте выполнения: при ошибке запроса after_cursor_execute
+# не вызывается, и запись в conn.info (живёт вместе с соединением пула) осталась бы
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current_stats.get() is not None:
+        context.sql_monitor_start = time.perf_counter()
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    start = getattr(context, "sql_monitor_start", None)
+    if stats is None or start is None:
+        return
+    stats.count += 1
+    stats.duration += time.perf_counter() - start
+    stats.fingerprints[fingerprint(statement)] += 1
+
+
+def start_request_stats() -> QueryStats:
+    """Начать сбор статистики для текущего запроса"""
+    stats = QueryStats()
+    _current_stats.set(stats)
+    return stats
+
+
+def get_request_stats() -> QueryStats | None:
+    """Статистика текущего запроса, если сбор включён"""
+    return _current_stats.get()
+
+
+def check_query_budget(stats: QueryStats, path: str, logger) -> None:
+    """
+    Проверить пороги по числу запросов и повторов.
+
+    Raises:
+        QueryBudgetExceeded: В строгом режиме, если порог превышен
+    """
+    problems = []
+    if stats.count > SQL_MAX_QUERIES:
+        problems.append(f"{stats.count} SQL queries (limit {SQL_MAX_QUERIES})")
+
+    statement, repeats = stats.most_repeated()
+    if repeats > SQL_MAX_REPEATS:
+        problems.append(
+            f"possible N+1: statement repeated {repeats} times "
+            f"(limit {SQL_MAX_REPEATS}): {statement[:200]}"
+        )
+
+    if not problems:
+        return
+
+    message = f"Request to {path} exceeded query budget: " + "; ".join(problems)
+    if SQL_MONITOR_STRICT:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
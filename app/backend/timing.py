@@ -0,0 +1,56 @@
+"""
+Разбивка времени обработки запроса по фазам для заголовка Server-Timing.
+
+log_middleware открывает набор таймингов на каждый запрос, а код
+приложения добавляет в него время своих фаз:
+
+    with timed("auth"):
+        payload = jwt.decode(...)
+
+Время в БД и число запросов берутся из статистики sql_monitor.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+_current_timings: ContextVar[dict | None] = ContextVar("request_timings", default=None)
+
+
+def start_request_timings() -> dict:
+    """Начать сбор таймингов для текущего запроса"""
+    timings: dict[str, float] = {}
+    _current_timings.set(timings)
+    return timings
+
+
+def add_timing(phase: str, seconds: float) -> None:
+    """Добавить время к фазе текущего запроса (вне запроса ничего не делает)"""
+    timings = _current_timings.get()
+    if timings is not None:
+        timings[phase] = timings.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def timed(phase: str):
+    """Засечь время блока и добавить его к фазе текущего запроса"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_timing(phase, time.perf_counter() - start)
+
+
+def server_timing_header(timings: dict, query_stats, total: float) -> str:
+    """
+    Значение заголовка Server-Timing.
+
+    Пример: auth;dur=0.4, db;dur=1.2;desc="queries=3", total;dur=5.6
+    """
+    parts = [f"{phase};dur={seconds * 1000:.2f}" for phase, seconds in timings.items()]
+    if query_stats is not None and query_stats.count:
+        parts.append(
+            f'db;dur={query_stats.duration * 1000:.2f};desc="queries={query_stats.count}"'
+        )
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
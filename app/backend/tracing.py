@@ -0,0 +1,332 @@
+"""
+Лёгкая трассировка запросов без внешнего коллектора.
+
+log_middleware открывает корневой span запроса (с учётом входящего
+заголовка traceparent), вложенные span'ы создаются автоматически для
+запросов к БД, команд Redis, отправки задач Celery и операций bcrypt.
+Текущий span передаётся через ContextVar, поэтому вложенность работает и
+внутри greenlet'ов AsyncSession.
+
+Завершённые span'ы складываются в кольцевой буфер ограниченного размера и
+выгружаются в файл формата OTLP/JSON (export_spans), который понимают
+Jaeger, Tempo и OpenTelemetry Collector.
+
+Если запрос не попал в выборку (TRACE_SAMPLE_RATE), span'ы не создаются
+вовсе: каждая точка инструментирования сводится к чтению ContextVar.
+"""
+import json
+import os
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+
+from sqlalchemy import event
+
+from app.backend.config import LOG_DIR, TRACE_BUFFER_SIZE, TRACE_SAMPLE_RATE
+from app.backend.db import engine
+
+
+SERVICE_NAME = "ernesto-khachatyryan-api"
+TRACES_DIR = LOG_DIR / "traces"
+
+# Виды span'ов OTLP
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+class Span:
+    """Завершённая или выполняющаяся операция внутри трассы"""
+
+    __slots__ = (
+        "trace_id", "span_id", "parent_id", "name", "kind",
+        "start_ns", "end_ns", "attributes", "status",
+    )
+
+    def __init__(
+        self, trace_id: str, parent_id: str | None, name: str, kind: int, attributes: dict
+    ):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+        self.status = STATUS_OK
+
+    def finish(self) -> None:
+        self.end_ns = time.time_ns()
+        finished_spans.append(self)
+
+    def to_otlp(self) -> dict:
+        """Span в формате OTLP/JSON"""
+        data = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [
+                _otlp_attribute(key, value) for key, value in self.attributes.items()
+            ],
+            "status": {"code": self.status},
+        }
+        if self.parent_id:
+            data["parentSpanId"] = self.parent_id
+        return data
+
+
+# Кольцевой буфер завершённых span'ов: старые вытесняются новыми
+finished_spans: deque = deque(maxlen=TRACE_BUFFER_SIZE)
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def _otlp_attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+def _parse_traceparent(header: str | None) -> tuple[str, str, bool] | None:
+    """Разбор W3C traceparent: (trace_id, parent_span_id, sampled)"""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+
+def current_span() -> Span | None:
+    """Текущий span, если запрос трассируется"""
+    return _current_span.get()
+
+
+def begin_span(name: str, kind: int = KIND_INTERNAL, **attributes) -> Span | None:
+    """
+    Открыть дочерний span текущего (для событий с раздельными началом и концом).
+
+    Возвращает None, если запрос не трассируется. Закрывается через end_span.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return None
+    return Span(parent.trace_id, parent.span_id, name, kind, attributes)
+
+
+def end_span(span: Span | None, error: bool = False) -> None:
+    """Закрыть span, открытый через begin_span"""
+    if span is not None:
+        if error:
+            span.status = STATUS_ERROR
+        span.finish()
+
+
+@contextmanager
+def start_span(name: str, kind: int = KIND_INTERNAL, **attributes):
+    """Дочерний span текущего на время блока; вне трассируемого запроса ничего не делает"""
+    span = begin_span(name, kind, **attributes)
+    if span is None:
+        yield None
+        return
+
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException:
+        span.status = STATUS_ERROR
+        raise
+    finally:
+        _current_span.reset(token)
+        span.finish()
+
+
+@contextmanager
+def trace_request(method: str, path: str, traceparent: str | None = None):
+    """
+    Корневой span HTTP-запроса.
+
+    Решение о выборке берётся из входящего traceparent, а при его
+    отсутствии - по TRACE_SAMPLE_RATE.
+    """
+    incoming = _parse_traceparent(traceparent)
+    if incoming is not None:
+        trace_id, parent_id, sampled = incoming
+    else:
+        trace_id, parent_id = os.urandom(16).hex(), None
+        sampled = random.random() < TRACE_SAMPLE_RATE
+
+    if not sampled:
+        token = _current_span.set(None)
+        try:
+            yield None
+        finally:
+            _current_span.reset(token)
+        return
+
+    span = Span(
+        trace_id, parent_id, f"{method} {path}", KIND_SERVER,
+        {"http.method": method, "http.target": path},
+    )
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException:
+        span.status = STATUS_ERROR
+        raise
+    finally:
+        _current_span.reset(token)
+        span.finish()
+
+
+def traced(name: str, kind: int = KIND_INTERNAL):
+    """Декоратор: вызов функции оборачивается в span"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with start_span(name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument_crypt_context(context) -> None:
+    """Оборачивает hash/verify объекта CryptContext в span'ы"""
+    context.hash = traced("bcrypt.hash")(context.hash)
+    context.verify = traced("bcrypt.verify")(context.verify)
+
+
+def take_spans(clear: bool = True) -> list[Span]:
+    """Span'ы из буфера (вызывать в event loop, где буфер пополняется)"""
+    spans = list(finished_spans)
+    if clear:
+        for _ in range(len(spans)):
+            finished_spans.popleft()
+    return spans
+
+
+def export_spans(path: Path | None = None, clear: bool = True) -> Path:
+    """
+    Выгрузить span'ы из буфера в файл OTLP/JSON.
+
+    Args:
+        path: Файл для выгрузки; по умолчанию новый файл в LOG_DIR/traces
+        clear: Очистить буфер после выгрузки
+
+    Returns:
+        Path: Путь к записанному файлу
+    """
+    return write_spans(take_spans(clear), path)
+
+
+def write_spans(spans: list[Span], path: Path | None = None) -> Path:
+    """Записать span'ы в файл OTLP/JSON (можно вызывать в потоке)"""
+    if path is None:
+        TRACES_DIR.mkdir(parents=True, exist_ok=True)
+        path = TRACES_DIR / f"spans_{datetime.now():%Y-%m-%d_%H-%M-%S_%f}.json"
+
+    payload = {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        _otlp_attribute("service.name", SERVICE_NAME),
+                        _otlp_attribute("process.pid", os.getpid()),
+                    ]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": __name__},
+                        "spans": [span.to_otlp() for span in spans],
+                    }
+                ],
+            }
+        ]
+    }
+    path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+# Автоматическая инструментация: запросы к БД
+
+# Span хранится в контексте выполнения, а не в conn.info (как время начала в
+# slow_query и sql_monitor): при ошибке after_cursor_execute не вызывается, и
+# span остался бы в соединении пула
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is None:
+        return
+    context.tracing_span = begin_span(
+        "db.query", KIND_CLIENT,
+        **{"db.system": conn.dialect.name, "db.statement": statement[:500]},
+    )
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    span = getattr(context, "tracing_span", None)
+    if span is not None:
+        context.tracing_span = None
+        end_span(span)
+
+
+def _handle_error(exception_context):
+    context = exception_context.execution_context
+    span = getattr(context, "tracing_span", None)
+    if span is not None:
+        context.tracing_span = None
+        end_span(span, error=True)
+
+
+def instrument_engine(sync_engine) -> None:
+    """Span'ы запросов к БД для движка (движок приложения инструментирован при импорте)"""
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+instrument_engine(engine.sync_engine)
+
+
+# Автоматическая инструментация: отправка задач Celery
+
+_publish_spans: dict[str, Span] = {}
+
+
+def _on_before_task_publish(sender=None, headers=None, **kwargs):
+    span = begin_span("celery.publish", KIND_CLIENT, **{"celery.task": str(sender)})
+    if span is not None and headers and "id" in headers:
+        _publish_spans[headers["id"]] = span
+
+
+def _on_after_task_publish(sender=None, headers=None, **kwargs):
+    end_span(_publish_spans.pop((headers or {}).get("id"), None))
+
+
+def connect_celery_tracing() -> None:
+    """Подключить span'ы отправки задач (вызывается при создании приложения Celery)"""
+    from celery.signals import after_task_publish, before_task_publish
+
+    before_task_publish.connect(_on_before_task_publish)
+    after_task_publish.connect(_on_after_task_publish)
@@ -1,43 +1,161 @@
+import atexit
+import random
+import re
+import time
+from contextvars import ContextVar
 from uuid import uuid4
 from fastapi import Request
 from fastapi.responses import JSONResponse
 from loguru import logger
-from app.backend.config import LOG_CONF, LOG_DIR
+from app.backend.config import (
+    LOG_CONF,
+    LOG_DIR,
+    LOG_SLOW_REQUEST_MS,
+    LOG_SUCCESS_SAMPLE_RATE,
+)
+from app.backend.log_sink import BatchedFileSink
+from app.backend.metrics import route_template
+from app.backend.sql_monitor import start_request_stats, check_query_budget
+from app.backend.timing import server_timing_header, start_request_timings
+from app.backend.tracing import trace_request
+
+
+WARNING_LEVEL = logger.level("WARNING").no
+ERROR_LEVEL = logger.level("ERROR").no
+
+_logging_configured = False
+
+
+def setup_logging() -> None:
+    """
+    Подключить файловые sink'и логов (один раз за процесс).
 
+    Вызывается в lifespan приложения, а не при импорте: так импорт для
+    CLI и бенчмарков не создаёт файлов и потоков-писателей, а при preload
+    в app/server.py sink'и создаются уже в воркере, после fork.
+    """
+    global _logging_configured
+    if _logging_configured:
+        return
+    _logging_configured = True
 
-logger.add(
-        LOG_DIR / "info.log",
+    # Каждый уровень пишется ровно в один файл. Записи с extra["sink"]
+    # (например, журнал медленных запросов) идут только в свой отдельный файл
+    logger.add(
+        BatchedFileSink(LOG_DIR / "info.log", **LOG_CONF),
         level="INFO",
-        **LOG_CONF,
+        filter=lambda record: record["level"].no < WARNING_LEVEL and "sink" not in record["extra"],
     )
 
-logger.add(
-        LOG_DIR / "warning.log",
+    logger.add(
+        BatchedFileSink(LOG_DIR / "warning.log", **LOG_CONF),
         level="WARNING",
-        **LOG_CONF,
+        filter=lambda record: record["level"].no < ERROR_LEVEL and "sink" not in record["extra"],
     )
 
-logger.add(
-    LOG_DIR / "error.log",
-    level="ERROR",
-    **LOG_CONF,
-)
+    logger.add(
+        BatchedFileSink(LOG_DIR / "error.log", **LOG_CONF),
+        level="ERROR",
+        filter=lambda record: "sink" not in record["extra"],
+    )
+
+    # При выходе дописываем очереди всех sink'ов (их потоки-писатели - daemon)
+    atexit.register(logger.remove)
+
+
+REQUEST_ID_HEADER = "X-Request-ID"
+# Принимаем от клиента только короткие безопасные идентификаторы
+REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._-]{1,128}")
+
+# Поля текущего запроса, которые заполняются по ходу обработки (например, user_id)
+request_log_context: ContextVar[dict | None] = ContextVar("request_log_context", default=None)
+
+
+def bind_request_user(user_id: int) -> None:
+    """Запомнить пользователя текущего запроса для записи в лог"""
+    context = request_log_context.get()
+    if context is not None:
+        context["user_id"] = user_id
+
+
+def request_id_from(request: Request) -> str:
+    """ID запроса из заголовка X-Request-ID клиента или новый, если заголовка нет"""
+    request_id = request.headers.get(REQUEST_ID_HEADER)
+    if request_id and REQUEST_ID_PATTERN.fullmatch(request_id):
+        return request_id
+    return str(uuid4())
 
 
 async def log_middleware(request: Request, call_next):
-    log_id = str(uuid4())
+    log_id = request_id_from(request)
     with logger.contextualize(log_id=log_id):
+        context = {"user_id": None, "log_id": log_id, "route": route_template(request)}
+        request_log_context.set(context)
+        start = time.perf_counter()
+        status = 500
+
+        query_stats = start_request_stats()
+        timings = start_request_timings()
         try:
-            response = await call_next(request)
-
-            if response.status_code in [401, 402, 403, 404]:
-                logger.warning(f"Request to {request.url.path} failed")
-                
-            else:
-                logger.info("Successfully accessed " + request.url.path)
-        
+            with trace_request(
+                request.method, request.url.path, request.headers.get("traceparent")
+            ) as span:
+                response = await call_next(request)
+                status = response.status_code
+                if span is not None:
+                    span.name = f"{request.method} {route_template(request)}"
+                    span.attributes["http.route"] = route_template(request)
+                    span.attributes["http.status_code"] = status
+                    span.attributes["log_id"] = log_id
+            check_query_budget(query_stats, request.url.path, logger)
+
         except Exception as ex:
-            logger.error(f"Request to {request.url.path} failed: {ex}")
+            request_logger(request, status, start, context, query_stats).error(
+                f"Request to {request.url.path} failed: {ex}"
+            )
             response = JSONResponse(content={"success": False}, status_code=500)
 
-        return response
\ No newline at end of file
+        else:
+            duration_ms = (time.perf_counter() - start) * 1000
+            # Ошибки пишутся всегда, выборка - только для успешных ответов (2xx/3xx)
+            if status >= 500:
+                request_logger(request, status, start, context, query_stats).error(
+                    f"Request to {request.url.path} failed"
+                )
+
+            elif status >= 400:
+                request_logger(request, status, start, context, query_stats).warning(
+                    f"Request to {request.url.path} failed"
+                )
+
+            elif (
+                duration_ms >= LOG_SLOW_REQUEST_MS
+                or random.random() < LOG_SUCCESS_SAMPLE_RATE
+            ):
+                request_logger(request, status, start, context, query_stats).info(
+                    "Successfully accessed " + request.url.path
+                )
+
+        response.headers[REQUEST_ID_HEADER] = log_id
+        response.headers["Server-Timing"] = server_timing_header(
+            timings, query_stats, time.perf_counter() - start
+        )
+        return response
+
+
+def request_logger(
+    request: Request, status: int, start: float, context: dict, query_stats=None
+):
+    """Логгер со структурными полями запроса"""
+    fields = {
+        "method": request.method,
+        "route": route_template(request),
+        "path": request.url.path,
+        "status": status,
+        "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+        "user_id": context["user_id"],
+    }
+    if query_stats is not None:
+        fields["queries"] = query_stats.count
+        fields["db_ms"] = round(query_stats.duration * 1000, 2)
+    return logger.bind(**fields)
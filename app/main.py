@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
@@ -6,13 +7,48 @@ from app.routers import category
 from app.routers import products
 from app.routers import auth
 from app.routers import reviews
-from tests import test_endpoints
-from .log import log_middleware
+from app.routers import metrics
+from app.routers import diagnostics
+from app.routers import health
+from .log import log_middleware, setup_logging
+from app.backend.metrics import metrics_middleware
+from app.backend.profiling import profiling_middleware
+from app.backend.responses import TimedJSONResponse
+from app.backend.admission import admission_middleware
+from app.backend.compression import CompressionMiddleware
+from app.backend.deadline import DeadlineMiddleware
+from app.backend.config import (
+    ADMISSION_ENABLED,
+    COMPRESSION_ENABLED,
+    ENABLE_DEMO_ROUTES,
+    LOOP_MONITOR_ENABLED,
+    REQUEST_DEADLINES_ENABLED,
+)
+from app.backend.loop_monitor import loop_monitor
+from app.backend.lifecycle import InFlightMiddleware, startup, shutdown
+from app.backend.slow_query import setup_slow_query_log
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Sink'и логов подключаются при старте воркера (после fork при preload),
+    # а не при импорте: импорт приложения не создаёт файлов и потоков
+    setup_logging()
+    setup_slow_query_log()
+    await startup()
+    if LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    yield
+    if LOOP_MONITOR_ENABLED:
+        await loop_monitor.stop()
+    await shutdown()
 
 
 app = FastAPI(
     title="FastAPI Ernesto Khachatyryan ", 
-    description="Магазин мужской одежды"
+    description="Магазин мужской одежды",
+    default_response_class=TimedJSONResponse,
+    lifespan=lifespan,
 )
 
 origins = [
@@ -20,7 +56,23 @@ origins = [
 ]
 
 
+# Ближе всех к маршрутам: время сжатия попадает в Server-Timing и логи запроса
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# Внутри log_middleware: отклонённые запросы (503) попадают в логи и метрики
+if ADMISSION_ENABLED:
+    app.middleware("http")(admission_middleware)
+
+# Снаружи контроля нагрузки: время в очереди входит в бюджет, а отключившийся
+# клиент освобождает место в очереди. Внутри log_middleware: 504 и 499 попадают
+# в логи и метрики
+if REQUEST_DEADLINES_ENABLED:
+    app.add_middleware(DeadlineMiddleware)
+
 app.middleware("http")(log_middleware)
+app.middleware("http")(metrics_middleware)
+app.middleware("http")(profiling_middleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -28,6 +80,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID", "Server-Timing", "X-Profile-ID", "ETag"],
 )
 
 app.add_middleware(
@@ -43,6 +96,8 @@ app.add_middleware(
     ],
 )
 
+app.add_middleware(InFlightMiddleware)
+
 
 @app.get("/")
 async def welcome() -> dict:
@@ -54,4 +109,11 @@ app.include_router(products.router)
 app.include_router(auth.router)
 app.include_router(permission.router)
 app.include_router(reviews.router)
-app.include_router(test_endpoints.router)
+app.include_router(metrics.router)
+app.include_router(diagnostics.router)
+app.include_router(health.router)
+
+if ENABLE_DEMO_ROUTES:
+    from tests import test_endpoints
+
+    app.include_router(test_endpoints.router)
@@ -0,0 +1,51 @@
+"""Categories materialized path column added
+
+Revision ID: 3c9d1e7a5b42
+Revises: b7ef769bb7a9
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9d1e7a5b42'
+down_revision: Union[str, None] = 'b7ef769bb7a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('categories', sa.Column('path', sa.String(), nullable=True))
+
+    # Заполняем путь для уже существующих категорий обходом дерева от корней
+    op.execute(
+        """
+        WITH RECURSIVE tree AS (
+            SELECT id, id::text AS path
+            FROM categories
+            WHERE parent_id IS NULL
+            UNION ALL
+            SELECT c.id, tree.path || '.' || c.id::text
+            FROM categories c
+            JOIN tree ON c.parent_id = tree.id
+        )
+        UPDATE categories
+        SET path = tree.path
+        FROM tree
+        WHERE categories.id = tree.id
+        """
+    )
+
+    op.create_index(
+        'ix_categories_path', 'categories', ['path'],
+        postgresql_ops={'path': 'varchar_pattern_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_categories_path', table_name='categories')
+    op.drop_column('categories', 'path')
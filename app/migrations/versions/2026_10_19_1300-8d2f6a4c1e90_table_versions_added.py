@@ -0,0 +1,37 @@
+"""Table versions added
+
+Revision ID: 8d2f6a4c1e90
+Revises: 3c9d1e7a5b42
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2f6a4c1e90'
+down_revision: Union[str, None] = '3c9d1e7a5b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    table_versions = op.create_table('table_versions',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # Строки счётчиков создаются заранее: иначе первые изменения таблиц
+    # конкурировали бы за вставку одной и той же строки
+    op.bulk_insert(table_versions, [
+        {'name': 'products', 'version': 0},
+        {'name': 'categories', 'version': 0},
+        {'name': 'users', 'version': 0},
+    ])
+
+
+def downgrade() -> None:
+    op.drop_table('table_versions')
@@ -2,6 +2,7 @@ from .cart import Cart, CartItem
 from .category import Category
 from .products import Product
 from .reviews import Review
+from .table_version import TableVersion
 from .user import User
 
 __all__ = [
@@ -10,6 +11,7 @@ __all__ = [
     "Review",
     "User",
     "Cart",
-    "CartItem"
+    "CartItem",
+    "TableVersion",
 ]
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey # New
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Index # New
 from sqlalchemy.orm import relationship
 
 from app.backend.db import Base
@@ -7,11 +7,20 @@ from app.models.products import Product
 
 class Category(Base):
     __tablename__ = 'categories'
-    __table_args__ = {'extend_existing': True} 
+    __table_args__ = (
+        # varchar_pattern_ops позволяет использовать индекс для LIKE 'путь.%'
+        Index(
+            'ix_categories_path', 'path',
+            postgresql_ops={'path': 'varchar_pattern_ops'},
+        ),
+        {'extend_existing': True},
+    )
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String)
     slug = Column(String, unique=True, index=True)
     is_active = Column(Boolean, default=True)
     parent_id = Column(Integer, ForeignKey('categories.id'), nullable=True)
+    # Материализованный путь от корня: "1.5.12" (совместим с форматом ltree)
+    path = Column(String, nullable=True)
 
-    products = relationship("Product", back_populates="category", uselist=True)
\ No newline at end of file
+    products = relationship("Product", back_populates="category", uselist=True)
@@ -0,0 +1,11 @@
+from sqlalchemy import BigInteger, Column, String
+
+from app.backend.db import Base
+
+
+class TableVersion(Base):
+    """Счётчик изменений таблицы: источник ETag для ответов каталога (app/backend/etag.py)"""
+    __tablename__ = 'table_versions'
+
+    name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
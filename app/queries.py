@@ -0,0 +1,113 @@
+"""
+Часто выполняемые запросы роутеров.
+
+Запросы собираются один раз при импорте модуля, а значения передаются
+через связанные параметры при выполнении:
+
+    product = await db.scalar(queries.PRODUCT_BY_SLUG, {"slug": slug})
+
+Ключ кэша компиляции у готового объекта запроса мемоизирован, поэтому на
+каждый запрос не тратится время на сборку select() и вычисление ключа.
+"""
+from sqlalchemy import bindparam, select, update
+
+from app.models import Category, Product, Review, TableVersion, User
+
+
+# Продукты
+
+ACTIVE_PRODUCTS = select(Product).where(Product.is_active == True)
+
+# Строки без ORM-объектов для списков: db.execute(...).all()
+ACTIVE_PRODUCT_ROWS = select(*Product.__table__.columns).where(
+    Product.is_active == True
+)
+
+PRODUCT_BY_SLUG = select(Product).where(Product.slug == bindparam("slug"))
+
+ACTIVE_PRODUCT_BY_SLUG = select(Product).where(
+    Product.slug == bindparam("slug"), Product.is_active == True
+)
+
+ACTIVE_PRODUCT_BY_ID = select(Product).where(
+    Product.id == bindparam("product_id"), Product.is_active == True
+)
+
+# Параметры: subtree_params(path)
+PRODUCTS_IN_SUBTREE = (
+    select(Product)
+    .join(Category, Product.category_id == Category.id)
+    .where(
+        (Category.path == bindparam("path")) | Category.path.like(bindparam("pattern")),
+        Product.is_active == True,
+        Product.stock > 0,
+    )
+)
+
+
+# Категории
+
+ACTIVE_CATEGORIES = select(Category).where(Category.is_active == True)
+
+ACTIVE_CATEGORY_ROWS = select(*Category.__table__.columns).where(
+    Category.is_active == True
+)
+
+CATEGORY_BY_SLUG = select(Category).where(Category.slug == bindparam("slug"))
+
+ACTIVE_CATEGORY_BY_SLUG = select(Category).where(
+    Category.slug == bindparam("slug"), Category.is_active == True
+)
+
+ACTIVE_CATEGORY_BY_ID = select(Category).where(
+    Category.id == bindparam("category_id"), Category.is_active == True
+)
+
+# Параметры: subtree_params(path)
+CATEGORY_SUBTREE = (
+    select(Category)
+    .where((Category.path == bindparam("path")) | Category.path.like(bindparam("pattern")))
+    .order_by(Category.id)
+)
+
+
+# Отзывы
+
+ACTIVE_REVIEWS = select(Review).where(Review.is_active == True)
+
+ACTIVE_REVIEW_ROWS = select(*Review.__table__.columns).where(
+    Review.is_active == True
+)
+
+ACTIVE_REVIEWS_BY_PRODUCT = select(Review).where(
+    Review.product_id == bindparam("product_id"), Review.is_active == True
+)
+
+ACTIVE_REVIEW_BY_ID = select(Review).where(
+    Review.id == bindparam("review_id"), Review.is_active == True
+)
+
+
+# Пользователи
+
+USER_BY_USERNAME = select(User).where(User.username == bindparam("username"))
+
+USER_BY_ID = select(User).where(User.id == bindparam("user_id"))
+
+
+# Версии таблиц (app/backend/etag.py)
+
+TABLE_VERSIONS = select(TableVersion.name, TableVersion.version).where(
+    TableVersion.name.in_(bindparam("names", expanding=True))
+)
+
+BUMP_TABLE_VERSION = (
+    update(TableVersion)
+    .where(TableVersion.name == bindparam("table_name"))
+    .values(version=TableVersion.version + 1)
+)
+
+
+def subtree_params(path: str) -> dict:
+    """Параметры для выборки узла с материализованным путём path и всех его потомков"""
+    return {"path": path, "pattern": path + ".%"}
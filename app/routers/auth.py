@@ -1,3 +1,4 @@
+import asyncio
 from fastapi import APIRouter, Depends, status, HTTPException
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy import select, insert
@@ -8,14 +9,19 @@ from passlib.context import CryptContext
 from typing import Annotated
 import jwt
 
+from app import queries
 from app.models.user import User
-from app.schemas import CreateUser
+from app.schemas import CreateUser, CurrentUser, Token, Transaction
 from app.backend.db_depends import get_db
 from app.backend.config import SECRET_KEY, ALGORITHM
+from app.backend.timing import timed
+from app.backend.tracing import instrument_crypt_context
+from app.log import bind_request_user
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+instrument_crypt_context(bcrypt_context)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
@@ -70,7 +76,8 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
         HTTPException: Если токен недействителен или истек
     """
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        with timed("auth"):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str | None = payload.get('sub')
         user_id: int | None = payload.get('id')
         is_admin: bool | None = payload.get('is_admin')
@@ -84,6 +91,8 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
                 detail='Could not validate user'
             )
 
+        bind_request_user(user_id)
+
         return {
             'username': username,
             'id': user_id,
@@ -120,11 +129,13 @@ async def authenticate_user(
     Raises:
         HTTPException: Если учетные данные неверны или пользователь неактивен
     """
-    user = await db.scalar(select(User).where(User.username == username))
+    user = await db.scalar(queries.USER_BY_USERNAME, {"username": username})
 
+    # bcrypt в потоке: не блокирует event loop, параллельность ограничена
+    # классом auth в app/backend/admission.py
     if (
         not user
-        or not bcrypt_context.verify(password, user.hashed_password)
+        or not await asyncio.to_thread(bcrypt_context.verify, password, user.hashed_password)
         or user.is_active == False
     ):
         raise HTTPException(
@@ -135,7 +146,7 @@ async def authenticate_user(
     return user
 
 
-@router.post("/", status_code=status.HTTP_201_CREATED)
+@router.post("/", status_code=status.HTTP_201_CREATED, response_model=Transaction)
 async def create_user(
     db: Annotated[AsyncSession, Depends(get_db)], create_user: CreateUser
 ):
@@ -149,20 +160,21 @@ async def create_user(
     Returns:
         dict: Статус операции создания пользователя
     """
+    hashed_password = await asyncio.to_thread(bcrypt_context.hash, create_user.password)
     await db.execute(
         insert(User).values(
             first_name=create_user.first_name,
             last_name=create_user.last_name,
             username=create_user.username,
             email=create_user.email,
-            hashed_password=bcrypt_context.hash(create_user.password),
+            hashed_password=hashed_password,
         )
     )
     await db.commit()
     return {"status_code": status.HTTP_201_CREATED, "transaction": "Successful"}
 
 
-@router.post("/token")
+@router.post("/token", response_model=Token)
 async def login(
     db: Annotated[AsyncSession, Depends(get_db)],
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
@@ -194,7 +206,7 @@ async def login(
 
     
 
-@router.get('/read_current_user')
+@router.get('/read_current_user', response_model=CurrentUser)
 async def read_current_user(user: dict = Depends(get_current_user)):
     """
     Получить информацию о текущем аутентифицированном пользователе.
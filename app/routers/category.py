@@ -1,12 +1,15 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, Request, status, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import insert, select, delete, update
+from sqlalchemy import insert, select, delete, update, func, literal
 from typing import Annotated
 from slugify import slugify
 
 from app.routers.auth import get_current_user
+from app import queries
 from app.backend.db_depends import get_db
-from app.schemas import CreateCategory
+from app.backend.etag import conditional_get
+from app.backend.responses import ModelJSONResponse, row_dicts
+from app.schemas import CategoryOut, CreateCategory, Transaction
 from app.models import *
 
 # TODO: Рекомендации по улучшению: Привести все методы к асинхронному виду, Добавить обработку транзакций, Улучшить валидацию данных, Добавить документацию (docstrings), Добавить возвращаемые типы данных
@@ -14,19 +17,47 @@ from app.models import *
 router = APIRouter(prefix="/categories", tags=["category"])
 
 
-@router.get("/all", status_code=status.HTTP_200_OK)
-async def get_all_categories(db: Annotated[AsyncSession, Depends(get_db)]):
+def build_category_path(parent_path: str | None, category_id: int) -> str:
+    """Собирает материализованный путь категории из пути родителя и её id"""
+    if parent_path is None:
+        return str(category_id)
+    return f"{parent_path}.{category_id}"
+
+
+async def get_parent_category(db: AsyncSession, parent_id: int | None) -> Category | None:
+    """Возвращает родительскую категорию или 404, если parent_id указан, но не найден"""
+    if parent_id is None:
+        return None
+
+    parent = await db.scalar(queries.ACTIVE_CATEGORY_BY_ID, {"category_id": parent_id})
+
+    if parent is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="There is no parent category found"
+        )
+    return parent
+
+
+@router.get("/all", status_code=status.HTTP_200_OK, response_model=list[CategoryOut])
+async def get_all_categories(
+    request: Request, db: Annotated[AsyncSession, Depends(get_db)]
+):
     """
     Получить все активные категории.
+
+    Если список не изменился с версии из If-None-Match, отвечает 304.
     
     Returns:
         list: Список всех активных категорий
     """
-    categories = await db.scalars(select(Category).where(Category.is_active == True))
-    return categories.all()
+    headers = await conditional_get(request, db, "categories")
+    categories = await db.execute(queries.ACTIVE_CATEGORY_ROWS)
+    all_categories = row_dicts(categories)
+    await db.release()
+    return ModelJSONResponse(all_categories, list[CategoryOut], headers=headers)
 
 
-@router.post("/")
+@router.post("/", response_model=Transaction)
 async def create_category(
     db: Annotated[AsyncSession, Depends(get_db)],
     get_user: Annotated[dict, Depends(get_current_user)],
@@ -49,12 +80,23 @@ async def create_category(
         HTTPException: Если у пользователя нет прав администратора
     """
     if get_user.get("is_admin"):
-        await db.execute(
-            insert(Category).values(
+        parent = await get_parent_category(db, create_category.parent_id)
+
+        category_id = await db.scalar(
+            insert(Category)
+            .values(
                 name=create_category.name,
                 parent_id=create_category.parent_id,
                 slug=slugify(create_category.name),
             )
+            .returning(Category.id)
+        )
+
+        # Путь зависит от id, поэтому проставляется после вставки в той же транзакции
+        await db.execute(
+            update(Category)
+            .where(Category.id == category_id)
+            .values(path=build_category_path(parent.path if parent else None, category_id))
         )
         await db.commit()
 
@@ -70,7 +112,7 @@ async def create_category(
         )
 
 
-@router.put("/{category_slug}")
+@router.put("/{category_slug}", response_model=Transaction)
 async def update_category(
     db: Annotated[AsyncSession, Depends(get_db)],
     get_user: Annotated[dict, Depends(get_current_user)],
@@ -96,9 +138,7 @@ async def update_category(
     """
     if get_user.get('is_admin'):
         category = await db.scalar(
-            select(Category).where(
-                Category.slug == category_slug, Category.is_active == True
-            )
+            queries.ACTIVE_CATEGORY_BY_SLUG, {"slug": category_slug}
         )
 
         if category is None:
@@ -106,6 +146,33 @@ async def update_category(
                 status_code=status.HTTP_404_NOT_FOUND, detail="There is no category found"
             )
 
+        if category.parent_id != update_category.parent_id:
+            parent = await get_parent_category(db, update_category.parent_id)
+
+            if parent is not None and (
+                parent.path == category.path or parent.path.startswith(category.path + ".")
+            ):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Category can't be moved into its own subcategory",
+                )
+
+            old_path = category.path
+            new_path = build_category_path(parent.path if parent else None, category.id)
+
+            # Переносим всё поддерево одним UPDATE: заменяем префикс пути у потомков
+            await db.execute(
+                update(Category)
+                .where(Category.path.like(old_path + ".%"))
+                .values(
+                    path=literal(new_path).concat(
+                        func.substr(Category.path, len(old_path) + 1)
+                    )
+                )
+                .execution_options(synchronize_session=False)
+            )
+            category.path = new_path
+
         category.name = update_category.name
         category.slug = slugify(update_category.name)
         category.parent_id = update_category.parent_id
@@ -124,7 +191,7 @@ async def update_category(
         )
 
 
-@router.delete("/{category_slug}")
+@router.delete("/{category_slug}", response_model=Transaction)
 async def delete_category(
     db: Annotated[AsyncSession, Depends(get_db)],
     get_user: Annotated[dict, Depends(get_current_user)],
@@ -148,9 +215,7 @@ async def delete_category(
     """
     if get_user.get('is_admin'):
         category = await db.scalar(
-            select(Category).where(
-                Category.slug == category_slug, Category.is_active == True
-            )
+            queries.ACTIVE_CATEGORY_BY_SLUG, {"slug": category_slug}
         )
 
         if category is None:
@@ -0,0 +1,184 @@
+import asyncio
+from typing import Annotated, Literal
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse
+
+from app.backend import memory
+from app.backend.admission import admission_stats
+from app.backend.config import MEMORY_TOP_LIMIT
+from app.backend.profiling import profile_path
+from app.backend.tracing import take_spans, write_spans
+from app.routers.auth import get_current_user
+
+
+router = APIRouter(prefix="/diagnostics", tags=["diagnostics"])
+
+
+def require_admin(get_user: Annotated[dict, Depends(get_current_user)]) -> dict:
+    """Пропускает только администраторов"""
+    if not get_user.get("is_admin"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have admin permission",
+        )
+    return get_user
+
+
+@router.post("/traces/export")
+async def export_traces(get_user: Annotated[dict, Depends(require_admin)]):
+    """
+    Выгрузить накопленные span'ы трассировки в файл OTLP/JSON.
+    
+    Требует права администратора. Файл сохраняется в LOG_DIR/traces,
+    буфер span'ов после выгрузки очищается.
+    
+    Args:
+        get_user: Текущий аутентифицированный пользователь
+        
+    Returns:
+        dict: Статус операции, имя файла и количество выгруженных span'ов
+    """
+    spans = take_spans()
+    # Сериализация и запись файла - в потоке, чтобы не блокировать event loop
+    path = await asyncio.to_thread(write_spans, spans)
+    return {
+        "status_code": status.HTTP_200_OK,
+        "file": path.name,
+        "spans": len(spans),
+    }
+
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(
+    get_user: Annotated[dict, Depends(require_admin)], profile_id: str
+):
+    """
+    Скачать отчёт профилирования запроса.
+    
+    Id отчёта возвращается в заголовке X-Profile-ID профилированного запроса.
+    
+    Args:
+        get_user: Текущий аутентифицированный пользователь
+        profile_id: Id отчёта
+        
+    Returns:
+        FileResponse: Отчёт в формате HTML или speedscope
+        
+    Raises:
+        HTTPException: Если отчёт не найден
+    """
+    path = profile_path(profile_id)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found",
+        )
+    media_type = "text/html" if path.suffix == ".html" else "application/json"
+    return FileResponse(path, media_type=media_type, filename=path.name)
+
+
+@router.get("/admission")
+async def admission_summary(get_user: Annotated[dict, Depends(require_admin)]):
+    """
+    Состояние контроля нагрузки: лимит, запросы в обработке и в очереди,
+    быстрая и медленная средние задержки по классам маршрутов (в пределах
+    процесса).
+    
+    Args:
+        get_user: Текущий аутентифицированный пользователь
+        
+    Returns:
+        dict: Показатели по классам маршрутов
+    """
+    return admission_stats()
+
+
+@router.get("/memory")
+async def memory_summary(get_user: Annotated[dict, Depends(require_admin)]):
+    """
+    Сводка по памяти процесса: RSS, счётчики GC и число живых ORM-объектов.
+    
+    Args:
+        get_user: Текущий аутентифицированный пользователь
+        
+    Returns:
+        dict: Показатели памяти процесса
+    """
+    # Подсчёт ORM-объектов обходит gc.get_objects(): не в event loop
+    return await asyncio.to_thread(memory.memory_stats)
+
+
+@router.post("/memory/start")
+async def start_memory_tracing(
+    get_user: Annotated[dict, Depends(require_admin)],
+    frames: Annotated[int, Query(ge=1, le=50)] = 1,
+    interval: Annotated[float | None, Query(ge=memory.MIN_SNAPSHOT_INTERVAL)] = None,
+):
+    """
+    Включить tracemalloc и сделать базовый снимок.
+    
+    Args:
+        get_user: Текущий аутентифицированный пользователь
+        frames: Глубина сохраняемого стека выделений
+        interval: Период фоновых снимков в секундах, не меньше 1 (не задан - без них)
+        
+    Returns:
+        dict: Статус операции
+    """
+    # Снимки памяти - в потоке, чтобы не блокировать event loop
+    await asyncio.to_thread(memory.start_tracing, frames)
+    if interval is not None:
+        memory.start_snapshotter(interval)
+    return {
+        "status_code": status.HTTP_200_OK,
+        "transaction": "Memory tracing started",
+    }
+
+
+@router.get("/memory/diff")
+async def memory_diff(
+    get_user: Annotated[dict, Depends(require_admin)],
+    group_by: Literal["lineno", "filename"] = "lineno",
+    limit: Annotated[int, Query(ge=1, le=500)] = MEMORY_TOP_LIMIT,
+    reset: bool = False,
+):
+    """
+    Сравнить текущий снимок памяти с базовым.
+    
+    Args:
+        get_user: Текущий аутентифицированный пользователь
+        group_by: Группировка по строке или по файлу
+        limit: Количество мест выделения в ответе
+        reset: Сделать текущий снимок новым базовым
+        
+    Returns:
+        list[dict]: Места выделения памяти по убыванию прироста
+        
+    Raises:
+        HTTPException: Если tracemalloc не запущен
+    """
+    try:
+        return await asyncio.to_thread(memory.diff_from_baseline, group_by, limit, reset)
+    except RuntimeError as ex:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(ex),
+        )
+
+
+@router.post("/memory/stop")
+async def stop_memory_tracing(get_user: Annotated[dict, Depends(require_admin)]):
+    """
+    Остановить фоновые снимки и tracemalloc.
+    
+    Args:
+        get_user: Текущий аутентифицированный пользователь
+        
+    Returns:
+        dict: Статус операции
+    """
+    memory.stop_tracing()
+    return {
+        "status_code": status.HTTP_200_OK,
+        "transaction": "Memory tracing stopped",
+    }
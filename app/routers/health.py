@@ -0,0 +1,36 @@
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+
+from app.backend.lifecycle import readiness
+
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get("/live")
+async def live() -> dict:
+    """
+    Проверка живости процесса: отвечает, пока работает event loop.
+    
+    Returns:
+        dict: Статус процесса
+    """
+    return {"status": "alive"}
+
+
+@router.get("/ready")
+async def ready():
+    """
+    Проверка готовности принимать трафик.
+    
+    Процесс готов, когда прогрев при старте завершён, остановка не начата
+    и база данных отвечает.
+    
+    Returns:
+        JSONResponse: 200 с результатами проверок или 503, если процесс не готов
+    """
+    is_ready, checks = await readiness()
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if is_ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"status": "ready" if is_ready else "not ready", "checks": checks},
+    )
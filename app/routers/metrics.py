@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Response
+
+from app.backend.metrics import render_metrics
+
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Метрики приложения в формате Prometheus.
+    
+    Returns:
+        Response: Текстовое представление метрик для сбора Prometheus
+    """
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
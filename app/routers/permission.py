@@ -5,15 +5,17 @@ from starlette import status
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app import queries
 from app.backend.db_depends import get_db
 from app.models.user import User
+from app.schemas import StatusDetail
 from .auth import get_current_user
 
 
 router = APIRouter(prefix="/permission", tags=["permission"])
 
 
-@router.patch("/")
+@router.patch("/", response_model=StatusDetail)
 async def supplier_permission(
     db: Annotated[AsyncSession, Depends(get_db)],
     get_user: Annotated[dict, Depends(get_current_user)],
@@ -36,7 +38,7 @@ async def supplier_permission(
         HTTPException: Если пользователь не найден или у текущего пользователя нет прав администратора
     """
     if get_user.get("is_admin"):
-        user = await db.scalar(select(User).where(User.id == user_id))
+        user = await db.scalar(queries.USER_BY_ID, {"user_id": user_id})
 
         if not user or not user.is_active:
             raise HTTPException(
@@ -71,7 +73,7 @@ async def supplier_permission(
         )
 
 
-@router.delete("/delete")
+@router.delete("/delete", response_model=StatusDetail)
 async def delete_user(
     db: Annotated[AsyncSession, Depends(get_db)],
     get_user: Annotated[dict, Depends(get_current_user)],
@@ -95,7 +97,7 @@ async def delete_user(
         HTTPException: Если пользователь не найден, является администратором или у текущего пользователя нет прав администратора
     """
     if get_user.get("is_admin"):
-        user = await db.scalar(select(User).where(User.id == user_id))
+        user = await db.scalar(queries.USER_BY_ID, {"user_id": user_id})
 
         if not user:
             raise HTTPException(
@@ -1,45 +1,114 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+import asyncio
+from collections import defaultdict
+from fastapi import APIRouter, Depends, Request, status, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import insert, select, delete, update
 from typing import Annotated
 from slugify import slugify
 
 from app.routers.auth import get_current_user
-from app.backend.db_depends import get_db
+from app import queries
+from app.backend.db_depends import get_db, get_loaders
+from app.backend.etag import conditional_get
+from app.backend.loaders import Loaders
+from app.backend.responses import ModelJSONResponse, row_dicts
 from app.models import *
-from app.schemas import CreateProduct
+from app.schemas import CategoryTree, CreateProduct, Envelope, ExpandedProduct, ProductOut, Transaction
 
 router = APIRouter(prefix="/products", tags=["products"])
 
 
-@router.get("/all", status_code=status.HTTP_200_OK)
+async def expand_products(loaders: Loaders, products: list) -> list[dict]:
+    """
+    Добавить к продуктам вложенные категорию и поставщика.
+
+    Связанные объекты подгружаются пакетно: один запрос на категории и
+    один на поставщиков, независимо от количества продуктов. Принимает как
+    ORM-объекты, так и словари строк Core-запросов (row_dicts).
+    """
+    products = [
+        product if isinstance(product, dict) else {
+            column.key: getattr(product, column.key)
+            for column in Product.__table__.columns
+        }
+        for product in products
+    ]
+    categories, suppliers = await asyncio.gather(
+        loaders.category.load_many([product["category_id"] for product in products]),
+        loaders.supplier.load_many([product["supplier_id"] for product in products]),
+    )
+
+    expanded = []
+    for product, category, supplier in zip(products, categories, suppliers):
+        item = dict(product)
+        item["category"] = category and {
+            "id": category.id,
+            "name": category.name,
+            "slug": category.slug,
+        }
+        item["supplier"] = supplier and {
+            "id": supplier.id,
+            "username": supplier.username,
+            "first_name": supplier.first_name,
+            "last_name": supplier.last_name,
+        }
+        expanded.append(item)
+    return expanded
+
+
+def product_tables(expand: bool) -> tuple[str, ...]:
+    """Таблицы, от которых зависит ответ с продуктами (для ETag)"""
+    return ("products", "categories", "users") if expand else ("products",)
+
+
+@router.get(
+    "/all",
+    status_code=status.HTTP_200_OK,
+    response_model=Envelope[list[ExpandedProduct]],
+    response_model_exclude_unset=True,
+)
 async def get_all_products(
-    db: Annotated[AsyncSession, Depends(get_db)]
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    loaders: Annotated[Loaders, Depends(get_loaders)],
+    expand: bool = False,
 ):
     """
     Получить все активные продукты.
     
     Args:
+        request: Запрос (If-None-Match)
         db: Сессия базы данных
+        loaders: Пакетные загрузчики связанных объектов
+        expand: Добавить к продуктам вложенные категорию и поставщика
         
     Returns:
         dict: Статус и список всех активных продуктов
         
     Raises:
-        HTTPException: Если продукты не найдены
+        HTTPException: Если продукты не найдены; 304, если список не изменился
     """
-    products = await db.scalars(select(Product).where(Product.is_active == True))
-    all_products = products.all()
+    headers = await conditional_get(request, db, *product_tables(expand))
+    products = await db.execute(queries.ACTIVE_PRODUCT_ROWS)
+    all_products = row_dicts(products)
 
     if not all_products:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="There a no product found"
         )
 
-    return {"status_code": status.HTTP_200_OK, "response": all_products}
+    if expand:
+        all_products = await expand_products(loaders, all_products)
+    await db.release()
+
+    return ModelJSONResponse(
+        {"status_code": status.HTTP_200_OK, "response": all_products},
+        Envelope[list[ExpandedProduct] if expand else list[ProductOut]],
+        headers=headers,
+    )
 
 
-@router.post("/")
+@router.post("/", response_model=Transaction)
 async def create_product(
     db: Annotated[AsyncSession, Depends(get_db)],
     get_user: Annotated[dict, Depends(get_current_user)],
@@ -63,9 +132,7 @@ async def create_product(
     """
     if get_user.get('is_admin') or get_user.get('is_supplier'):
         category = await db.scalar(
-            select(Category).where(
-                Category.id == create_product.category_id, Category.is_active == True
-            )
+            queries.ACTIVE_CATEGORY_BY_ID, {"category_id": create_product.category_id}
         )
 
         if not category:
@@ -101,7 +168,7 @@ async def create_product(
             )
 
 
-@router.get("/{product_slug}")
+@router.get("/{product_slug}", response_model=Envelope[CategoryTree])
 async def products_by_category(
     db: Annotated[AsyncSession, Depends(get_db)],
     category_slug: str,
@@ -119,89 +186,74 @@ async def products_by_category(
     Raises:
         HTTPException: Если категория не найдена
     """
-    category = await db.scalar(select(Category).where(Category.slug == category_slug))
+    category = await db.scalar(queries.CATEGORY_BY_SLUG, {"slug": category_slug})
 
     if category is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Category not found"
         )
 
-    async def get_subcategories(category_id: int) -> list[int]:
-        """Рекурсивно возвращает список id вложенных подкатегорий"""
-        result = [category_id]
-        subcategories = await db.scalars(
-            select(Category).where(Category.parent_id == category_id)
-        )
-        subcats = subcategories.all()
-
-        for subcategory in subcats:
-            sub_ids = await get_subcategories(subcategory.id)
-            result.extend(sub_ids)
-        return result
-
-    category_ids = await get_subcategories(category.id)
+    # Всё поддерево категории одним индексным запросом по материализованному пути
+    subcategories = await db.scalars(
+        queries.CATEGORY_SUBTREE, queries.subtree_params(category.path)
+    )
+    children: dict[int, list[Category]] = defaultdict(list)
+    for subcategory in subcategories.all():
+        children[subcategory.parent_id].append(subcategory)
 
     products = await db.scalars(
-        select(Product).where(
-            Product.category_id.in_(category_ids),
-            Product.is_active == True,
-            Product.stock > 0,
-        )
+        queries.PRODUCTS_IN_SUBTREE, queries.subtree_params(category.path)
     )
-    products_by_category = products.all()
-
-    async def category_tree(category_id: int) -> dict:
-        """Рекурсивно строит дерево продуктов по категориям"""
-        current_category = await db.scalar(
-            select(Category).where(Category.id == category_id)
-        )
-
-        category_products = [
-            product
-            for product in products_by_category
-            if product.category_id == category_id
-        ]
-
-        subcategories = await db.scalars(
-            select(Category).where(Category.parent_id == category_id)
-        )
-        subcats = subcategories.all()
-
-        subcategory_trees = []
-        for subcat in subcats:
-            subtree = await category_tree(subcat.id)
-            subcategory_trees.append(subtree)
+    products_by_category: dict[int, list[Product]] = defaultdict(list)
+    for product in products.all():
+        products_by_category[product.category_id].append(product)
+    await db.release()
 
+    def category_tree(current_category: Category) -> dict:
+        """Рекурсивно строит дерево продуктов по категориям из уже загруженных данных"""
         return {
             "category_name": current_category.name,
-            "products": category_products,
-            "subcategories": subcategory_trees,
+            "products": products_by_category[current_category.id],
+            "subcategories": [
+                category_tree(subcat) for subcat in children[current_category.id]
+            ],
         }
 
-    response = await category_tree(category.id)
+    response = category_tree(category)
 
     return {"status_code": status.HTTP_200_OK, "response": response}
 
 
-@router.get("/detail/{product_slug}")
+@router.get(
+    "/detail/{product_slug}",
+    response_model=Envelope[ExpandedProduct],
+    response_model_exclude_unset=True,
+)
 async def product_detail(
+    request: Request,
     db: Annotated[AsyncSession, Depends(get_db)],
+    loaders: Annotated[Loaders, Depends(get_loaders)],
     product_slug: str,
+    expand: bool = False,
 ):
     """
     Получить детальную информацию о продукте по slug.
     
     Args:
+        request: Запрос (If-None-Match)
         db: Сессия базы данных
+        loaders: Пакетные загрузчики связанных объектов
         product_slug: Slug продукта
+        expand: Добавить к продукту вложенные категорию и поставщика
         
     Returns:
         dict: Статус и детальная информация о продукте
         
     Raises:
-        HTTPException: Если продукт не найден
+        HTTPException: Если продукт не найден; 304, если продукт не изменился
     """
-    product = await db.scalar(select(Product).where(Product.slug == product_slug))
+    headers = await conditional_get(request, db, *product_tables(expand))
+    product = await db.scalar(queries.PRODUCT_BY_SLUG, {"slug": product_slug})
 
     if not product:
         raise HTTPException(
@@ -209,10 +261,20 @@ async def product_detail(
             detail="Product not found"
             )
 
-    return {"status_code": status.HTTP_200_OK, "response": product}
+    if expand:
+        [product] = await expand_products(loaders, [product])
+    await db.release()
+
+    # Без expand - схема без связей: проверка по ExpandedProduct обратилась
+    # бы к ленивому атрибуту ORM-объекта product.category
+    return ModelJSONResponse(
+        {"status_code": status.HTTP_200_OK, "response": product},
+        Envelope[ExpandedProduct if expand else ProductOut],
+        headers=headers,
+    )
 
 
-@router.put("/{product_slug}")
+@router.put("/{product_slug}", response_model=Transaction)
 async def update_product(
     db: Annotated[AsyncSession, Depends(get_db)],
     get_user: Annotated[dict, Depends(get_current_user)],
@@ -238,7 +300,7 @@ async def update_product(
     """
     if get_user.get('is_admin') or get_user.get('is_supplier'):
         product = await db.scalar(
-            select(Product).where(Product.slug == product_slug, Product.is_active == True)
+            queries.ACTIVE_PRODUCT_BY_SLUG, {"slug": product_slug}
         )
 
         if not product:
@@ -268,7 +330,7 @@ async def update_product(
             )
 
 
-@router.delete("/{product_slug}")
+@router.delete("/{product_slug}", response_model=Transaction)
 async def delete_product(
     db: Annotated[AsyncSession, Depends(get_db)],
     get_user: Annotated[dict, Depends(get_current_user)],
@@ -291,7 +353,7 @@ async def delete_product(
         HTTPException: Если продукт не найден или у пользователя нет необходимых прав
     """
     if get_user.get('is_admin') or get_user.get('is_supplier'):
-        product = await db.scalar(select(Product).where(Product.slug == product_slug))
+        product = await db.scalar(queries.PRODUCT_BY_SLUG, {"slug": product_slug})
 
         if not product:
             raise HTTPException(
@@ -5,9 +5,11 @@ from typing import Annotated
 from datetime import datetime
 
 from app.routers.auth import get_current_user
+from app import queries
 from app.backend.db_depends import get_db
+from app.backend.responses import ModelJSONResponse, row_dicts
 from app.models import *
-from app.schemas import CreateReview
+from app.schemas import CreateReview, Envelope, ReviewOut, Transaction
 
 router = APIRouter(prefix="/reviews", tags=["reviews"])
 
@@ -15,7 +17,7 @@ router = APIRouter(prefix="/reviews", tags=["reviews"])
 async def update_rating() -> None:
     pass
 
-@router.get("/")
+@router.get("/", response_model=Envelope[list[ReviewOut]])
 async def all_reviews(db: Annotated[AsyncSession, Depends(get_db)]):
     """
     Получить все активные отзывы.
@@ -29,18 +31,22 @@ async def all_reviews(db: Annotated[AsyncSession, Depends(get_db)]):
     Raises:
         HTTPException: Если отзывы не найдены
     """
-    reviews = await db.scalars(select(Review).where(Product.is_active == True))
-    all_reviews = reviews.all()
+    reviews = await db.execute(queries.ACTIVE_REVIEW_ROWS)
+    all_reviews = row_dicts(reviews)
+    await db.release()
 
     if not all_reviews:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="There a no reviews found"
         )
 
-    return {"status_code": status.HTTP_200_OK, "response": all_reviews}
+    return ModelJSONResponse(
+        {"status_code": status.HTTP_200_OK, "response": all_reviews},
+        Envelope[list[ReviewOut]],
+    )
 
 
-@router.get("/{product_slug}")
+@router.get("/{product_slug}", response_model=Envelope[list[ReviewOut]])
 async def products_reviews(
     db: Annotated[AsyncSession, Depends(get_db)], product_id: int
 ):
@@ -58,9 +64,10 @@ async def products_reviews(
         HTTPException: Если отзывы для продукта не найдены
     """
     products_reviews = await db.scalars(
-        select(Review).where(Review.product_id == product_id, Review.is_active == True)
+        queries.ACTIVE_REVIEWS_BY_PRODUCT, {"product_id": product_id}
     )
     prod_all_reviews = products_reviews.all()
+    await db.release()
 
     if not prod_all_reviews:
         raise HTTPException(
@@ -71,7 +78,7 @@ async def products_reviews(
     return {"status_code": status.HTTP_200_OK, "response": prod_all_reviews}
 
 
-@router.post("/")
+@router.post("/", response_model=Transaction)
 async def add_review(
     db: Annotated[AsyncSession, Depends(get_db)],
     get_user: Annotated[dict, Depends(get_current_user)],
@@ -97,7 +104,7 @@ async def add_review(
     """
     if get_user.get("is_customer"):
         product = await db.scalar(
-            select(Product).where(Product.id == product_id, Product.is_active == True)
+            queries.ACTIVE_PRODUCT_BY_ID, {"product_id": product_id}
         )
 
         if not product:
@@ -123,9 +130,7 @@ async def add_review(
         )
 
         grades = await db.scalars(
-            select(Review).where(
-                Review.product_id == product_id, Review.is_active == True
-            )
+            queries.ACTIVE_REVIEWS_BY_PRODUCT, {"product_id": product_id}
         )
         all_grades = [grade.grade for grade in grades.all()]
 
@@ -143,7 +148,7 @@ async def add_review(
         )
 
 
-@router.delete("/{review_id}")
+@router.delete("/{review_id}", response_model=Transaction)
 async def delete_reviews(
     db: Annotated[AsyncSession, Depends(get_db)],
     get_user: Annotated[dict, Depends(get_current_user)],
@@ -167,22 +172,18 @@ async def delete_reviews(
         HTTPException: Если у пользователя нет прав администратора
     """
     if get_user.get("is_admin"):
-        review = await db.scalar(
-            select(Review).where(Review.id == review_id, Review.is_active == True)
-        )
+        review = await db.scalar(queries.ACTIVE_REVIEW_BY_ID, {"review_id": review_id})
 
         review.is_active = False
 
         # Вывести в отдельную функцию
         #-------------vvv-------------
         product = await db.scalar(
-            select(Product).where(Product.id == review.product_id, Product.is_active == True)
+            queries.ACTIVE_PRODUCT_BY_ID, {"product_id": review.product_id}
         )
 
         grades = await db.scalars(
-            select(Review).where(
-                Review.product_id == review.product_id, Review.is_active == True
-            )
+            queries.ACTIVE_REVIEWS_BY_PRODUCT, {"product_id": review.product_id}
         )
         all_grades = [grade.grade for grade in grades.all()]
 
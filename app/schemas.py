@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
-from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import date, datetime
+from typing import Generic, TypeVar
 
 
 class CreateProduct(BaseModel):
@@ -26,4 +27,106 @@ class CreateUser(BaseModel):
 
 class CreateReview(BaseModel):
     comment: str = 'Введите ваш отзыв...'
-    grade: int = 5
\ No newline at end of file
+    grade: int = 5
+
+
+# Схемы ответов. from_attributes позволяет отдавать в них ORM-объекты:
+# FastAPI проверяет и сериализует ответ в pydantic-core по response_model,
+# без обхода объектов через jsonable_encoder. Большие списки отдаются
+# словарями строк через responses.ModelJSONResponse
+
+T = TypeVar("T")
+
+
+class ResponseSchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+
+class Envelope(BaseModel, Generic[T]):
+    status_code: int
+    response: T
+
+
+class Transaction(BaseModel):
+    status_code: int
+    transaction: str
+
+
+class StatusDetail(BaseModel):
+    status_code: int
+    detail: str
+
+
+class ProductOut(ResponseSchema):
+    id: int
+    name: str
+    slug: str
+    description: str | None
+    price: int
+    image_url: str | None
+    stock: int
+    supplier_id: int | None
+    category_id: int | None
+    rating: float | None
+    is_active: bool
+
+
+class CategoryBrief(ResponseSchema):
+    id: int
+    name: str
+    slug: str
+
+
+class SupplierBrief(ResponseSchema):
+    id: int
+    username: str
+    first_name: str | None
+    last_name: str | None
+
+
+class ExpandedProduct(ProductOut):
+    """Продукт; category и supplier присутствуют в ответе только при expand=true"""
+    category: CategoryBrief | None = None
+    supplier: SupplierBrief | None = None
+
+
+class CategoryOut(ResponseSchema):
+    id: int
+    name: str
+    slug: str
+    is_active: bool
+    parent_id: int | None
+    path: str | None
+
+
+class CategoryTree(BaseModel):
+    category_name: str
+    products: list[ProductOut]
+    subcategories: list["CategoryTree"]
+
+
+class ReviewOut(ResponseSchema):
+    id: int
+    user_id: int | None
+    product_id: int
+    comment: str | None
+    comment_date: date
+    grade: int
+    is_active: bool
+
+
+class UserOut(BaseModel):
+    username: str
+    id: int
+    is_admin: bool | None
+    is_supplier: bool | None
+    is_customer: bool | None
+
+
+class CurrentUser(BaseModel):
+    User: UserOut
+
+
+class Token(BaseModel):
+    access_token: str
+    token_type: str
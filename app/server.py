@@ -0,0 +1,201 @@
+"""
+Запуск приложения в production.
+
+    python -m app.server [--workers N] [--bind 0.0.0.0:8000] ...
+
+Сервер - gunicorn с воркерами uvicorn:
+    - воркеров по умолчанию столько, сколько ядер доступно процессу (с
+      учётом affinity и квоты CPU в cgroup): по одному event loop на ядро;
+    - uvloop и httptools, если установлены (иначе asyncio и h11);
+    - keep-alive и backlog сокета из настроек;
+    - воркер перезапускается после SERVER_MAX_REQUESTS запросов плюс
+      случайные до SERVER_MAX_REQUESTS_JITTER (чтобы воркеры не
+      перезапускались одновременно) - так ограничивается медленный рост
+      памяти;
+    - приложение импортируется в мастере до fork (preload): воркеры
+      делят память модулей и стартуют быстрее. Это безопасно, потому что
+      соединения БД и Redis создаются лениво, мониторы и прогрев
+      запускаются, а sink'и логов подключаются в lifespan каждого
+      воркера;
+    - при нескольких воркерах метрики Prometheus собираются через общий
+      каталог PROMETHEUS_MULTIPROC_DIR (если не задан - временный),
+      файлы завершённых воркеров помечаются через mark_process_dead.
+
+Без gunicorn (например, на Windows) запускается uvicorn с теми же
+параметрами, но без preload и без очистки метрик завершённых воркеров.
+
+Перед стартом печатается итоговая конфигурация.
+"""
+import argparse
+import atexit
+import math
+import os
+import shutil
+import tempfile
+from importlib.util import find_spec
+from pathlib import Path
+
+from app.backend import config
+
+
+APP = "app.main:app"
+
+
+def available_cpus() -> int:
+    """Ядра, доступные процессу: affinity и квота CPU cgroup v2"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def event_loop() -> str:
+    return "uvloop" if find_spec("uvloop") else "asyncio"
+
+
+def http_protocol() -> str:
+    return "httptools" if find_spec("httptools") else "h11"
+
+
+def prepare_metrics_dir(workers: int) -> str | None:
+    """
+    Каталог метрик для нескольких воркеров.
+
+    Задаётся до импорта приложения: prometheus_client выбирает режим
+    хранения значений при импорте. Файлы прошлого запуска удаляются.
+    """
+    path = config.METRICS_MULTIPROC_DIR
+    if workers < 2 and not path:
+        return None
+    if path:
+        Path(path).mkdir(parents=True, exist_ok=True)
+        for stale in Path(path).glob("*.db"):
+            stale.unlink()
+    else:
+        path = tempfile.mkdtemp(prefix="prometheus_")
+        atexit.register(_remove_metrics_dir, path, os.getpid())
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+        config.METRICS_MULTIPROC_DIR = path
+    return path
+
+
+def _remove_metrics_dir(path: str, owner_pid: int) -> None:
+    # atexit наследуется воркерами после fork: каталог удаляет только мастер
+    if os.getpid() == owner_pid:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _mark_worker_dead(server, worker) -> None:
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def run_gunicorn(settings: dict) -> None:
+    from gunicorn.app.base import BaseApplication
+
+    try:
+        from uvicorn_worker import UvicornWorker
+    except ImportError:
+        from uvicorn.workers import UvicornWorker
+
+    class Worker(UvicornWorker):
+        CONFIG_KWARGS = {"loop": settings["loop"], "http": settings["http"]}
+
+    options = {
+        "bind": settings["bind"],
+        "workers": settings["workers"],
+        "worker_class": Worker,
+        "keepalive": settings["keepalive"],
+        "backlog": settings["backlog"],
+        "max_requests": settings["max_requests"],
+        "max_requests_jitter": settings["max_requests_jitter"],
+        "preload_app": settings["preload"],
+        # Воркер успевает снять готовность и дождаться запросов в обработке
+        # (см. app/backend/lifecycle.py)
+        "graceful_timeout": int(config.SHUTDOWN_READINESS_GRACE + config.SHUTDOWN_DRAIN_TIMEOUT) + 5,
+    }
+    if settings["metrics_dir"]:
+        options["child_exit"] = _mark_worker_dead
+
+    class Server(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app.main import app
+
+            return app
+
+    Server().run()
+
+
+def run_uvicorn(settings: dict) -> None:
+    import uvicorn
+
+    host, _, port = settings["bind"].rpartition(":")
+    uvicorn.run(
+        APP,
+        host=host or "0.0.0.0",
+        port=int(port),
+        workers=settings["workers"],
+        loop=settings["loop"],
+        http=settings["http"],
+        timeout_keep_alive=settings["keepalive"],
+        backlog=settings["backlog"],
+        limit_max_requests=settings["max_requests"] or None,
+        limit_max_requests_jitter=settings["max_requests_jitter"],
+        timeout_graceful_shutdown=int(config.SHUTDOWN_DRAIN_TIMEOUT) + 5,
+        access_log=False,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bind", default=config.SERVER_BIND, help="host:port")
+    parser.add_argument("--workers", type=int, default=config.WEB_CONCURRENCY or available_cpus())
+    parser.add_argument("--keepalive", type=int, default=config.SERVER_KEEPALIVE)
+    parser.add_argument("--backlog", type=int, default=config.SERVER_BACKLOG)
+    parser.add_argument("--max-requests", type=int, default=config.SERVER_MAX_REQUESTS)
+    parser.add_argument("--max-requests-jitter", type=int, default=config.SERVER_MAX_REQUESTS_JITTER)
+    parser.add_argument(
+        "--preload", action=argparse.BooleanOptionalAction, default=config.SERVER_PRELOAD
+    )
+    parser.add_argument("--uvicorn", action="store_true", help="Без gunicorn")
+    args = parser.parse_args()
+
+    use_gunicorn = not args.uvicorn and find_spec("gunicorn") is not None
+    settings = {
+        "server": "gunicorn" if use_gunicorn else "uvicorn",
+        "bind": args.bind,
+        "workers": max(args.workers, 1),
+        "loop": event_loop(),
+        "http": http_protocol(),
+        "keepalive": args.keepalive,
+        "backlog": args.backlog,
+        "max_requests": args.max_requests,
+        "max_requests_jitter": args.max_requests_jitter,
+        "preload": args.preload and use_gunicorn,
+    }
+    settings["metrics_dir"] = prepare_metrics_dir(settings["workers"])
+
+    print("Server configuration:")
+    for key, value in settings.items():
+        print(f"  {key:<20}{value}")
+
+    if use_gunicorn:
+        run_gunicorn(settings)
+    else:
+        run_uvicorn(settings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Бенчмарк сжатия ответов: байты против процессорного времени.
+
+Тела ответов собираются так же, как их отдают эндпоинты (ModelJSONResponse
+по схемам ответов) из синтетических данных benchmarks.datagen:
+
+    products - /products/all с --rows продуктами
+    tree     - /products/{slug}: дерево категорий с продуктами
+
+Для каждого тела и каждой кодировки и уровня (gzip 1-9, brotli 0-11, если
+установлен пакет brotli) выводятся размер после сжатия, доля от исходного
+и медиана процессорного времени сжатия. Уровни по умолчанию в приложении
+задаются COMPRESSION_GZIP_LEVEL и COMPRESSION_BROTLI_QUALITY; при попадании
+в кэш сжатых ответов (по ETag) это время не тратится.
+
+Запуск:
+    python -m benchmarks.bench_compression --rows 10000
+"""
+import argparse
+import statistics
+import time
+from collections import defaultdict
+from functools import partial
+
+from app.backend import compression
+from app.backend.responses import ModelJSONResponse
+from app.schemas import CategoryTree, Envelope, ProductOut
+from benchmarks.datagen import category_rows, product_rows, rng_for
+
+
+def products_body(rows: int) -> bytes:
+    products = list(product_rows(rng_for(0, "products"), rows, [1], []))
+    return ModelJSONResponse(
+        {"status_code": 200, "response": products}, Envelope[list[ProductOut]]
+    ).body
+
+
+def tree_body(rows: int) -> bytes:
+    categories = category_rows(depth=3, breadth=5)
+    products = defaultdict(list)
+    for product in product_rows(rng_for(0, "products"), rows, [c["id"] for c in categories], []):
+        products[product["category_id"]].append(product)
+    children = defaultdict(list)
+    for category in categories[1:]:
+        children[category["parent_id"]].append(category)
+
+    def node(category: dict) -> dict:
+        return {
+            "category_name": category["name"],
+            "products": products[category["id"]],
+            "subcategories": [node(child) for child in children[category["id"]]],
+        }
+
+    return ModelJSONResponse(
+        {"status_code": 200, "response": node(categories[0])}, Envelope[CategoryTree]
+    ).body
+
+
+def codecs() -> dict[str, object]:
+    """Название варианта -> функция сжатия"""
+    variants = {
+        f"gzip-{level}": partial(compression.gzip.compress, compresslevel=level, mtime=0)
+        for level in (1, 4, 6, 9)
+    }
+    if compression.brotli is not None:
+        variants.update({
+            f"br-{quality}": partial(compression.brotli.compress, quality=quality)
+            for quality in (1, 4, 5, 7, 11)
+        })
+    return variants
+
+
+def measure(compress, body: bytes, repeat: int) -> tuple[int, float]:
+    """Размер после сжатия и медиана процессорного времени (мс)"""
+    times = []
+    for _ in range(repeat):
+        start = time.process_time()
+        compressed = compress(body)
+        times.append((time.process_time() - start) * 1000)
+    return len(compressed), statistics.median(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000, help="Продуктов в ответе")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    bodies = {"products": products_body(args.rows), "tree": tree_body(args.rows)}
+    if compression.brotli is None:
+        print("brotli is not installed: only gzip is measured")
+
+    print(f"{'body':<10}{'encoding':<10}{'bytes':>12}{'ratio':>8}{'cpu, ms':>10}{'MB/s':>9}")
+    for name, body in bodies.items():
+        print(f"{name:<10}{'identity':<10}{len(body):>12,}{1:>8.1%}{0:>10.1f}{'':>9}")
+        for variant, compress in codecs().items():
+            size, cpu_ms = measure(compress, body, args.repeat)
+            speed = len(body) / 1e6 / (cpu_ms / 1000) if cpu_ms else float("inf")
+            print(
+                f"{name:<10}{variant:<10}{size:>12,}{size / len(body):>8.1%}"
+                f"{cpu_ms:>10.1f}{speed:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
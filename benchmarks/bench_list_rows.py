@@ -0,0 +1,139 @@
+"""
+Бенчмарк списочных эндпоинтов: ORM-объекты против строк Core-запросов.
+
+Для каждого пути измеряются процессорное время и пиковая память
+(tracemalloc) на полный цикл: выборка N строк из SQLite в памяти и
+сериализация ответа в JSON так, как это делает эндпоинт.
+
+    ORM:  session.scalars(select(Product)) -> jsonable_encoder -> JSONResponse
+    rows: session.execute(select(*columns)) -> row_dicts -> ModelJSONResponse
+          (проверка по схеме ответа и JSON в pydantic-core)
+
+Запуск:
+    python -m benchmarks.bench_list_rows --rows 10000
+"""
+import argparse
+import time
+import tracemalloc
+from datetime import date
+from functools import partial
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app import queries
+from app.backend.db import Base
+from app.backend.responses import ModelJSONResponse, row_dicts
+from app.models import Category, Product, Review
+from app.schemas import CategoryOut, Envelope, ProductOut, ReviewOut
+
+
+def fill(engine, rows: int) -> None:
+    """Заполняет таблицы синтетическими данными"""
+    with Session(engine) as session:
+        session.execute(
+            insert(Category),
+            [
+                {
+                    "name": f"Category {i}",
+                    "slug": f"category-{i}",
+                    "is_active": True,
+                    "path": str(i),
+                }
+                for i in range(1, rows + 1)
+            ],
+        )
+        session.execute(
+            insert(Product),
+            [
+                {
+                    "name": f"Product {i}",
+                    "slug": f"product-{i}",
+                    "description": "Описание товара " * 4,
+                    "price": 1000 + i,
+                    "image_url": f"https://example.com/{i}.jpg",
+                    "stock": i % 50,
+                    "category_id": i,
+                    "rating": 4.5,
+                    "is_active": True,
+                }
+                for i in range(1, rows + 1)
+            ],
+        )
+        session.execute(
+            insert(Review),
+            [
+                {
+                    "user_id": 1,
+                    "product_id": i,
+                    "comment": "Хороший товар",
+                    "comment_date": date(2025, 1, 1),
+                    "grade": 5,
+                    "is_active": True,
+                }
+                for i in range(1, rows + 1)
+            ],
+        )
+        session.commit()
+
+
+def orm_path(engine, statement) -> bytes:
+    with Session(engine) as session:
+        items = session.scalars(statement).all()
+        return JSONResponse(jsonable_encoder({"status_code": 200, "response": items})).body
+
+
+def rows_path(engine, statement, schema) -> bytes:
+    with Session(engine) as session:
+        items = row_dicts(session.execute(statement))
+        return ModelJSONResponse(
+            {"status_code": 200, "response": items}, Envelope[list[schema]]
+        ).body
+
+
+def measure(run, engine, statement) -> tuple[float, float]:
+    """Процессорное время (мс) и пиковая память (МБ) одного вызова"""
+    run(engine, statement)  # прогрев кэша компиляции
+
+    tracemalloc.start()
+    start = time.process_time()
+    run(engine, statement)
+    cpu_ms = (time.process_time() - start) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu_ms, peak / 1024 / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    fill(engine, args.rows)
+
+    cases = {
+        "products": (queries.ACTIVE_PRODUCTS, queries.ACTIVE_PRODUCT_ROWS, ProductOut),
+        "categories": (queries.ACTIVE_CATEGORIES, queries.ACTIVE_CATEGORY_ROWS, CategoryOut),
+        "reviews": (queries.ACTIVE_REVIEWS, queries.ACTIVE_REVIEW_ROWS, ReviewOut),
+    }
+
+    print(f"{args.rows} rows per listing")
+    print(
+        f"{'listing':<12}{'ORM cpu, ms':>13}{'rows cpu, ms':>14}"
+        f"{'ORM peak, MB':>14}{'rows peak, MB':>15}"
+    )
+    for name, (orm_statement, rows_statement, schema) in cases.items():
+        orm_cpu, orm_peak = measure(orm_path, engine, orm_statement)
+        rows_cpu, rows_peak = measure(partial(rows_path, schema=schema), engine, rows_statement)
+        print(
+            f"{name:<12}{orm_cpu:>13.1f}{rows_cpu:>14.1f}"
+            f"{orm_peak:>14.1f}{rows_peak:>15.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
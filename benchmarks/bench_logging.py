@@ -0,0 +1,96 @@
+"""
+Бенчмарк пропускной способности логирования запросов.
+
+Сравнивает прежнюю схему (три файловых sink'а loguru с enqueue=True и
+пересекающимися уровнями, сообщение собирается конкатенацией) с текущей
+(BatchedFileSink на каждый уровень, структурные поля через bind).
+
+Для каждой схемы выводится:
+    caller  - записей в секунду со стороны обработчика запроса
+    total   - записей в секунду до момента, когда всё записано на диск
+
+Запуск:
+    python -m benchmarks.bench_logging --records 50000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from loguru import logger
+
+from app.backend.log_sink import BatchedFileSink
+
+
+OLD_CONF = {
+    "format": "Log: [{extra[log_id]}:{time} - {level} - {message} ",
+    "enqueue": True,
+    "rotation": "10 MB",
+    "retention": "10 days",
+}
+
+
+def setup_old(log_dir: Path) -> None:
+    logger.add(log_dir / "info.log", level="INFO", **OLD_CONF)
+    logger.add(log_dir / "warning.log", level="WARNING", **OLD_CONF)
+    logger.add(log_dir / "error.log", level="ERROR", **OLD_CONF)
+
+
+def log_old(i: int) -> None:
+    logger.info("Successfully accessed " + f"/products/detail/product-{i}")
+
+
+def setup_new(log_dir: Path) -> None:
+    warning_no = logger.level("WARNING").no
+    error_no = logger.level("ERROR").no
+    logger.add(
+        BatchedFileSink(log_dir / "info.log"),
+        level="INFO",
+        filter=lambda record: record["level"].no < warning_no,
+    )
+    logger.add(
+        BatchedFileSink(log_dir / "warning.log"),
+        level="WARNING",
+        filter=lambda record: record["level"].no < error_no,
+    )
+    logger.add(BatchedFileSink(log_dir / "error.log"), level="ERROR")
+
+
+def log_new(i: int) -> None:
+    logger.bind(
+        method="GET",
+        route="/products/detail/{product_slug}",
+        path=f"/products/detail/product-{i}",
+        status=200,
+        duration_ms=1.23,
+        user_id=i % 100,
+    ).info(f"Successfully accessed /products/detail/product-{i}")
+
+
+def run(setup, log, records: int) -> tuple[float, float]:
+    logger.remove()
+    with tempfile.TemporaryDirectory() as tmp:
+        setup(Path(tmp))
+        start = time.perf_counter()
+        with logger.contextualize(log_id="00000000-0000-0000-0000-000000000000"):
+            for i in range(records):
+                log(i)
+        caller = time.perf_counter() - start
+        logger.remove()  # дожидается записи всех очередей
+        total = time.perf_counter() - start
+    return records / caller, records / total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=50000)
+    args = parser.parse_args()
+
+    print(f"{'setup':<10}{'caller, rec/s':>16}{'total, rec/s':>16}")
+    for name, setup, log in (("old", setup_old, log_old), ("batched", setup_new, log_new)):
+        caller, total = run(setup, log, args.records)
+        print(f"{name:<10}{caller:>16,.0f}{total:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Микро-бенчмарк накладных расходов Python на построение и выполнение запросов.
+
+Сравнивает обычный select(), собираемый заново на каждый запрос, с готовыми
+запросами со связанными параметрами из app/queries.py. Запросы выполняются
+на пустой SQLite в памяти, поэтому время почти целиком уходит на Python:
+сборку конструкции, ключ кэша компиляции и обработку результата.
+
+Запуск:
+    python -m benchmarks.bench_queries --iterations 20000
+"""
+import argparse
+import time
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app import queries
+from app.backend.db import Base
+from app.models import Category, Product, User
+
+
+def build_cases() -> dict:
+    """
+    Пары для горячих мест роутеров: функция, собирающая запрос по-старому,
+    и готовый запрос из app/queries.py с параметрами
+    """
+    return {
+        "product_by_slug": (
+            lambda: select(Product).where(Product.slug == "some-product"),
+            (queries.PRODUCT_BY_SLUG, {"slug": "some-product"}),
+        ),
+        "active_category_by_slug": (
+            lambda: select(Category).where(
+                Category.slug == "some-category", Category.is_active == True
+            ),
+            (queries.ACTIVE_CATEGORY_BY_SLUG, {"slug": "some-category"}),
+        ),
+        "products_in_subtree": (
+            lambda: select(Product)
+            .join(Category, Product.category_id == Category.id)
+            .where(
+                (Category.path == "1.5") | Category.path.like("1.5.%"),
+                Product.is_active == True,
+                Product.stock > 0,
+            ),
+            (queries.PRODUCTS_IN_SUBTREE, queries.subtree_params("1.5")),
+        ),
+        "user_by_username": (
+            lambda: select(User).where(User.username == "user"),
+            (queries.USER_BY_USERNAME, {"username": "user"}),
+        ),
+    }
+
+
+def measure(run, iterations: int) -> float:
+    """Среднее время одного вызова run() в микросекундах"""
+    for _ in range(100):  # прогрев кэша компиляции
+        run()
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        run()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+
+    print(f"{'query':<26}{'select(), us':>14}{'prebuilt, us':>14}{'speedup':>10}")
+    with Session(engine) as session:
+        for name, (build, (statement, params)) in build_cases().items():
+            old_us = measure(lambda: session.scalars(build()).all(), args.iterations)
+            new_us = measure(
+                lambda: session.scalars(statement, params).all(), args.iterations
+            )
+            print(f"{name:<26}{old_us:>14.1f}{new_us:>14.1f}{old_us / new_us:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
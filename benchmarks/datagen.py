@@ -0,0 +1,350 @@
+"""
+Генератор синтетических данных магазина в масштабе production.
+
+Создаёт пользователей с заданной долей администраторов и поставщиков,
+полное дерево категорий (parent_id и материализованный path), товары в
+листовых категориях, отзывы с распределением Ципфа по товарам (немного
+популярных товаров собирают большую часть отзывов) и корзины покупателей.
+Рейтинг товара согласован с его отзывами.
+
+Результат полностью определяется --seed: у каждой таблицы свой генератор
+случайных чисел, поэтому изменение масштаба одной таблицы не меняет
+содержимое остальных. Данные генерируются потоком, пачками по --chunk-size
+строк, и загружаются в PostgreSQL через COPY (asyncpg), в остальные СУБД -
+пакетным INSERT.
+
+У всех пользователей один пароль (--password), хеш считается один раз.
+
+Запуск:
+    python -m benchmarks.datagen --products 1000000 --reviews 5000000 \\
+        --category-depth 4 --category-breadth 8 --truncate
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from array import array
+from datetime import datetime, timedelta
+from itertools import accumulate, islice
+
+from slugify import slugify
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from app.backend.db import URL_DATABASE, Base
+from app.backend.etag import VERSIONED_TABLES, bump_versions
+from app.models import Cart, CartItem, Category, Product, Review, User
+
+
+FIRST_NAMES = ("Александр", "Дмитрий", "Максим", "Сергей", "Андрей", "Алексей", "Артём", "Илья", "Кирилл", "Михаил")
+LAST_NAMES = ("Иванов", "Смирнов", "Кузнецов", "Попов", "Васильев", "Петров", "Соколов", "Михайлов", "Новиков", "Фёдоров")
+CATEGORY_NAMES = ("Одежда", "Обувь", "Аксессуары", "Верхняя одежда", "Рубашки", "Брюки", "Костюмы", "Трикотаж", "Спорт", "Бельё")
+PRODUCT_TYPES = ("Рубашка", "Брюки", "Пиджак", "Футболка", "Джинсы", "Куртка", "Свитер", "Пальто", "Ремень", "Галстук")
+PRODUCT_FITS = ("slim fit", "regular fit", "oversize", "classic", "tapered")
+PRODUCT_COLORS = ("чёрный", "белый", "синий", "серый", "бежевый", "оливковый", "бордовый", "графит")
+COMMENTS = ("Отличное качество", "Хорошо сидит", "Размер меньше, чем ожидал", "Цвет как на фото", "Ткань тонковата", "Рекомендую")
+
+# Части slug'ов считаются один раз: slugify на каждую из миллионов строк слишком медленный
+PRODUCT_TYPE_SLUGS = [slugify(name) for name in PRODUCT_TYPES]
+PRODUCT_FIT_SLUGS = [slugify(name) for name in PRODUCT_FITS]
+PRODUCT_COLOR_SLUGS = [slugify(name) for name in PRODUCT_COLORS]
+CATEGORY_SLUGS = [slugify(name) for name in CATEGORY_NAMES]
+
+TABLE_ORDER = (User, Category, Product, Review, Cart, CartItem)
+
+# Даты отзывов и корзин отсчитываются от фиксированного момента, а не от текущего
+REFERENCE_TIME = datetime(2025, 1, 1)
+
+
+def rng_for(seed: int, table: str) -> random.Random:
+    """Отдельный детерминированный генератор для каждой таблицы"""
+    return random.Random(f"{seed}:{table}")
+
+
+# Генерация строк
+
+def user_rows(rng: random.Random, count: int, admin_share: float, supplier_share: float, password_hash: str):
+    for user_id in range(1, count + 1):
+        roll = rng.random()
+        is_admin = roll < admin_share
+        is_supplier = not is_admin and roll < admin_share + supplier_share
+        yield {
+            "id": user_id,
+            "first_name": rng.choice(FIRST_NAMES),
+            "last_name": rng.choice(LAST_NAMES),
+            "username": f"user{user_id}",
+            "email": f"user{user_id}@example.com",
+            "phone": f"+7900{user_id:07d}",
+            "hashed_password": password_hash,
+            "is_active": True,
+            "is_admin": is_admin,
+            "is_supplier": is_supplier,
+            "is_customer": not is_admin and not is_supplier,
+        }
+
+
+def category_rows(depth: int, breadth: int) -> list[dict]:
+    """Полное дерево: корень и breadth потомков у каждой категории на depth уровней"""
+    rows = [{
+        "id": 1, "name": "Каталог", "slug": "catalog", "is_active": True,
+        "parent_id": None, "path": "1",
+    }]
+    level = rows
+    for _ in range(depth):
+        next_level = []
+        for parent in level:
+            for _ in range(breadth):
+                category_id = len(rows) + len(next_level) + 1
+                index = category_id % len(CATEGORY_NAMES)
+                next_level.append({
+                    "id": category_id,
+                    "name": f"{CATEGORY_NAMES[index]} {category_id}",
+                    "slug": f"{CATEGORY_SLUGS[index]}-{category_id}",
+                    "is_active": True,
+                    "parent_id": parent["id"],
+                    "path": f"{parent['path']}.{category_id}",
+                })
+        rows.extend(next_level)
+        level = next_level
+    return rows
+
+
+def product_rows(
+    rng: random.Random,
+    count: int,
+    category_ids: list[int],
+    supplier_ids: list[int],
+    ratings: array | None = None,
+):
+    for product_id in range(1, count + 1):
+        kind = rng.randrange(len(PRODUCT_TYPES))
+        fit = rng.randrange(len(PRODUCT_FITS))
+        color = rng.randrange(len(PRODUCT_COLORS))
+        yield {
+            "id": product_id,
+            "name": f"{PRODUCT_TYPES[kind]} {PRODUCT_FITS[fit]}, {PRODUCT_COLORS[color]}",
+            "slug": (
+                f"{PRODUCT_TYPE_SLUGS[kind]}-{PRODUCT_FIT_SLUGS[fit]}-"
+                f"{PRODUCT_COLOR_SLUGS[color]}-{product_id}"
+            ),
+            "description": f"{PRODUCT_TYPES[kind]} из коллекции {2020 + product_id % 6} года",
+            "price": rng.randrange(990, 49990, 100),
+            "image_url": f"https://cdn.example.com/products/{product_id}.jpg",
+            "stock": rng.randrange(0, 200),
+            "supplier_id": rng.choice(supplier_ids) if supplier_ids else None,
+            "category_id": rng.choice(category_ids),
+            "rating": ratings[product_id - 1] if ratings is not None else 0.0,
+            "is_active": rng.random() > 0.02,
+        }
+
+
+class ZipfSampler:
+    """Выбор товаров с вероятностью 1 / rank^s; ранги товарам назначаются случайно"""
+
+    def __init__(self, rng: random.Random, count: int, exponent: float):
+        self.product_ids = list(range(1, count + 1))
+        rng.shuffle(self.product_ids)
+        self.cum_weights = list(accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+    def sample(self, rng: random.Random, k: int) -> list[int]:
+        return rng.choices(self.product_ids, cum_weights=self.cum_weights, k=k)
+
+
+def review_rows(seed: int, count: int, products: int, customer_ids: list[int], exponent: float, chunk_size: int):
+    """Отзывы; при одинаковых аргументах генерирует ту же последовательность"""
+    rng = rng_for(seed, "reviews")
+    sampler = ZipfSampler(rng, products, exponent)
+    start = REFERENCE_TIME.date() - timedelta(days=730)
+    review_id = 0
+    while review_id < count:
+        for product_id in sampler.sample(rng, min(chunk_size, count - review_id)):
+            review_id += 1
+            yield {
+                "id": review_id,
+                "user_id": rng.choice(customer_ids),
+                "product_id": product_id,
+                "comment": rng.choice(COMMENTS),
+                "comment_date": start + timedelta(days=rng.randrange(730)),
+                # Оценки смещены к высоким, как в реальных магазинах
+                "grade": rng.choices((1, 2, 3, 4, 5), weights=(5, 5, 10, 30, 50))[0],
+                "is_active": True,
+            }
+
+
+def product_ratings(reviews, products: int) -> array:
+    """Средняя оценка каждого товара по его отзывам (0 - отзывов нет)"""
+    sums = array("l", [0]) * products
+    counts = array("l", [0]) * products
+    for review in reviews:
+        sums[review["product_id"] - 1] += review["grade"]
+        counts[review["product_id"] - 1] += 1
+    return array("d", (round(s / c, 2) if c else 0.0 for s, c in zip(sums, counts)))
+
+
+def cart_rows(rng: random.Random, customer_ids: list[int], share: float, sampler: ZipfSampler):
+    """Корзины части покупателей и их товары: пары (корзина, список позиций)"""
+    cart_id = item_id = 0
+    for user_id in customer_ids:
+        if rng.random() >= share:
+            continue
+        cart_id += 1
+        created_at = REFERENCE_TIME - timedelta(minutes=rng.randrange(60 * 24 * 30))
+        items = []
+        for product_id in set(sampler.sample(rng, rng.randint(1, 5))):
+            item_id += 1
+            items.append({
+                "id": item_id, "cart_id": cart_id, "product_id": product_id,
+                "quantity": rng.randint(1, 3),
+            })
+        yield {"id": cart_id, "user_id": user_id, "created_at": created_at, "updated_at": created_at}, items
+
+
+# Загрузка
+
+def chunks(rows, size: int):
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+async def load(conn: AsyncConnection, model, rows, chunk_size: int) -> int:
+    """
+    Загрузить строки в таблицу модели: COPY для PostgreSQL, пакетный INSERT для прочих.
+
+    Returns:
+        int: Количество загруженных строк
+    """
+    table = model.__table__
+    columns = [column.name for column in table.columns]
+    start = time.perf_counter()
+    total = 0
+
+    driver = None
+    if conn.dialect.name == "postgresql":
+        raw = await conn.get_raw_connection()
+        driver = raw.driver_connection
+
+    for chunk in chunks(rows, chunk_size):
+        if driver is not None:
+            await driver.copy_records_to_table(
+                table.name,
+                records=[tuple(row.get(name) for name in columns) for row in chunk],
+                columns=columns,
+            )
+        else:
+            await conn.execute(insert(table), chunk)
+        total += len(chunk)
+
+    elapsed = time.perf_counter() - start
+    print(f"{table.name:<12}{total:>12,} rows{total / max(elapsed, 1e-9):>14,.0f} rows/s", file=sys.stderr)
+    return total
+
+
+async def truncate(conn: AsyncConnection) -> None:
+    if conn.dialect.name == "postgresql":
+        names = ", ".join(model.__tablename__ for model in TABLE_ORDER)
+        await conn.execute(text(f"TRUNCATE {names} RESTART IDENTITY CASCADE"))
+    else:
+        for model in reversed(TABLE_ORDER):
+            await conn.execute(model.__table__.delete())
+
+
+async def reset_sequences(conn: AsyncConnection) -> None:
+    """Сдвинуть последовательности id за явно вставленные значения (PostgreSQL)"""
+    if conn.dialect.name != "postgresql":
+        return
+    for model in TABLE_ORDER:
+        name = model.__tablename__
+        max_id = await conn.scalar(select(func.max(model.id)))
+        if max_id:
+            await conn.execute(
+                text(f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), :max_id)"),
+                {"max_id": max_id},
+            )
+
+
+def password_hash(password: str, seed: int) -> str:
+    """bcrypt-хеш с солью из seed, чтобы данные были воспроизводимы целиком"""
+    from passlib.hash import bcrypt
+
+    rng = rng_for(seed, "password")
+    alphabet = "./ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+    salt = "".join(rng.choice(alphabet) for _ in range(21)) + rng.choice(".Oeu")
+    return bcrypt.using(salt=salt).hash(password)
+
+
+async def generate(args) -> None:
+    engine = create_async_engine(args.database_url)
+
+    users = list(user_rows(
+        rng_for(args.seed, "users"), args.users, args.admin_share, args.supplier_share,
+        password_hash(args.password, args.seed),
+    ))
+    supplier_ids = [user["id"] for user in users if user["is_supplier"]]
+    customer_ids = [user["id"] for user in users if user["is_customer"]]
+    categories = category_rows(args.category_depth, args.category_breadth)
+    parent_ids = {category["parent_id"] for category in categories}
+    leaf_ids = [category["id"] for category in categories if category["id"] not in parent_ids]
+
+    reviews = args.reviews if customer_ids else 0
+    review_args = (args.seed, reviews, args.products, customer_ids, args.zipf, args.chunk_size)
+    ratings = product_ratings(review_rows(*review_args), args.products) if reviews else None
+
+    async with engine.begin() as conn:
+        if args.create_tables:
+            await conn.run_sync(Base.metadata.create_all)
+        if args.truncate:
+            await truncate(conn)
+
+        await load(conn, User, users, args.chunk_size)
+        await load(conn, Category, categories, args.chunk_size)
+        await load(
+            conn, Product,
+            product_rows(rng_for(args.seed, "products"), args.products, leaf_ids, supplier_ids, ratings),
+            args.chunk_size,
+        )
+        if reviews:
+            await load(conn, Review, review_rows(*review_args), args.chunk_size)
+
+        cart_rng = rng_for(args.seed, "carts")
+        carts = list(cart_rows(
+            cart_rng, customer_ids, args.cart_share, ZipfSampler(cart_rng, args.products, args.zipf)
+        ))
+        await load(conn, Cart, (cart for cart, _ in carts), args.chunk_size)
+        await load(conn, CartItem, (item for _, items in carts for item in items), args.chunk_size)
+
+        await reset_sequences(conn)
+        # COPY и TRUNCATE минуют события сессии: без этого ETag, выданные до
+        # перезагрузки, совпали бы с новыми данными
+        await conn.run_sync(bump_versions, VERSIONED_TABLES)
+
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", default=URL_DATABASE)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--admin-share", type=float, default=0.001)
+    parser.add_argument("--supplier-share", type=float, default=0.02)
+    parser.add_argument("--category-depth", type=int, default=3)
+    parser.add_argument("--category-breadth", type=int, default=6)
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--reviews", type=int, default=500000)
+    parser.add_argument("--zipf", type=float, default=1.1, help="Показатель распределения Ципфа")
+    parser.add_argument("--cart-share", type=float, default=0.2, help="Доля покупателей с корзиной")
+    parser.add_argument("--password", default="password", help="Пароль всех пользователей")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--truncate", action="store_true", help="Очистить таблицы перед загрузкой")
+    parser.add_argument("--create-tables", action="store_true", help="Создать таблицы (без Alembic)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    asyncio.run(generate(args))
+    print(f"Done in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
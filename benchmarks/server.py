@@ -0,0 +1,136 @@
+"""
+Пропускная способность сервера: запуск по умолчанию против app.server.
+
+Для каждой конфигурации запускается сервер и нагружается в закрытой
+модели: --connections постоянных соединений (поровну на --clients
+процессов-клиентов), следующий запрос уходит сразу после ответа, пути
+--paths перебираются по кругу. После прогрева (--warmup) --duration
+секунд измеряются запросы в секунду, p50/p99 задержки и доля ошибок.
+
+Конфигурации:
+    default - `uvicorn app.main:app` в один процесс с настройками uvicorn
+    tuned   - `python -m app.server` с настройками из окружения
+
+Клиенты работают на той же машине и делят ядра с сервером, поэтому
+цифры имеют смысл только в сравнении конфигураций между собой.
+
+Запуск:
+    python -m benchmarks.server --duration 20 --connections 64 --output server.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import httpx
+
+from benchmarks.startup import serve
+from tests.loadgen import percentile
+
+
+def commands(port: int) -> dict[str, list[str]]:
+    return {
+        "default": [
+            sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", "1",
+        ],
+        "tuned": [sys.executable, "-m", "app.server", "--bind", f"127.0.0.1:{port}"],
+    }
+
+
+async def _client(base_url: str, paths: list[str], connections: int, duration: float):
+    latencies: list[float] = []
+    errors = 0
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    deadline = time.perf_counter() + duration
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=10) as client:
+        async def connection(index: int) -> None:
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(paths[index % len(paths)])
+                    errors += response.status_code >= 400
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+                index += 1
+
+        await asyncio.gather(*(connection(index) for index in range(connections)))
+    return latencies, errors
+
+
+def run_client(base_url: str, paths: list[str], connections: int, duration: float):
+    """Один процесс-клиент: задержки всех запросов и число ошибок"""
+    return asyncio.run(_client(base_url, paths, connections, duration))
+
+
+def run_load(base_url: str, paths: list[str], args) -> dict:
+    per_client = max(args.connections // args.clients, 1)
+    with ProcessPoolExecutor(args.clients) as pool:
+        def run_clients(duration: float) -> list:
+            futures = [
+                pool.submit(run_client, base_url, paths, per_client, duration)
+                for _ in range(args.clients)
+            ]
+            return [future.result() for future in futures]
+
+        if args.warmup:
+            run_clients(args.warmup)
+        results = run_clients(args.duration)
+
+    latencies = sorted(latency for client_latencies, _ in results for latency in client_latencies)
+    errors = sum(client_errors for _, client_errors in results)
+    return {
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / args.duration, 1),
+        "error_rate": round(errors / len(latencies), 4) if latencies else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--only", nargs="*", choices=("default", "tuned"))
+    parser.add_argument("--paths", default="/,/categories/all,/products/all")
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--clients", type=int, default=max((os.cpu_count() or 2) // 2, 1))
+    parser.add_argument("--duration", type=float, default=20, help="Секунд")
+    parser.add_argument("--warmup", type=float, default=3, help="Секунд")
+    parser.add_argument("--port", type=int, default=int(os.getenv("BENCH_PORT", 8765)))
+    parser.add_argument("--timeout", type=float, default=60, help="Ожидание сервера, с")
+    parser.add_argument("--output", help="Файл для JSON-результата")
+    args = parser.parse_args()
+
+    paths = args.paths.split(",")
+    base_url = f"http://127.0.0.1:{args.port}"
+    results = {}
+    for name, command in commands(args.port).items():
+        if args.only and name not in args.only:
+            continue
+        with serve(command, f"{base_url}/health/live", args.timeout):
+            results[name] = run_load(base_url, paths, args)
+        print(
+            f"{name:<10}{results[name]['throughput_rps']:>12,.1f} rps"
+            f"{results[name]['latency_ms']['p50']:>10,.2f} ms p50"
+            f"{results[name]['latency_ms']['p99']:>10,.2f} ms p99"
+            f"{results[name]['error_rate']:>10.2%} errors",
+            file=sys.stderr,
+        )
+
+    result = {"paths": paths, "connections": args.connections, "configurations": results}
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Время старта приложения: импорт app.main и первый ответ сервера.
+
+Импорт измеряется через `python -X importtime -c "import app.main"` в
+отдельных процессах (первый запуск - прогрев .pyc, в зачёт идёт медиана
+остальных). Выводятся самые тяжёлые пакеты по накопленному времени.
+Код выхода 1, если медиана больше --budget-ms: так в CI видно, что
+новая зависимость или импорт на верхнем уровне модуля удлинили старт.
+Сейчас импорт занимает 750-1000 мс (в основном fastapi и sqlalchemy);
+бюджет 1200 мс оставляет запас на шум измерений.
+
+Время до первого ответа - от запуска `uvicorn app.main:app` до первого
+успешного ответа /health/live (включает импорт и прогрев из lifespan).
+
+Запуск:
+    python -m benchmarks.startup --budget-ms 1200
+    python -m benchmarks.startup --first-response --port 8765
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import httpx
+
+
+ROOT = Path(__file__).resolve().parents[1]
+TARGET = "app.main"
+
+
+def parse_importtime(stderr: str) -> dict[str, tuple[int, int]]:
+    """Модуль -> (собственное время, накопленное время) в микросекундах"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def measure_import() -> dict[str, tuple[int, int]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {TARGET}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {TARGET} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def heaviest_packages(modules: dict[str, tuple[int, int]], limit: int) -> list[tuple[str, int]]:
+    """Пакеты верхнего уровня и модули приложения по накопленному времени"""
+    packages = [
+        (name, cumulative) for name, (_, cumulative) in modules.items()
+        if ("." not in name or name.startswith("app.")) and name not in ("app", TARGET)
+    ]
+    return sorted(packages, key=lambda item: item[1], reverse=True)[:limit]
+
+
+@contextmanager
+def serve(command: list[str], url: str, timeout: float):
+    """
+    Запустить сервер и дождаться ответа 200 от url.
+
+    Отдаёт время от запуска процесса до первого ответа в секундах; при
+    выходе из блока сервер останавливается.
+    """
+    start = time.perf_counter()
+    server = subprocess.Popen(command, cwd=ROOT)
+    try:
+        with httpx.Client(timeout=1) as client:
+            while True:
+                if server.poll() is not None:
+                    raise RuntimeError(f"Server exited with code {server.returncode}")
+                if time.perf_counter() - start > timeout:
+                    raise RuntimeError(f"No response from {url} in {timeout} s")
+                try:
+                    if client.get(url).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.01)
+        yield time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def measure_first_response(port: int, timeout: float) -> float:
+    """Секунды от запуска uvicorn до первого ответа 200 на /health/live"""
+    command = [
+        sys.executable, "-m", "uvicorn", f"{TARGET}:app",
+        "--port", str(port), "--log-level", "warning",
+    ]
+    with serve(command, f"http://127.0.0.1:{port}/health/live", timeout) as elapsed:
+        return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Замеров импорта")
+    parser.add_argument("--budget-ms", type=float, help="Допустимое время импорта, мс")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--first-response", action="store_true", help="Измерить и первый ответ")
+    parser.add_argument("--port", type=int, default=int(os.getenv("BENCH_PORT", 8765)))
+    parser.add_argument("--timeout", type=float, default=30, help="Ожидание сервера, с")
+    args = parser.parse_args()
+
+    measure_import()  # прогрев: компиляция .pyc
+    runs = [measure_import() for _ in range(args.repeat)]
+    import_ms = statistics.median(run[TARGET][1] for run in runs) / 1000
+
+    print(f"{'package':<40}{'cumulative, ms':>16}")
+    for name, cumulative in heaviest_packages(runs[-1], args.top):
+        print(f"{name:<40}{cumulative / 1000:>16,.1f}")
+    print(f"\nimport {TARGET}: {import_ms:,.1f} ms (median of {args.repeat})")
+
+    if args.first_response:
+        first_response = measure_first_response(args.port, args.timeout)
+        print(f"time to first response: {first_response * 1000:,.1f} ms")
+
+    if args.budget_ms is not None and import_ms > args.budget_ms:
+        print(f"Import time exceeds budget of {args.budget_ms:,.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
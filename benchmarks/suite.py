@@ -0,0 +1,432 @@
+"""
+Набор микро-бенчмарков горячих функций с контролем регрессий.
+
+Бенчмарки выполняются на приложении в том же процессе (httpx через ASGI):
+вместо PostgreSQL - SQLite во временном файле (или BENCH_DATABASE_URL),
+вместо Redis - словарь в памяти. Для каждого бенчмарка выводится медиана
+и минимум времени одной операции в микросекундах.
+
+Абсолютное время на общей виртуальной машине плавает между запусками на
+десятки процентов: скорость ядра меняется за секунды. Поэтому перед каждым
+повтором замеряется эталонная операция (чистый Python), и регрессии
+ищутся по медиане отношения времени бенчмарка к ней (relative).
+
+Команды:
+    run       - выполнить бенчмарки и сохранить результат в JSON
+    baseline  - выполнить и сохранить результат как базовый (BASELINE_PATH)
+    compare   - сравнить результат с базовым; код выхода 1, если relative
+                какого-либо бенчмарка вырос больше чем на --tolerance
+
+Запуск:
+    python -m benchmarks.suite baseline
+    python -m benchmarks.suite run --output bench.json
+    python -m benchmarks.suite compare bench.json --tolerance 0.3
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import httpx
+from slugify import slugify
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import queries
+from app.backend.db import Base
+from app.backend.responses import ModelJSONResponse, row_dicts
+from app.backend.tracing import instrument_engine
+from app.models import Category, Product, Review, User
+from app.schemas import Envelope, ProductOut
+from benchmarks.datagen import category_rows, product_rows, rng_for
+
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+BENCHMARKS: dict[str, tuple] = {}
+
+# Повторов эталонной операции перед каждым повтором бенчмарка (~5 мс)
+REFERENCE_NUMBER = 20
+
+# Разброс relative между запусками на общей виртуальной машине - до 20%
+DEFAULT_TOLERANCE = 0.3
+
+
+def benchmark(name: str, number: int, repeat: int = 10):
+    """
+    Регистрирует бенчмарк.
+
+    Декорируемая корутина получает окружение (BenchEnv), готовит данные и
+    возвращает измеряемую операцию - обычную функцию или корутинную.
+    """
+    def decorator(setup):
+        BENCHMARKS[name] = (setup, number, repeat)
+        return setup
+    return decorator
+
+
+def run_coroutine(coro):
+    """Выполнить корутину без await внутри (например, get_current_user) без event loop"""
+    try:
+        coro.send(None)
+    except StopIteration as ex:
+        return ex.value
+    coro.close()
+    raise RuntimeError("Coroutine is not synchronous")
+
+
+class FakeRedis:
+    """Словарь с интерфейсом redis-клиента, который использует приложение"""
+
+    def __init__(self) -> None:
+        self.data = {}
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+        return True
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def exists(self, *keys):
+        return sum(key in self.data for key in keys)
+
+    def ping(self):
+        return True
+
+
+class BenchEnv:
+    """Приложение в процессе, подменённые БД и Redis, клиент httpx"""
+
+    def __init__(self, database_url: str):
+        self.engine = create_async_engine(database_url)
+        # Span'ы запросов к БД, как у движка приложения (см. products_all.traced_1k)
+        instrument_engine(self.engine.sync_engine)
+        self.maker = async_sessionmaker(self.engine, expire_on_commit=False, class_=AsyncSession)
+        self.user = {
+            "username": "bench", "id": 1, "is_admin": False,
+            "is_supplier": False, "is_customer": True,
+        }
+        self.client: httpx.AsyncClient | None = None
+
+    async def __aenter__(self):
+        import app.backend.cache.redis_client as redis_module
+        import app.backend.db_depends as db_depends
+        import app.routers.auth as auth
+        from app.main import app
+
+        auth.SECRET_KEY = auth.SECRET_KEY or "benchmark-secret"
+        auth.ALGORITHM = auth.ALGORITHM or "HS256"
+        db_depends.async_session_maker = self.maker
+        fake_redis = FakeRedis()
+        redis_module.get_redis_client = lambda: fake_redis
+        app.dependency_overrides[auth.get_current_user] = lambda: self.user
+
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+
+        self.client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://localhost"
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+        await self.engine.dispose()
+
+    async def reset(self) -> None:
+        async with self.engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                await conn.execute(table.delete())
+
+    async def insert(self, model, rows: list[dict]) -> None:
+        async with self.maker() as session:
+            await session.execute(insert(model), rows)
+            await session.commit()
+
+
+def products(count: int, category_ids: list[int]) -> list[dict]:
+    """Активные товары из генератора benchmarks.datagen"""
+    rows = product_rows(rng_for(0, "products"), count, category_ids, [])
+    return [{**row, "is_active": True} for row in rows]
+
+
+# Бенчмарки
+
+@benchmark("auth.get_current_user", number=1000)
+async def bench_get_current_user(env: BenchEnv):
+    from app.routers.auth import create_access_token, get_current_user
+
+    token = run_coroutine(
+        create_access_token("bench", 1, False, False, True, timedelta(minutes=20))
+    )
+    return lambda: run_coroutine(get_current_user(token))
+
+
+@benchmark("auth.create_access_token", number=1000)
+async def bench_create_access_token(env: BenchEnv):
+    from app.routers.auth import create_access_token
+
+    expires = timedelta(minutes=20)
+    return lambda: run_coroutine(create_access_token("bench", 1, False, False, True, expires))
+
+
+@benchmark("slugify.product_name", number=1000)
+async def bench_slugify(env: BenchEnv):
+    return lambda: slugify("Рубашка оксфорд slim fit, голубая (хлопок 100%)")
+
+
+def _tree_benchmark(depth: int, breadth: int):
+    async def setup(env: BenchEnv):
+        categories = category_rows(depth, breadth)
+        await env.insert(Category, categories)
+        await env.insert(Product, products(len(categories) * 5, [c["id"] for c in categories]))
+
+        async def op():
+            response = await env.client.get("/products/catalog", params={"category_slug": "catalog"})
+            assert response.status_code == 200
+        return op
+    return setup
+
+
+benchmark("products_by_category.tree_31", number=50)(_tree_benchmark(depth=4, breadth=2))
+benchmark("products_by_category.tree_156", number=15)(_tree_benchmark(depth=3, breadth=5))
+
+
+@benchmark("reviews.add_review_rating_1k", number=50)
+async def bench_review_rating(env: BenchEnv):
+    await env.insert(User, [{"id": 1, "username": "bench", "email": "bench@example.com"}])
+    await env.insert(Category, category_rows(0, 0))
+    await env.insert(Product, products(1, [1]))
+    await env.insert(Review, [
+        {
+            "user_id": 1, "product_id": 1, "comment": "Отзыв", "grade": 1 + i % 5,
+            "comment_date": date(2025, 1, 1), "is_active": True,
+        }
+        for i in range(1000)
+    ])
+
+    async def op():
+        response = await env.client.post(
+            "/reviews/", params={"product_id": 1}, json={"comment": "Отзыв", "grade": 4}
+        )
+        assert response.status_code == 200
+    return op
+
+
+def _serialize_benchmark(count: int):
+    async def setup(env: BenchEnv):
+        await env.insert(Category, category_rows(0, 0))
+        await env.insert(Product, products(count, [1]))
+        async with env.maker() as session:
+            rows = row_dicts(await session.execute(queries.ACTIVE_PRODUCT_ROWS))
+        content = {"status_code": 200, "response": rows}
+        return lambda: ModelJSONResponse(content, Envelope[list[ProductOut]])
+    return setup
+
+
+benchmark("serialize.products_1k", number=25)(_serialize_benchmark(1000))
+benchmark("serialize.products_10k", number=3)(_serialize_benchmark(10000))
+
+
+def _listing_benchmark(count: int, not_modified: bool, encoding: str = "identity"):
+    async def setup(env: BenchEnv):
+        await env.insert(Category, category_rows(0, 0))
+        await env.insert(Product, products(count, [1]))
+        headers = {"Accept-Encoding": encoding}
+        if not_modified:
+            etag = (await env.client.get("/products/all")).headers["ETag"]
+            headers["If-None-Match"] = etag
+        expected = 304 if not_modified else 200
+
+        async def op():
+            response = await env.client.get("/products/all", headers=headers)
+            assert response.status_code == expected
+        return op
+    return setup
+
+
+benchmark("products_all.full_10k", number=3)(_listing_benchmark(10000, not_modified=False))
+benchmark("products_all.not_modified_10k", number=100)(_listing_benchmark(10000, not_modified=True))
+# Сжатое тело берётся из кэша по ETag: сверх full_10k - только передача меньшего тела
+benchmark("products_all.gzip_10k", number=3)(
+    _listing_benchmark(10000, not_modified=False, encoding="gzip")
+)
+
+
+def _tracing_benchmark(count: int, sampled: bool):
+    async def setup(env: BenchEnv):
+        await env.insert(Category, category_rows(0, 0))
+        await env.insert(Product, products(count, [1]))
+        # Решение о выборке берётся из входящего traceparent (флаг 01 / 00)
+        flags = "01" if sampled else "00"
+        headers = {"traceparent": f"00-{'a' * 32}-{'b' * 16}-{flags}"}
+
+        async def op():
+            response = await env.client.get("/products/all", headers=headers)
+            assert response.status_code == 200
+        return op
+    return setup
+
+
+# Накладные расходы трассировки: разница медиан traced и untraced (цель - меньше 2%)
+benchmark("products_all.untraced_1k", number=15)(_tracing_benchmark(1000, sampled=False))
+benchmark("products_all.traced_1k", number=15)(_tracing_benchmark(1000, sampled=True))
+
+
+def reference_op() -> list[str]:
+    """Эталонная операция: чистый Python без ввода-вывода"""
+    return sorted(str(index * 7919 % 1000) for index in range(1000))
+
+
+def reference_us(number: int = REFERENCE_NUMBER) -> float:
+    """Время эталонной операции (мкс) - текущая скорость машины"""
+    start = time.perf_counter()
+    for _ in range(number):
+        reference_op()
+    return (time.perf_counter() - start) / number * 1e6
+
+
+async def measure(op, number: int, repeat: int) -> tuple[list[float], list[float]]:
+    """
+    Время одной операции (мкс) и его отношение к эталонной операции для
+    каждого из repeat повторов по number вызовов.
+
+    Эталон замеряется непосредственно перед каждым повтором: скорость
+    виртуальной машины меняется на десятки процентов за секунды, и
+    отношение к эталону от этого почти не зависит.
+    """
+    is_async = asyncio.iscoroutinefunction(op)
+    for _ in range(max(number // 10, 1)):  # прогрев
+        await op() if is_async else op()
+
+    # Как в timeit: сборка мусора не попадает в замер случайным повтором
+    timings, relative = [], []
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            reference = reference_us()
+            start = time.perf_counter()
+            if is_async:
+                for _ in range(number):
+                    await op()
+            else:
+                for _ in range(number):
+                    op()
+            timing = (time.perf_counter() - start) / number * 1e6
+        finally:
+            gc.enable()
+        timings.append(timing)
+        relative.append(timing / reference)
+    return timings, relative
+
+
+async def run_suite(names: list[str], database_url: str) -> dict:
+    results = {}
+    async with BenchEnv(database_url) as env:
+        for name in names:
+            setup, number, repeat = BENCHMARKS[name]
+            await env.reset()
+            op = await setup(env)
+            timings, relative = await measure(op, number, repeat)
+            results[name] = {
+                "median_us": round(statistics.median(timings), 2),
+                "min_us": round(min(timings), 2),
+                "relative": round(statistics.median(relative), 4),
+                "number": number,
+                "repeat": repeat,
+            }
+            print(f"{name:<36}{results[name]['median_us']:>14,.1f} us", file=sys.stderr)
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "benchmarks": results,
+    }
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list[str]:
+    """
+    Регрессии: бенчмарки, время которых относительно эталонной операции
+    (медиана по повторам) выросло больше чем на tolerance, и бенчмарки из
+    базового результата, которых нет в текущем (переименован или сломан -
+    проверка не должна молча пропускать его).
+    """
+    regressions = []
+    print(f"{'benchmark':<36}{'baseline, us':>14}{'current, us':>14}{'change':>10}")
+    for name, base in sorted(baseline["benchmarks"].items()):
+        result = current["benchmarks"].get(name)
+        if result is None:
+            regressions.append(name)
+            print(f"{name:<36}{base['median_us']:>14,.1f}{'-':>14}{'':>10}  MISSING")
+            continue
+        change = result["relative"] / base["relative"] - 1
+        mark = ""
+        if change > tolerance:
+            regressions.append(name)
+            mark = "  REGRESSION"
+        print(
+            f"{name:<36}{base['median_us']:>14,.1f}{result['median_us']:>14,.1f}"
+            f"{change:>+10.1%}{mark}"
+        )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for command in ("run", "baseline"):
+        sub = commands.add_parser(command)
+        sub.add_argument("--only", nargs="*", choices=sorted(BENCHMARKS), help="Бенчмарки")
+        sub.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL"))
+        if command == "run":
+            sub.add_argument("--output", type=Path, help="Файл для JSON-результата")
+
+    sub = commands.add_parser("compare")
+    sub.add_argument("current", type=Path, help="JSON-результат команды run")
+    sub.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    sub.add_argument(
+        "--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Допустимый рост, доля"
+    )
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        if not args.baseline.is_file():
+            sys.exit(
+                f"Baseline {args.baseline} not found: create it with "
+                f"`python -m benchmarks.suite baseline` on the reference machine"
+            )
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        current = json.loads(args.current.read_text(encoding="utf-8"))
+        regressions = compare(baseline, current, args.tolerance)
+        if regressions:
+            print(f"Regressions beyond {args.tolerance:.0%} or missing: {', '.join(regressions)}")
+            sys.exit(1)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite+aiosqlite:///{tmp}/bench.db"
+        result = asyncio.run(run_suite(args.only or list(BENCHMARKS), database_url))
+
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    output = BASELINE_PATH if args.command == "baseline" else args.output
+    if output:
+        output.write_text(text, encoding="utf-8")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
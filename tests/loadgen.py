@@ -0,0 +1,338 @@
+"""
+Нагрузочное тестирование API по сценариям.
+
+Сценарии (browse, login, review, admin) запускаются в открытой модели
+нагрузки: новые сценарии стартуют с заданной частотой (пуассоновский
+поток, --rate в секунду) независимо от того, успели ли завершиться
+предыдущие. Так рост задержек сервера не снижает нагрузку, как это
+происходит у последовательных клиентов.
+
+Цель - запущенный сервер (--url) или приложение в том же процессе через
+ASGI (--in-process, без сети; lifespan выполняется). Для сценариев с
+авторизацией нужны существующие пользователи: покупатель (--user) и
+администратор (--admin) в виде username:password.
+
+Результат - JSON с пропускной способностью, перцентилями задержки
+(p50/p95/p99/p99.9) и долей ошибок по каждому маршруту; его удобно
+сохранять (--output) и сравнивать между коммитами.
+
+Запуск:
+    python -m tests.loadgen --url http://localhost:8000 --rate 50 --duration 60 \\
+        --mix browse=80,login=10,review=8,admin=2 \\
+        --user customer:secret --admin admin:secret --output load.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import time
+from collections import defaultdict
+from contextlib import AsyncExitStack
+from uuid import uuid4
+
+import httpx
+
+
+PERCENTILES = (50, 95, 99, 99.9)
+
+
+class RouteStats:
+    """Задержки и статусы ответов одного маршрута"""
+
+    __slots__ = ("latencies", "statuses", "errors")
+
+    def __init__(self) -> None:
+        self.latencies: list[float] = []
+        self.statuses: dict[str, int] = defaultdict(int)
+        self.errors = 0
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Перцентиль методом ближайшего ранга"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(p / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class LoadSession:
+    """Клиент одного сценария: общий пул соединений и общая статистика"""
+
+    def __init__(self, client: httpx.AsyncClient, stats: dict, data: dict):
+        self.client = client
+        self.stats = stats
+        self.data = data
+        self.token: str | None = None
+
+    async def request(
+        self, method: str, route: str, url: str, expected: tuple = (), **kwargs
+    ) -> httpx.Response | None:
+        """
+        Выполнить запрос и учесть его в статистике маршрута route.
+
+        Ошибкой считаются сетевые исключения и ответы с кодом 4xx/5xx,
+        кроме перечисленных в expected.
+        """
+        if self.token:
+            kwargs.setdefault("headers", {})["Authorization"] = f"Bearer {self.token}"
+        stats = self.stats[f"{method} {route}"]
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError as ex:
+            stats.latencies.append(time.perf_counter() - start)
+            stats.statuses[type(ex).__name__] += 1
+            stats.errors += 1
+            return None
+        stats.latencies.append(time.perf_counter() - start)
+        stats.statuses[str(response.status_code)] += 1
+        if response.status_code >= 400 and response.status_code not in expected:
+            stats.errors += 1
+        return response
+
+    async def login(self, credentials: tuple[str, str]) -> bool:
+        username, password = credentials
+        response = await self.request(
+            "POST", "/auth/token", "/auth/token",
+            data={"username": username, "password": password},
+        )
+        if response is None or response.status_code != 200:
+            return False
+        self.token = response.json()["access_token"]
+        return True
+
+
+# Сценарии
+
+async def browse(session: LoadSession) -> None:
+    """Просмотр каталога: категории, товары, карточка товара и его отзывы"""
+    await session.request("GET", "/categories/all", "/categories/all")
+    await session.request("GET", "/products/all", "/products/all")
+    if session.data["categories"]:
+        slug = random.choice(session.data["categories"])
+        await session.request(
+            "GET", "/products/{product_slug}", f"/products/{slug}",
+            params={"category_slug": slug},
+        )
+    if session.data["products"]:
+        index = random.randrange(len(session.data["products"]))
+        slug = session.data["products"][index]
+        await session.request("GET", "/products/detail/{product_slug}", f"/products/detail/{slug}")
+        await session.request(
+            "GET", "/reviews/{product_slug}", f"/reviews/{slug}",
+            expected=(404,),  # у товара может не быть отзывов
+            params={"product_id": session.data["product_ids"][index]},
+        )
+
+
+async def login(session: LoadSession) -> None:
+    """Вход покупателя и запрос своего профиля"""
+    if session.data["user"] and await session.login(session.data["user"]):
+        await session.request("GET", "/auth/read_current_user", "/auth/read_current_user")
+
+
+async def review(session: LoadSession) -> None:
+    """Покупатель открывает товар и оставляет отзыв"""
+    if not session.data["user"] or not session.data["product_ids"]:
+        return
+    if not await session.login(session.data["user"]):
+        return
+    product_id = random.choice(session.data["product_ids"])
+    await session.request(
+        "POST", "/reviews/", "/reviews/",
+        params={"product_id": product_id},
+        json={"comment": "Нагрузочный отзыв", "grade": random.randint(1, 5)},
+    )
+
+
+async def admin(session: LoadSession) -> None:
+    """Администратор создаёт и удаляет категорию"""
+    if not session.data["admin"] or not await session.login(session.data["admin"]):
+        return
+    name = f"load {uuid4().hex[:12]}"
+    response = await session.request("POST", "/categories/", "/categories/", json={"name": name})
+    if response is not None and response.status_code == 200:
+        slug = name.replace(" ", "-")
+        await session.request("DELETE", "/categories/{category_slug}", f"/categories/{slug}")
+
+
+SCENARIOS = {"browse": browse, "login": login, "review": review, "admin": admin}
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    """Строка вида browse=80,login=10 в веса сценариев"""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Unknown scenario: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def parse_credentials(value: str | None) -> tuple[str, str] | None:
+    if not value:
+        return None
+    username, _, password = value.partition(":")
+    return username, password
+
+
+async def discover(client: httpx.AsyncClient) -> dict:
+    """Slug'и и id существующих товаров и категорий для сценариев"""
+    response = await client.get("/products/all")
+    products = response.json()["response"] if response.status_code == 200 else []
+    categories = (await client.get("/categories/all")).json()
+    return {
+        "products": [product["slug"] for product in products],
+        "product_ids": [product["id"] for product in products],
+        "categories": [category["slug"] for category in categories],
+    }
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    mix: dict[str, float],
+    rate: float,
+    duration: float,
+    max_in_flight: int,
+    data: dict,
+) -> dict:
+    """Открытая модель нагрузки: сценарии стартуют пуассоновским потоком"""
+    stats: dict[str, RouteStats] = defaultdict(RouteStats)
+    names, weights = list(mix), list(mix.values())
+    scenario_counts: dict[str, int] = defaultdict(int)
+    tasks: set[asyncio.Task] = set()
+    dropped = 0
+    max_lag = 0.0
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    next_arrival = start
+    while next_arrival - start < duration:
+        delay = next_arrival - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            max_lag = max(max_lag, -delay)
+
+        if len(tasks) >= max_in_flight:
+            dropped += 1
+        else:
+            name = random.choices(names, weights)[0]
+            scenario_counts[name] += 1
+            task = asyncio.create_task(SCENARIOS[name](LoadSession(client, stats, data)))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        next_arrival += random.expovariate(rate)
+
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+    elapsed = loop.time() - start
+    return report(stats, elapsed, scenario_counts, dropped, max_lag)
+
+
+def report(
+    stats: dict[str, RouteStats], elapsed: float, scenario_counts: dict, dropped: int, max_lag: float
+) -> dict:
+    routes = {}
+    total_requests = total_errors = 0
+    for route, route_stats in sorted(stats.items()):
+        latencies = sorted(route_stats.latencies)
+        count = len(latencies)
+        total_requests += count
+        total_errors += route_stats.errors
+        routes[route] = {
+            "count": count,
+            "throughput_rps": round(count / elapsed, 2),
+            "error_rate": round(route_stats.errors / count, 4) if count else 0.0,
+            "statuses": dict(route_stats.statuses),
+            "latency_ms": {
+                **{f"p{p:g}": round(percentile(latencies, p) * 1000, 2) for p in PERCENTILES},
+                "mean": round(sum(latencies) / count * 1000, 2) if count else 0.0,
+                "max": round(latencies[-1] * 1000, 2) if count else 0.0,
+            },
+        }
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "requests": total_requests,
+        "throughput_rps": round(total_requests / elapsed, 2),
+        "error_rate": round(total_errors / total_requests, 4) if total_requests else 0.0,
+        "scenarios": dict(scenario_counts),
+        "dropped_arrivals": dropped,
+        "max_schedule_lag_ms": round(max_lag * 1000, 2),
+        "routes": routes,
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main_async(args) -> dict:
+    async with AsyncExitStack() as stack:
+        if args.in_process:
+            from app.main import app
+
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            transport = httpx.ASGITransport(app=app)
+            base_url = "http://localhost"
+        else:
+            transport = None
+            base_url = args.url
+
+        limits = httpx.Limits(max_connections=args.max_in_flight)
+        client = await stack.enter_async_context(
+            httpx.AsyncClient(
+                base_url=base_url, transport=transport, limits=limits, timeout=args.timeout
+            )
+        )
+        data = await discover(client)
+        data["user"] = parse_credentials(args.user)
+        data["admin"] = parse_credentials(args.admin)
+
+        result = await run_load(
+            client, args.mix, args.rate, args.duration, args.max_in_flight, data
+        )
+
+    return {
+        "commit": git_commit(),
+        "target": "in-process" if args.in_process else args.url,
+        "rate": args.rate,
+        "duration_s": args.duration,
+        "mix": args.mix,
+        **result,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--in-process", action="store_true", help="Через ASGI, без сервера")
+    parser.add_argument("--rate", type=float, default=20, help="Сценариев в секунду")
+    parser.add_argument("--duration", type=float, default=30, help="Секунд")
+    parser.add_argument(
+        "--mix", type=parse_mix, default=parse_mix("browse=80,login=10,review=8,admin=2")
+    )
+    parser.add_argument("--max-in-flight", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=10)
+    parser.add_argument("--user", help="Покупатель username:password")
+    parser.add_argument("--admin", help="Администратор username:password")
+    parser.add_argument("--output", help="Файл для JSON-отчёта")
+    args = parser.parse_args()
+
+    result = asyncio.run(main_async(args))
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Тесты адаптивного лимита (app/backend/admission.py).
+
+Запуск:
+    python -m pytest tests/test_admission.py
+"""
+import asyncio
+
+import pytest
+
+from app.backend.admission import AdaptiveLimiter, Overloaded
+
+
+def make_limiter(limit=1, min_limit=1, max_limit=256, queue_size=8, queue_timeout=1.0):
+    return AdaptiveLimiter(
+        "test", limit=limit, min_limit=min_limit, max_limit=max_limit,
+        queue_size=queue_size, queue_timeout=queue_timeout,
+    )
+
+
+def respond(limiter: AdaptiveLimiter, latency: float, times: int, in_flight: int | None = None):
+    """Завершить times запросов с задержкой latency при in_flight запросах в обработке"""
+    for _ in range(times):
+        limiter.in_flight = int(limiter.limit) if in_flight is None else in_flight
+        limiter.release(latency)
+
+
+# Очередь
+
+def test_release_hands_slot_to_waiter():
+    async def scenario():
+        limiter = make_limiter(limit=1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.stats()["queued"] == 1
+
+        limiter.release(None)
+        await waiter
+        assert limiter.in_flight == 1
+        assert limiter.stats()["queued"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_queue_full_is_rejected():
+    async def scenario():
+        limiter = make_limiter(limit=1, queue_size=1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+
+        with pytest.raises(Overloaded) as info:
+            await limiter.acquire()
+        assert info.value.reason == "queue_full"
+
+        waiter.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_queue_timeout_is_rejected():
+    async def scenario():
+        limiter = make_limiter(limit=1, queue_timeout=0.01)
+        await limiter.acquire()
+
+        with pytest.raises(Overloaded) as info:
+            await limiter.acquire()
+        assert info.value.reason == "queue_timeout"
+        assert limiter.in_flight == 1
+        assert limiter.stats()["queued"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_queue():
+    async def scenario():
+        limiter = make_limiter(limit=1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert limiter.stats()["queued"] == 0
+
+        limiter.release(None)
+        assert limiter.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_waiter_cancelled_after_handoff_returns_slot():
+    async def scenario():
+        limiter = make_limiter(limit=1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+
+        # Место передано, но ожидающий отменён до того, как успел его занять
+        limiter.release(None)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert limiter.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+# Подстройка лимита
+
+def test_limit_decreases_under_slowdown_and_recovers():
+    limiter = make_limiter(limit=200, min_limit=4)
+    respond(limiter, 0.01, 1000)
+    assert int(limiter.limit) == 256
+
+    respond(limiter, 0.08, 500)
+    assert int(limiter.limit) == 4
+
+    respond(limiter, 0.01, 1000)
+    assert int(limiter.limit) == 256
+
+
+def test_limit_does_not_grow_when_underused():
+    limiter = make_limiter(limit=100)
+    respond(limiter, 0.01, 500, in_flight=1)
+    assert int(limiter.limit) == 100
+
+
+def test_limit_decreases_when_underused():
+    limiter = make_limiter(limit=100, min_limit=4)
+    respond(limiter, 0.01, 100, in_flight=1)
+    respond(limiter, 0.1, 100, in_flight=1)
+    assert limiter.limit < 50
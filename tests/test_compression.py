@@ -0,0 +1,147 @@
+"""
+Тесты сжатия ответов (app/backend/compression.py).
+
+Ожидания для brotli зависят от окружения: без пакета brotli ENCODINGS
+содержит только gzip.
+
+Запуск:
+    python -m pytest tests/test_compression.py
+"""
+import asyncio
+import gzip
+import json
+
+from app.backend.compression import (
+    ENCODINGS,
+    CompressedCache,
+    CompressionMiddleware,
+    choose_encoding,
+    not_modified,
+)
+from app.backend.config import COMPRESSION_MIN_SIZE
+
+
+PREFERRED = ENCODINGS[0]
+
+
+def start_message(status: int = 200, etag: str | None = '"abc"') -> dict:
+    headers = [(b"content-type", b"application/json")]
+    if etag is not None:
+        headers.append((b"etag", etag.encode()))
+    return {"type": "http.response.start", "status": status, "headers": headers}
+
+
+def header(message: dict, name: str) -> str | None:
+    for key, value in message["headers"]:
+        if key.decode().lower() == name:
+            return value.decode()
+    return None
+
+
+# Выбор кодировки
+
+def test_choose_encoding():
+    assert choose_encoding("gzip") == "gzip"
+    assert choose_encoding("gzip, deflate, br") == PREFERRED
+    assert choose_encoding("GZIP;q=0.5") == "gzip"
+    assert choose_encoding("br;q=0.1, gzip;q=0.9") == "gzip"
+
+
+def test_choose_encoding_wildcard():
+    assert choose_encoding("*") == PREFERRED
+    assert choose_encoding("br;q=0, *") == "gzip"
+    assert choose_encoding("*;q=0, gzip") == "gzip"
+
+
+def test_choose_encoding_refused():
+    assert choose_encoding("") is None
+    assert choose_encoding("identity") is None
+    assert choose_encoding("gzip;q=0") is None
+    assert choose_encoding("gzip;q=0, br;q=0") is None
+    assert choose_encoding("*;q=0") is None
+    assert choose_encoding("gzip;q=oops") is None
+
+
+# Кэш сжатых тел
+
+def test_cache_evicts_least_recently_used():
+    cache = CompressedCache(max_bytes=10)
+    cache.put(("a", "gzip"), b"1234")
+    cache.put(("b", "gzip"), b"1234")
+    assert cache.get(("a", "gzip")) == b"1234"  # "a" теперь свежее "b"
+
+    cache.put(("c", "gzip"), b"1234")
+    assert cache.get(("b", "gzip")) is None
+    assert cache.get(("a", "gzip")) == b"1234"
+    assert cache.get(("c", "gzip")) == b"1234"
+    assert cache.size == 8
+
+
+def test_cache_replaces_and_skips_oversized():
+    cache = CompressedCache(max_bytes=10)
+    cache.put(("a", "gzip"), b"1234")
+    cache.put(("a", "gzip"), b"12")
+    assert cache.size == 2
+
+    cache.put(("b", "gzip"), b"x" * 11)
+    assert cache.get(("b", "gzip")) is None
+    assert cache.get(("a", "gzip")) == b"12"
+
+
+# 304
+
+def test_not_modified_returns_encoded_etag_sent_by_client():
+    message = not_modified(start_message(304), "gzip", '"abc-gzip"')
+    assert header(message, "etag") == '"abc-gzip"'
+    assert header(message, "vary") == "Accept-Encoding"
+
+
+def test_not_modified_keeps_plain_etag():
+    # Клиент хранит несжатый вариант или не принимает сжатие
+    assert header(not_modified(start_message(304), "gzip", '"abc"'), "etag") == '"abc"'
+    assert header(not_modified(start_message(304), None, '"abc-gzip"'), "etag") == '"abc"'
+    assert header(not_modified(start_message(304), "gzip", None), "vary") == "Accept-Encoding"
+
+
+# Middleware
+
+def run_middleware(middleware, accept_encoding: str) -> list[dict]:
+    async def scenario():
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            "type": "http", "method": "GET", "path": "/",
+            "headers": [(b"accept-encoding", accept_encoding.encode())],
+        }
+        await middleware(scope, receive, send)
+        return messages
+
+    return asyncio.run(scenario())
+
+
+def test_middleware_compresses_with_encoded_etag_and_caches():
+    body = json.dumps([{"name": "Рубашка", "id": index} for index in range(200)]).encode()
+    assert len(body) >= COMPRESSION_MIN_SIZE
+
+    async def app(scope, receive, send):
+        await send(start_message())
+        await send({"type": "http.response.body", "body": body})
+
+    middleware = CompressionMiddleware(app)
+    start, message = run_middleware(middleware, "gzip")
+    assert header(start, "content-encoding") == "gzip"
+    assert header(start, "etag") == '"abc-gzip"'
+    assert header(start, "vary") == "Accept-Encoding"
+    assert gzip.decompress(message["body"]) == body
+    assert middleware.cache.get(('"abc"', "gzip")) == message["body"]
+
+    start, message = run_middleware(middleware, "identity")
+    assert header(start, "content-encoding") is None
+    assert header(start, "etag") == '"abc"'
+    assert message["body"] == body
@@ -0,0 +1,138 @@
+"""
+Тесты бюджета времени запроса (app/backend/deadline.py).
+
+Приложение - FastAPI только с DeadlineMiddleware и маршрутами на get_db;
+вместо PostgreSQL - SQLite во временном файле (пул с выдачей соединений,
+как в production).
+
+Запуск:
+    python -m pytest tests/test_deadline.py
+"""
+import asyncio
+import tempfile
+import time
+from typing import Annotated
+
+import httpx
+from fastapi import Depends, FastAPI
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.backend.db_depends as db_depends
+from app.backend import deadline
+from app.backend.deadline import DeadlineExceeded, DeadlineMiddleware
+
+
+def deadline_count(route: str, reason: str) -> float:
+    value = REGISTRY.get_sample_value(
+        "http_request_deadline_total", {"route": route, "reason": reason}
+    )
+    return value or 0.0
+
+
+def make_app():
+    """Приложение с медленным маршрутом и движок SQLite для его сессий"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/deadline.db")
+    db_depends.async_session_maker = async_sessionmaker(
+        engine, expire_on_commit=False, class_=AsyncSession
+    )
+    app = FastAPI()
+
+    # Как admission_middleware в app.main: BaseHTTPMiddleware внутри
+    # DeadlineMiddleware повторяет отмену через cancel scope anyio
+    @app.middleware("http")
+    async def passthrough(request, call_next):
+        return await call_next(request)
+
+    app.add_middleware(DeadlineMiddleware)
+
+    @app.get("/test-deadline/slow")
+    async def slow(db: Annotated[db_depends.LazySession, Depends(db_depends.get_db)]):
+        await db.execute(text("SELECT 1"))  # Сессия держит соединение из пула
+        await asyncio.sleep(5)
+        return {}
+
+    @app.get("/test-deadline/fast")
+    async def fast(db: Annotated[db_depends.LazySession, Depends(db_depends.get_db)]):
+        await db.execute(text("SELECT 1"))
+        return {"ok": True}
+
+    return app, engine
+
+
+def http_scope(app, path: str) -> dict:
+    return {
+        "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"localhost")], "server": ("localhost", 80),
+        "client": ("127.0.0.1", 1), "app": app,
+    }
+
+
+def test_budget_for_routes():
+    deadline.REQUEST_BUDGETS["GET /test-deadline/unlimited"] = 0
+    assert deadline.budget_for("GET", "/test-deadline/unlimited") is None
+    assert deadline.budget_for("GET", "/test-deadline/unknown") == deadline.REQUEST_BUDGET_DEFAULT
+
+
+def test_check_deadline():
+    token = deadline._deadline.set(time.monotonic() - 1)
+    try:
+        try:
+            deadline.check_deadline()
+        except DeadlineExceeded as ex:
+            assert deadline.is_deadline_error(ex)
+        else:
+            raise AssertionError("DeadlineExceeded expected")
+    finally:
+        deadline._deadline.reset(token)
+    deadline.check_deadline()  # Вне запроса бюджета нет
+
+
+def test_budget_exceeded_returns_504_and_releases_connection():
+    app, engine = make_app()
+    deadline.REQUEST_BUDGETS["GET /test-deadline/slow"] = 0.2
+    before = deadline_count("/test-deadline/slow", "deadline")
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+            response = await client.get("/test-deadline/slow")
+            assert response.status_code == 504
+            assert response.json() == {"detail": "Request budget exceeded"}
+            assert engine.pool.checkedout() == 0
+
+            # Соединение вернулось в пул исправным
+            response = await client.get("/test-deadline/fast")
+            assert response.status_code == 200
+        await engine.dispose()
+
+    asyncio.run(scenario())
+    assert deadline_count("/test-deadline/slow", "deadline") == before + 1
+
+
+def test_client_disconnect_returns_499_and_releases_connection():
+    app, engine = make_app()
+    deadline.REQUEST_BUDGETS["GET /test-deadline/slow"] = 10
+    before = deadline_count("/test-deadline/slow", "client_disconnect")
+
+    async def scenario():
+        async def receive():
+            await asyncio.sleep(deadline.WATCH_AFTER + 0.1)
+            return {"type": "http.disconnect"}
+
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        start = time.monotonic()
+        await app(http_scope(app, "/test-deadline/slow"), receive, send)
+        assert time.monotonic() - start < 2
+        assert messages[0]["status"] == 499
+        assert engine.pool.checkedout() == 0
+        await engine.dispose()
+
+    asyncio.run(scenario())
+    assert deadline_count("/test-deadline/slow", "client_disconnect") == before + 1
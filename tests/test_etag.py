@@ -0,0 +1,176 @@
+"""
+Тесты версий таблиц и условных GET-запросов (app/backend/etag.py).
+
+Счётчики версий проверяются на синхронной сессии SQLite в памяти (события
+сессии те же, что у AsyncSession), conditional_get и полный цикл
+"запись - новый ETag" - на приложении с маршрутами категорий и SQLite во
+временном файле.
+
+Запуск:
+    python -m pytest tests/test_etag.py
+"""
+import asyncio
+import tempfile
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from sqlalchemy import create_engine, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+import app.backend.db_depends as db_depends
+from app.backend.db import Base
+from app.backend.etag import conditional_get, encoded_etag, etag_matches, make_etag
+from app.models import Category, Review, TableVersion
+from app.routers import category
+from app.routers.auth import get_current_user
+
+
+def make_request(path: str = "/categories/all", query: str = "", if_none_match: str | None = None):
+    headers = [(b"host", b"localhost")]
+    if if_none_match is not None:
+        headers.append((b"if-none-match", if_none_match.encode()))
+    return Request({
+        "type": "http", "method": "GET", "scheme": "http", "path": path,
+        "query_string": query.encode(), "headers": headers, "server": ("localhost", 80),
+    })
+
+
+def versions(session: Session) -> dict[str, int]:
+    return dict(session.execute(select(TableVersion.name, TableVersion.version)).all())
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+# ETag
+
+def test_make_etag_depends_on_url_and_versions():
+    etag = make_etag(make_request(), {"categories": 1})
+    assert etag.startswith('"') and etag.endswith('"')
+    assert make_etag(make_request(), {"categories": 1}) == etag
+    assert make_etag(make_request(), {"categories": 2}) != etag
+    assert make_etag(make_request(query="page=2"), {"categories": 1}) != etag
+    assert make_etag(make_request("/products/all"), {"categories": 1}) != etag
+
+
+def test_make_etag_ignores_version_order():
+    request = make_request()
+    assert make_etag(request, {"products": 3, "categories": 1}) == make_etag(
+        request, {"categories": 1, "products": 3}
+    )
+
+
+def test_etag_matches():
+    etag = '"abc"'
+    assert etag_matches('"abc"', etag)
+    assert etag_matches('W/"abc"', etag)
+    assert etag_matches('"old", "abc"', etag)
+    assert etag_matches(encoded_etag(etag, "gzip"), etag)
+    assert etag_matches(encoded_etag(etag, "br"), etag)
+    assert not etag_matches('"abd"', etag)
+    assert not etag_matches("*", etag)
+    assert not etag_matches("", etag)
+    assert not etag_matches(None, etag)
+
+
+# Счётчики версий
+
+def test_bump_on_dml(session):
+    session.execute(insert(Category).values(name="Рубашки", slug="rubashki"))
+    assert versions(session) == {"categories": 1}
+
+    session.execute(update(Category).values(is_active=False))
+    assert versions(session) == {"categories": 2}
+
+    # Таблица без версии счётчик не заводит
+    session.execute(update(Review).values(is_active=False))
+    assert versions(session) == {"categories": 2}
+
+
+def test_bump_on_flush(session):
+    shirts = Category(name="Рубашки", slug="rubashki")
+    session.add(shirts)
+    session.flush()
+    assert versions(session) == {"categories": 1}
+
+    shirts.name = "Рубашки и блузы"
+    session.flush()
+    assert versions(session) == {"categories": 2}
+
+    # Присваивание того же значения - не изменение
+    shirts.name = "Рубашки и блузы"
+    session.flush()
+    assert versions(session) == {"categories": 2}
+
+    session.delete(shirts)
+    session.flush()
+    assert versions(session) == {"categories": 3}
+
+
+# conditional_get
+
+def test_conditional_get():
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/etag.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(insert(TableVersion).values(name="categories", version=5))
+
+        async with AsyncSession(engine) as db:
+            headers = await conditional_get(make_request(), db, "categories")
+            assert headers["ETag"] == make_etag(make_request(), {"categories": 5})
+            assert headers["Cache-Control"] == "no-cache"
+
+            with pytest.raises(HTTPException) as info:
+                await conditional_get(make_request(if_none_match=headers["ETag"]), db, "categories")
+            assert info.value.status_code == 304
+            assert info.value.headers == headers
+
+            with pytest.raises(ValueError):
+                await conditional_get(make_request(), db, "reviews")
+        await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_write_changes_etag():
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/etag.db")
+    db_depends.async_session_maker = async_sessionmaker(
+        engine, expire_on_commit=False, class_=AsyncSession
+    )
+    app = FastAPI()
+    app.include_router(category.router)
+    app.dependency_overrides[get_current_user] = lambda: {"id": 1, "is_admin": True}
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+            response = await client.get("/categories/all")
+            assert response.status_code == 200
+            etag = response.headers["etag"]
+
+            response = await client.get("/categories/all", headers={"If-None-Match": etag})
+            assert response.status_code == 304
+            assert response.headers["etag"] == etag
+
+            response = await client.post("/categories/", json={"name": "Рубашки", "parent_id": None})
+            assert response.status_code == 200
+
+            response = await client.get("/categories/all", headers={"If-None-Match": etag})
+            assert response.status_code == 200
+            assert response.headers["etag"] != etag
+            assert [item["name"] for item in response.json()] == ["Рубашки"]
+        await engine.dispose()
+
+    asyncio.run(scenario())